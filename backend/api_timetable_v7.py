@@ -28,8 +28,23 @@ from services.supabase_service import (
     fetch_rooms, 
     fetch_sections,
     fetch_subjects,
-    save_timetable_slots,
-    fetch_timetable_slots
+    iter_timetable_slot_pages,
+    start_http_client,
+    close_http_client
+)
+from services.persistence_queue import PersistenceQueue
+from services.timetable_snapshot import SnapshotStore, TimetableSnapshot
+from services.shared_timetable import SharedTimetableFile
+from services.section_registry import section_registry
+from services.faculty_index import FacultySubjectIndex, faculty_subject_index
+from services.data_sources import filter_by_semester_type
+from services.response_cache import ResponseCache
+from services.timetable_export import (
+    EXPORT_FORMATS,
+    EXPORT_MEDIA_TYPES,
+    export_chunks,
+    iter_export_rows,
+    parquet_available
 )
 
 app = FastAPI(title="RVCE Timetable API V7", version="7.0.0")
@@ -48,7 +63,7 @@ app.add_middleware(
 
 import traceback
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -60,14 +75,77 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 # Global state
+# Solver of the last generate (writer side only; readers use snapshots)
 solver: Optional[TimetableSolverV7] = None
-timetable_result: Optional[dict] = None
+# Published timetable: readers take snapshots.current once per request
+snapshots = SnapshotStore(DAYS, TIME_SLOTS)
+# Write-behind journal: saves to Supabase are flushed in the background
+persistence: Optional[PersistenceQueue] = None
+# Encoded GET responses of the current snapshot
+response_cache = ResponseCache()
+
+def get_faculty_subject_index(faculty_list: List[dict]) -> FacultySubjectIndex:
+    """The index the solver built at load, or one built from faculty_list before any solver run"""
+    if not len(faculty_subject_index):
+        faculty_subject_index.build(faculty_list)
+    return faculty_subject_index
+
+def require_snapshot() -> TimetableSnapshot:
+    """The published timetable, or 404 if none has been generated"""
+    snap = snapshots.current
+    if snap is None:
+        raise HTTPException(status_code=404, detail="Timetable not generated yet")
+    return snap
 
 @app.on_event("startup")
 async def on_startup():
+    global persistence
     # Base.metadata.create_all(bind=engine)
-    # Attempt to restore state
-    await restore_timetable_from_db()
+    # One pooled Supabase client for the whole app
+    await start_http_client()
+    persistence = PersistenceQueue()
+    persistence.start()
+    # Workers share the published timetable through a local SQLite file;
+    # only the first one restores from Supabase, the rest load its result
+    shared = SharedTimetableFile()
+    snapshots.attach(shared)
+    if shared.claim_restore():
+        restored = False
+        try:
+            # The file survives restarts but Supabase is the source of truth:
+            # reload unless the file holds saves not flushed yet, or another
+            # worker of this start-up has just restored it
+            if shared.latest_version() == 0 or (
+                    not persistence.pending_count() and not shared.restored_within()):
+                restored = await restore_timetable_from_db()
+        finally:
+            shared.release_restore(restored)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    if persistence is not None:
+        await persistence.stop()
+    if snapshots.reload_task is not None:
+        await asyncio.gather(snapshots.reload_task, return_exceptions=True)
+    if snapshots.shared is not None:
+        snapshots.shared.close()
+        snapshots.shared = None
+    await close_http_client()
+
+@app.middleware("http")
+async def sync_shared_timetable(request: Request, call_next):
+    """Start loading a timetable another worker published; this request keeps the current one"""
+    if snapshots.stale():
+        snapshots.reload_soon()
+    return await call_next(request)
+
+def get_persistence() -> PersistenceQueue:
+    """The app's journal (opened lazily if startup did not run)"""
+    global persistence
+    if persistence is None:
+        persistence = PersistenceQueue()
+        persistence.start()
+    return persistence
 
 # Cache for Supabase data (to avoid repeated async calls in sync endpoints)
 _data_cache = {
@@ -80,58 +158,59 @@ _data_cache = {
 
 async def restore_timetable_from_db():
     """Restore timetable state from Supabase if available"""
-    global timetable_result, solver
-    
     # Try to fetch slots
     try:
-        slots = await fetch_timetable_slots()
-        if not slots:
-            return False
-            
-        print(f"🔄 Restoring {len(slots)} slots from Supabase...")
-        
-        # Reconstruct schedule
+        # Reconstruct schedule page by page (all pages, never all raw JSON at once)
         schedule = {}
-        semester_type = slots[0]['semester_type'] if slots else 'odd'
+        semester_type = None
+        restored = 0
         
-        for s in slots:
-            key = f"{s['section_id']}_{s['day']}_{s['slot']}"
-            schedule[key] = {
-                'subject': {
-                    'name': s['subject_name'], 
-                    'course_code': s['subject_code'],
-                    'subject_type': s['subject_type'],
-                    'department': s['department'],
-                    'semester': s['semester']
-                },
-                'room': s['room_id'],
-                'faculty': {'id': s['faculty_id'], 'name': s['faculty_name']},
-                'is_lab': s['is_lab']
-            }
-            
-        # Reconstruct basic solver state (mocking it)
-        timetable_result = {
-            'schedule': schedule,
-            'semester_type': semester_type,
-            'valid_semesters': [], # Populate if needed
-            'fitness': 1.0
-        }
+        async for page in iter_timetable_slot_pages():
+            if semester_type is None and page:
+                semester_type = page[0]['semester_type']
+            restored += len(page)
+            for s in page:
+                key = f"{s['section_id']}_{s['day']}_{s['slot']}"
+                schedule[key] = {
+                    'subject': {
+                        'name': s['subject_name'], 
+                        'course_code': s['subject_code'],
+                        'subject_type': s['subject_type'],
+                        'department': s['department'],
+                        'semester': s['semester']
+                    },
+                    'room': s['room_id'],
+                    'faculty': {'id': s['faculty_id'], 'name': s['faculty_name']},
+                    'is_lab': s['is_lab']
+                }
         
-        # We also need to init solver sections for get_sections to work
-        # This is a bit hacky without full solver init, but works for viewing
-        sections_data = await fetch_sections(semester_type)
-        # Mock solver to hold sections
-        class MockSolver:
-            def __init__(self, sex):
-                self.sections = []
+        if not restored:
+            if snapshots.current is not None:
+                # Supabase holds no timetable: the shared file's copy is stale
+                print("🔄 No timetable in Supabase - clearing the stale local copy")
+                async with snapshots.write_lock:
+                    await snapshots.clear()
+                return True
+            return False
         
-        solver = MockSolver(sections_data)
-        solver.sections = [{
-            'id': s['id'],
-            'department': s['department'],
-            'semester': s['semester'],
-            'section': s['section']
-        } for s in sections_data]
+        print(f"🔄 Restored {restored} slots from Supabase")
+            
+        # Sections come from Supabase; rooms are only known after a generate,
+        # so keep the ones of the copy being replaced
+        previous = snapshots.current
+        rooms = previous.rooms if previous is not None and previous.semester_type == semester_type else []
+        await section_registry.refresh()
+        async with snapshots.write_lock:
+            await snapshots.publish_result(
+                {
+                    'schedule': schedule,
+                    'semester_type': semester_type,
+                    'valid_semesters': [], # Populate if needed
+                    'fitness': 1.0
+                },
+                filter_by_semester_type(section_registry.sections(), semester_type),
+                rooms
+            )
         
         return True
     except Exception as e:
@@ -248,12 +327,13 @@ class GenerateRequest(BaseModel):
 
 @app.get("/health")
 def health():
-    global timetable_result
+    snap = snapshots.current
     return {
         "status": "healthy",
         "version": "7.0.0",
         "features": ["odd_even_semesters", "consecutive_labs", "strict_time_slots", "saturday_half_day"],
-        "current_semester_type": timetable_result.get('semester_type') if timetable_result else None
+        "current_semester_type": snap.semester_type if snap else None,
+        "timetable_version": snap.version if snap else None
     }
 
 @app.get("/api/timetable/departments")
@@ -271,7 +351,7 @@ async def get_departments():
 @app.post("/api/timetable/generate")
 async def generate_timetable(request: GenerateRequest = GenerateRequest()):
     """Generate timetable for ODD or EVEN semesters"""
-    global solver, timetable_result
+    global solver
     
     print(f"🚀 RECEIVED GENERATE REQUEST: {request.semester_type}")
     
@@ -287,13 +367,17 @@ async def generate_timetable(request: GenerateRequest = GenerateRequest()):
         await load_rooms_from_supabase()
         await load_departments_from_supabase()
         
-        solver = TimetableSolverV7(request.semester_type)
-        try:
-            timetable_result = await solver.generate()
-        except Exception as e:
-            print(f"🔥 SOLVER CRASHED: {e}")
-            traceback.print_exc()
-            raise HTTPException(status_code=500, detail=f"Solver Failure: {str(e)}")
+        # One writer at a time: an edit cannot interleave with a generate
+        async with snapshots.write_lock:
+            new_solver = TimetableSolverV7(request.semester_type)
+            try:
+                timetable_result = await new_solver.generate()
+            except Exception as e:
+                print(f"🔥 SOLVER CRASHED: {e}")
+                traceback.print_exc()
+                raise HTTPException(status_code=500, detail=f"Solver Failure: {str(e)}")
+            solver = new_solver
+            await snapshots.publish_result(timetable_result, solver.sections, solver.rooms)
         
         total_slots = len(timetable_result['schedule'])
         lab_count = sum(1 for v in timetable_result['schedule'].values() 
@@ -327,10 +411,15 @@ async def generate_timetable(request: GenerateRequest = GenerateRequest()):
                     'semester_type': request.semester_type
                 })
             
-            await save_timetable_slots(slots_to_save, request.semester_type)
-            print(f"✅ Saved {len(slots_to_save)} slots to Supabase")
+            job_id = get_persistence().enqueue(
+                'timetable', request.semester_type,
+                {'slots': slots_to_save, 'semester_type': request.semester_type},
+                rows=len(slots_to_save)
+            )
+            print(f"📒 Queued {len(slots_to_save)} slots for Supabase (job {job_id})")
         except Exception as save_error:
-            print(f"⚠️ Warning: Could not save to Supabase: {save_error}")
+            job_id = None
+            print(f"⚠️ Warning: Could not queue save to Supabase: {save_error}")
         
         return {
             "success": True,
@@ -340,9 +429,11 @@ async def generate_timetable(request: GenerateRequest = GenerateRequest()):
                 "semesters": timetable_result['valid_semesters'],
                 "total_slots": total_slots,
                 "lab_slots": lab_count,
-                "sections": len(solver.sections),
-                "coverage": "N/A"
-            }
+                "sections": len(new_solver.sections),
+                "coverage": "N/A",
+                "generation_time_s": timetable_result['run_report']['total_wall_s']
+            },
+            "persistence": {"job_id": job_id, "status": "queued" if job_id else "not_saved"}
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -351,11 +442,19 @@ async def generate_timetable(request: GenerateRequest = GenerateRequest()):
 async def clear_timetable(semester_type: Optional[str] = None):
     """Clear generated timetable slots"""
     try:
-        from services.supabase_service import clear_timetable_slots
-        await clear_timetable_slots(semester_type)
-        global timetable_result
-        timetable_result = None
-        return {"success": True, "message": "Timetable cleared successfully"}
+        # Unflushed saves would otherwise re-create the cleared slots; the clear
+        # itself is journaled, so it also runs after a save being flushed right now
+        get_persistence().cancel_pending('timetable', semester_type)
+        get_persistence().cancel_pending('section')
+        job_id = get_persistence().enqueue('clear', semester_type or 'all', {'semester_type': semester_type})
+        async with snapshots.write_lock:
+            await snapshots.clear()
+        response_cache.invalidate()
+        return {
+            "success": True,
+            "message": "Timetable cleared successfully",
+            "persistence": {"job_id": job_id, "status": "queued"}
+        }
     except Exception as e:
         print(f"Failed to clear timetable: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -363,7 +462,7 @@ async def clear_timetable(semester_type: Optional[str] = None):
 
 @app.get("/api/timetable/stats")
 async def get_stats():
-    global solver, timetable_result
+    snap = snapshots.current
     
     # Load counts from Supabase (or cache)
     try:
@@ -373,7 +472,7 @@ async def get_stats():
         faculty_list = load_faculty_from_csv()
         rooms_list = load_rooms_from_csv()
     
-    if not timetable_result:
+    if snap is None:
         return {
             "generated": False, 
             "message": "No timetable generated yet",
@@ -381,36 +480,50 @@ async def get_stats():
             "rooms_count": len(rooms_list)
         }
     
-    total_slots = len(timetable_result['schedule'])
-    lab_count = sum(1 for v in timetable_result['schedule'].values() if v.get('is_lab'))
+    total_slots = len(snap.schedule)
+    lab_count = sum(1 for v in snap.schedule.values() if v.get('is_lab'))
     faculty_count = len(faculty_list)
     
     # Count unique subjects from the schedule
     unique_subjects = set()
-    for v in timetable_result['schedule'].values():
+    for v in snap.schedule.values():
         subj = v.get('subject', {})
         if subj.get('name'):
             unique_subjects.add(f"{subj.get('name')}_{subj.get('department', '')}")
     
     return {
         "generated": True,
-        "semester_type": timetable_result['semester_type'],
+        "semester_type": snap.semester_type,
         "total_slots": total_slots,
         "lab_slots": lab_count,
         "theory_slots": total_slots - lab_count,
         "faculty_count": faculty_count,
-        "sections_count": len(solver.sections) if solver else 0,
+        "sections_count": len(snap.sections),
         "rooms_count": len(rooms_list),
         "subjects_count": len(unique_subjects)
     }
 
+@app.get("/api/timetable/run-report")
+async def get_run_report():
+    """Phase timings, constraint-check counters and peak memory of the last generation"""
+    snap = snapshots.current
+    if snap is None or not snap.result.get('run_report'):
+        raise HTTPException(status_code=404, detail="No generation run in this process yet")
+    return snap.result['run_report']
+
+@app.get("/api/timetable/persistence-status")
+async def get_persistence_status():
+    """Background Supabase flush: pending/failed jobs, last flush and recent job results"""
+    return get_persistence().status()
+
 @app.get("/api/timetable/sections")
 async def get_sections(department: Optional[str] = None, semester_type: Optional[str] = None):
     """Get all sections, filtered by department and semester_type (odd/even)"""
     try:
         # Auto-detect semester type from generated result if not explicitly provided
-        if not semester_type and timetable_result and 'semester_type' in timetable_result:
-            semester_type = timetable_result['semester_type']
+        snap = snapshots.current
+        if not semester_type and snap and snap.semester_type:
+            semester_type = snap.semester_type
 
         # Use semester_type filter when fetching
         fetch_type = semester_type if semester_type in ['odd', 'even'] else 'all'
@@ -436,119 +549,66 @@ async def get_sections(department: Optional[str] = None, semester_type: Optional
         return {"sections": formatted_sections}
     except Exception as e:
         print(f"Error fetching sections: {e}")
-        # Fallback to solver if available
-        global solver
-        if solver:
-             return {"sections": solver.sections}
+        # Fallback to the published timetable's sections
+        snap = snapshots.current
+        if snap:
+             return {"sections": snap.sections}
         return {"sections": []}
 
 @app.get("/api/timetable/section/{section_id}")
 @app.get("/api/timetable/sections/{section_id}")
-async def get_section_timetable(section_id: str):
-    global timetable_result, solver
-    if not timetable_result:
-        raise HTTPException(status_code=404, detail="Timetable not generated yet")
+async def get_section_timetable(section_id: str, request: Request):
+    snap = require_snapshot()
     
-    # Find section details
-    section_info = None
-    for sec in solver.sections:
-        if str(sec['id']) == section_id:
-            section_info = sec
-            break
+    # Encoded once per timetable version (services/response_cache.py)
+    async def build():
+        # Find section details
+        section_info = section_registry.get(section_id)
     
-    # Filter for this section
-    slots = []
-    prefix = f"{section_id}_"
-    
-    for key, val in timetable_result['schedule'].items():
-        if key.startswith(prefix):
-            # Parse key: section_id_Day_slot
-            parts = key.split('_')
-            day_name = parts[1]
-            slot_num = int(parts[2])
-            
-            day_index = DAYS.index(day_name) + 1 if day_name in DAYS else 0
-            
-            slots.append({
-                'day': day_index,
-                'day_name': day_name,
-                'slot': slot_num,
-                'time': TIME_SLOTS.get(slot_num, ''),
-                'subject': val.get('subject', {}),
-                'room': {'name': val.get('room', '')},
-                'is_lab': val.get('is_lab', False),
-                'faculty': val.get('faculty', {}),
-                'section': section_info
-            })
+        # This section's slots, already sorted by day and slot
+        model = snap.read_model
+        slots = [model.slot_view(s, section_info) for s in model.section_slots(section_id)]
     
-    # Sort by day and slot
-    slots.sort(key=lambda x: (x['day'], x['slot']))
+        return {"slots": slots, "section": section_info}
     
-    return {"slots": slots, "section": section_info}
+    return await response_cache.respond(request, snap, build)
 
 
 @app.get("/api/timetable/rooms")
 async def get_rooms():
-    global solver
+    snap = snapshots.current
     # Load rooms from Supabase (or cache)
     try:
         rooms = await load_rooms_from_supabase()
     except Exception:
         rooms = load_rooms_from_csv()
-    if not rooms and solver:
-        rooms = solver.rooms
+    if not rooms and snap:
+        rooms = snap.rooms
     return {"rooms": rooms}
 
 
 @app.get("/api/timetable/rooms/{room_id}")
-async def get_room_timetable(room_id: str):
+async def get_room_timetable(room_id: str, request: Request):
     """Get timetable for a specific room"""
-    global timetable_result, solver
-    if not timetable_result:
-        raise HTTPException(status_code=404, detail="Timetable not generated yet")
+    snap = require_snapshot()
     
-    slots = []
+    # Encoded once per timetable version (services/response_cache.py)
+    async def build():
+        slots = []
     
-    for key, val in timetable_result['schedule'].items():
-        room = val.get('room', '')
-        if room == room_id:
-            # Parse key: section_id_Day_slot
-            parts = key.split('_')
-            section_id = parts[0]
-            day_name = parts[1]
-            slot_num = int(parts[2])
-            
-            day_index = DAYS.index(day_name) + 1 if day_name in DAYS else 0
-            
-            # Get section info
-            section_info = None
-            for sec in solver.sections:
-                if str(sec['id']) == section_id:
-                    section_info = sec
-                    break
-            
-            slots.append({
-                'day': day_index,
-                'day_name': day_name,
-                'slot': slot_num,
-                'time': TIME_SLOTS.get(slot_num, ''),
-                'subject': val.get('subject', {}),
-                'room': {'name': room},
-                'is_lab': val.get('is_lab', False),
-                'faculty': val.get('faculty', {}),
-                'section': section_info
-            })
+        for slot_ref in snap.read_model.room_slots(room_id):
+            section_info = section_registry.get(slot_ref['section_id'])
+            slots.append(snap.read_model.slot_view(slot_ref, section_info))
     
-    # Sort by day and slot
-    slots.sort(key=lambda x: (x['day'], x['slot']))
+        return {"slots": slots, "room": room_id}
     
-    return {"slots": slots, "room": room_id}
+    return await response_cache.respond(request, snap, build)
 
 
 @app.get("/api/timetable/faculty")
 async def get_faculty():
     """Get list of all faculty members with their assigned hours"""
-    global solver, timetable_result
+    snap = snapshots.current
     
     # Load faculty from Supabase (or cache)
     try:
@@ -556,87 +616,55 @@ async def get_faculty():
     except Exception:
         faculty_list = load_faculty_from_csv()
     
-    # Count hours per faculty from schedule if timetable exists
-    faculty_hours = {}
-    if timetable_result:
-        for val in timetable_result['schedule'].values():
-            faculty = val.get('faculty', {})
-            fid = faculty.get('id')
-            if fid:
-                faculty_hours[fid] = faculty_hours.get(fid, 0) + 1
-    
-    # Add assigned hours to each faculty
+    # Add assigned hours to each faculty (counters kept by the read model)
+    model = snap.read_model if snap else None
     for f in faculty_list:
-        f['assigned_hours'] = faculty_hours.get(f['id'], 0)
+        f['assigned_hours'] = model.faculty_hours(f['id']) if model else 0
+        if model:
+            f['workload'] = model.faculty_workload(f['id'])
     
     return {"faculty": faculty_list}
 
 
 @app.get("/api/timetable/faculty/{faculty_id}")
-async def get_faculty_timetable(faculty_id: str):
+async def get_faculty_timetable(faculty_id: str, request: Request):
     """Get timetable for a specific faculty member"""
-    global timetable_result, solver
-    
-    # Find faculty info (try Supabase first)
-    try:
-        faculty_list = await load_faculty_from_supabase()
-    except:
-        faculty_list = load_faculty_from_csv()
-    faculty_info = None
-    for f in faculty_list:
-        if f['id'] == faculty_id:
-            faculty_info = f
-            break
-    
-    if not timetable_result:
-        return {"slots": [], "faculty": faculty_info or {"id": faculty_id, "name": faculty_id}}
+    snap = snapshots.current
     
-    slots = []
-    
-    for key, val in timetable_result['schedule'].items():
-        faculty = val.get('faculty', {})
+    async def build():
+        # Find faculty info (try Supabase first)
+        try:
+            faculty_list = await load_faculty_from_supabase()
+        except:
+            faculty_list = load_faculty_from_csv()
+        faculty_info = None
+        for f in faculty_list:
+            if f['id'] == faculty_id:
+                faculty_info = f
+                break
+        
+        if snap is None:
+            return {"slots": [], "faculty": faculty_info or {"id": faculty_id, "name": faculty_id}}
+        
+        slots = []
+        
         # Match by faculty ID or name
-        if faculty.get('id') == faculty_id or faculty.get('name') == faculty_id:
-            # Parse key: section_id_Day_slot
-            parts = key.split('_')
-            section_id = parts[0]
-            day_name = parts[1]
-            slot_num = int(parts[2])
-            
-            day_index = DAYS.index(day_name) + 1 if day_name in DAYS else 0
-            
-            # Get section info
-            section_info = None
-            if solver:
-                for sec in solver.sections:
-                    if str(sec['id']) == section_id:
-                        section_info = sec
-                        break
-            
-            slots.append({
-                'day': day_index,
-                'day_name': day_name,
-                'slot': slot_num,
-                'time': TIME_SLOTS.get(slot_num, ''),
-                'subject': val.get('subject', {}),
-                'room': {'name': val.get('room', '')},
-                'is_lab': val.get('is_lab', False),
-                'faculty': faculty,
-                'section': section_info
-            })
-    
-    # Sort by day and slot
-    slots.sort(key=lambda x: (x['day'], x['slot']))
+        for slot_ref in snap.read_model.faculty_slots(faculty_id, match_name=True):
+            section_info = section_registry.get(slot_ref['section_id'])
+            slots.append(snap.read_model.slot_view(slot_ref, section_info))
+        
+        return {"slots": slots, "faculty": faculty_info or {"id": faculty_id, "name": faculty_id}}
     
-    return {"slots": slots, "faculty": faculty_info or {"id": faculty_id, "name": faculty_id}}
+    if snap is None:
+        return await build()
+    # Encoded once per timetable version (services/response_cache.py)
+    return await response_cache.respond(request, snap, build)
 
 
 @app.get("/api/timetable/faculty-schedule/{faculty_id}")
 async def get_faculty_schedule(faculty_id: str):
     """Get detailed schedule for a specific faculty member with total hours"""
-    global timetable_result, solver
-    if not timetable_result:
-        raise HTTPException(status_code=404, detail="Timetable not generated yet")
+    snap = require_snapshot()
     
     slots = []
     
@@ -651,47 +679,10 @@ async def get_faculty_schedule(faculty_id: str):
             faculty_info = f
             break
     
-    if not timetable_result:
-        return {
-            "slots": [], 
-            "faculty": faculty_info or {"id": faculty_id, "name": faculty_id},
-            "total_hours": 0
-        }
-    
-    for key, val in timetable_result['schedule'].items():
-        faculty = val.get('faculty', {})
-        # Match by faculty ID
-        if faculty.get('id') == faculty_id:
-            # Parse key: section_id_Day_slot
-            parts = key.split('_')
-            section_id = parts[0]
-            day_name = parts[1]
-            slot_num = int(parts[2])
-            
-            day_index = DAYS.index(day_name) + 1 if day_name in DAYS else 0
-            
-            # Get section info
-            section_info = None
-            if solver:
-                for sec in solver.sections:
-                    if str(sec['id']) == section_id:
-                        section_info = sec
-                        break
-            
-            slots.append({
-                'day': day_index,
-                'day_name': day_name,
-                'slot': slot_num,
-                'time': TIME_SLOTS.get(slot_num, ''),
-                'subject': val.get('subject', {}),
-                'room': {'name': val.get('room', '')},
-                'is_lab': val.get('is_lab', False),
-                'faculty': faculty,
-                'section': section_info
-            })
-    
-    # Sort by day and slot
-    slots.sort(key=lambda x: (x['day'], x['slot']))
+    # Match by faculty ID
+    for slot_ref in snap.read_model.faculty_slots(faculty_id):
+        section_info = section_registry.get(slot_ref['section_id'])
+        slots.append(snap.read_model.slot_view(slot_ref, section_info))
     
     return {
         "slots": slots, 
@@ -701,51 +692,161 @@ async def get_faculty_schedule(faculty_id: str):
 
 
 @app.get("/api/timetable/all")
-async def get_all_timetables():
+async def get_all_timetables(
+    request: Request,
+    response_format: str = Query('full', alias='format', description="'full' or 'compact' (normalized tables + slot rows)")
+):
     """Get all timetables organized by section"""
-    global timetable_result, solver
-    if not timetable_result:
-        raise HTTPException(status_code=404, detail="Timetable not generated yet")
+    snap = require_snapshot()
+    if response_format not in ['full', 'compact']:
+        raise HTTPException(status_code=400, detail="format must be 'full' or 'compact'")
+    
+    # Encoded once per timetable version (services/response_cache.py)
+    async def build():
+        if response_format == 'compact':
+            payload = snap.read_model.compact([sec['id'] for sec in snap.sections], section_registry.get)
+            payload['semester_type'] = snap.semester_type
+            payload['total_sections'] = len(snap.sections)
+            return payload
+        
+        # Organize by section
+        sections_data = {}
+    
+        for sec in snap.sections:
+            sec_id = str(sec['id'])
+            sections_data[sec_id] = {
+                'info': sec,
+                'slots': []
+            }
     
-    # Organize by section
-    sections_data = {}
+        # Slots per section, already sorted by day and slot
+        model = snap.read_model
+        for sec_id, data in sections_data.items():
+            data['slots'] = [model.slot_view(s, with_section=False) for s in model.section_slots(sec_id)]
     
-    for sec in solver.sections:
-        sec_id = str(sec['id'])
-        sections_data[sec_id] = {
-            'info': sec,
-            'slots': []
+        return {
+            "sections": sections_data,
+            "semester_type": snap.semester_type,
+            "total_sections": len(snap.sections)
         }
     
-    for key, val in timetable_result['schedule'].items():
-        parts = key.split('_')
-        section_id = parts[0]
-        day_name = parts[1]
-        slot_num = int(parts[2])
+    return await response_cache.respond(request, snap, build)
+
+
+BATCH_KINDS = ['section', 'faculty', 'room']
+MAX_BATCH_IDS = 500
+
+
+@app.get("/api/timetable/batch")
+async def get_batch_timetables(
+    request: Request,
+    kind: str = Query('section', description="'section', 'faculty' or 'room'"),
+    ids: Optional[str] = Query(None, description="Comma-separated entity ids"),
+    department: Optional[str] = None,
+    semester: Optional[int] = None,
+    response_format: str = Query('full', alias='format', description="'full' or 'compact' (sections only)")
+):
+    """Timetables of many sections, faculty or rooms in one response.
+    
+    Entities come from ids, or else from every known section/faculty/room;
+    department and semester narrow them (faculty and rooms match a semester
+    when they have a slot in one of its sections). Each timetable has the
+    same shape as the single-entity endpoint.
+    """
+    snap = require_snapshot()
+    if kind not in BATCH_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {BATCH_KINDS}")
+    if response_format not in ['full', 'compact'] or (response_format == 'compact' and kind != 'section'):
+        raise HTTPException(status_code=400, detail="format must be 'full', or 'compact' for sections")
+    id_list = [i.strip() for i in ids.split(',') if i.strip()] if ids else None
+    if id_list is not None and len(id_list) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per batch")
+    
+    # One payload, encoded once per timetable version (services/response_cache.py)
+    async def build():
+        model = snap.read_model
         
-        day_index = DAYS.index(day_name) + 1 if day_name in DAYS else 0
+        if kind == 'section':
+            candidates = [section_registry.get(i) or {'id': i} for i in id_list] if id_list else snap.sections
+            sections = [
+                sec for sec in candidates
+                if (department is None or sec.get('department') == department)
+                and (semester is None or sec.get('semester') == semester)
+            ]
+            if response_format == 'compact':
+                payload = model.compact([sec['id'] for sec in sections], section_registry.get)
+                payload['kind'] = kind
+                return payload
+            timetables = {}
+            for sec in sections:
+                section_info = section_registry.get(sec['id'])
+                timetables[str(sec['id'])] = {
+                    "slots": [model.slot_view(s, section_info) for s in model.section_slots(sec['id'])],
+                    "section": section_info
+                }
+            return {"kind": kind, "timetables": timetables, "count": len(timetables)}
         
-        if section_id in sections_data:
-            sections_data[section_id]['slots'].append({
-                'day': day_index,
-                'day_name': day_name,
-                'slot': slot_num,
-                'time': TIME_SLOTS.get(slot_num, ''),
-                'subject': val.get('subject', {}),
-                'room': {'name': val.get('room', '')},
-                'is_lab': val.get('is_lab', False),
-                'faculty': val.get('faculty', {})
-            })
-    
-    # Sort slots
-    for sec_id in sections_data:
-        sections_data[sec_id]['slots'].sort(key=lambda x: (x['day'], x['slot']))
+        if kind == 'faculty':
+            try:
+                faculty_list = await load_faculty_from_supabase()
+            except Exception:
+                faculty_list = load_faculty_from_csv()
+            faculty_by_id = {f['id']: f for f in faculty_list}
+            if id_list:
+                entities = [faculty_by_id.get(i) or {"id": i, "name": i} for i in id_list]
+            else:
+                entities = faculty_list
+            slots_of = lambda f: model.faculty_slots(f['id'], match_name=True)
+        else:
+            rooms_by_id = {r['id']: r for r in snap.rooms}
+            entities = [rooms_by_id.get(i) or {"id": i} for i in id_list] if id_list else snap.rooms
+            slots_of = lambda r: model.room_slots(r['id'])
+        
+        timetables = {}
+        for entity in entities:
+            if department is not None and entity.get('department') != department:
+                continue
+            slot_refs = slots_of(entity)
+            if semester is not None and not any(
+                (section_registry.get(s['section_id']) or {}).get('semester') == semester for s in slot_refs
+            ):
+                continue
+            slots = [model.slot_view(s, section_registry.get(s['section_id'])) for s in slot_refs]
+            if kind == 'faculty':
+                timetables[entity['id']] = {"slots": slots, "faculty": entity}
+            else:
+                timetables[entity['id']] = {"slots": slots, "room": entity['id']}
+        return {"kind": kind, "timetables": timetables, "count": len(timetables)}
     
-    return {
-        "sections": sections_data,
-        "semester_type": timetable_result.get('semester_type'),
-        "total_sections": len(solver.sections)
-    }
+    return await response_cache.respond(request, snap, build)
+
+
+@app.get("/api/timetable/export")
+async def export_timetable(
+    export_format: str = Query('ndjson', alias='format', description="'ndjson', 'csv' or 'parquet'"),
+    department: Optional[str] = None,
+    semester: Optional[int] = None,
+    faculty_id: Optional[str] = None,
+    room: Optional[str] = None
+):
+    """Stream every slot as flat rows, optionally filtered"""
+    snap = require_snapshot()
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {EXPORT_FORMATS}")
+    if export_format == 'parquet' and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export needs pyarrow installed")
+    
+    # Rows are generated lazily from this snapshot while the response streams
+    rows = iter_export_rows(
+        snap.read_model, [sec['id'] for sec in snap.sections], section_registry.get,
+        department=department, semester=semester, faculty_id=faculty_id, room=room
+    )
+    filename = f"timetable_{snap.semester_type or 'all'}.{export_format}"
+    return StreamingResponse(
+        export_chunks(export_format, rows),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 
 # ==================== SUBJECTS ENDPOINT ====================
@@ -878,106 +979,85 @@ class ManualEditRequest(BaseModel):
 @app.post("/api/timetable/manual-edit")
 async def manual_edit_timetable(request: ManualEditRequest):
     """Apply manual edits to a section's timetable and save to Supabase"""
-    global timetable_result, solver
-    
     section_id = request.section_id
     
     # Get section info to determine semester_type
     try:
-        sections_data = await fetch_sections('all')
-        section_info = next((s for s in sections_data if s['id'] == section_id), None)
+        section_info = await section_registry.lookup(section_id)
+    except Exception as e:
+        print(f"⚠️ Could not look up section {section_id}: {e}")
+        section_info = {}
+        semester_type = 'odd'  # fallback
+    else:
         if not section_info:
+            # Unknown section: nothing is published or queued
             raise HTTPException(status_code=404, detail=f"Section {section_id} not found")
         
         # Determine semester_type from section's semester
         semester = section_info.get('semester', 1)
         semester_type = 'odd' if semester % 2 == 1 else 'even'
-    except Exception as e:
-        print(f"⚠️ Could not determine semester_type: {e}")
-        semester_type = 'odd'  # fallback
     
-    # If we have a solver, update in-memory state
-    if solver and timetable_result and hasattr(solver, 'schedule'):
-        # Remove existing slots for this section
-        keys_to_remove = [k for k in solver.schedule.keys() if k[0] == section_id]
-        for key in keys_to_remove:
-            del solver.schedule[key]
+    # New slots of this section, keyed like the schedule
+    entries = {}
+    for slot in request.timetable:
+        day_name = slot.get('day_name', '')
+        slot_num = slot.get('slot', 0)
         
-        # Add new slots from manual edit
+        # Normalize day name
+        day_upper = day_name.upper() if day_name else ''
+        day_map = {
+            'MONDAY': 'Monday', 'TUESDAY': 'Tuesday', 'WEDNESDAY': 'Wednesday',
+            'THURSDAY': 'Thursday', 'FRIDAY': 'Friday', 'SATURDAY': 'Saturday'
+        }
+        normalized_day = day_map.get(day_upper, day_name)
+        
+        entries[f"{section_id}_{normalized_day}_{slot_num}"] = {
+            'subject': slot.get('subject', {}),
+            'room': slot.get('room', {}).get('name', 'TBD') if isinstance(slot.get('room'), dict) else slot.get('room', 'TBD'),
+            'faculty': slot.get('faculty', {}),
+            'is_lab': slot.get('is_lab', False)
+        }
+    
+    # Publish a new version; readers keep the one they already hold
+    async with snapshots.write_lock:
+        await snapshots.publish_section(section_id, entries)
+    # Cached GET responses are stale after an edit
+    response_cache.invalidate(snapshots.current)
+    
+    # Queue the save - the background worker writes only the slots of this section that changed
+    try:
+        # Prepare slots for saving
+        slots_to_save = []
         for slot in request.timetable:
             day_name = slot.get('day_name', '')
             slot_num = slot.get('slot', 0)
+            subject = slot.get('subject') or {}
+            faculty = slot.get('faculty') or {}
+            room = slot.get('room', {})
+            room_name = room.get('name', 'TBD') if isinstance(room, dict) else (room or 'TBD')
             
-            # Normalize day name
-            day_upper = day_name.upper() if day_name else ''
-            day_map = {
-                'MONDAY': 'Monday', 'TUESDAY': 'Tuesday', 'WEDNESDAY': 'Wednesday',
-                'THURSDAY': 'Thursday', 'FRIDAY': 'Friday', 'SATURDAY': 'Saturday'
-            }
-            normalized_day = day_map.get(day_upper, day_name)
-            
-            key = (section_id, normalized_day, slot_num)
-            
-            solver.schedule[key] = {
-                'subject': slot.get('subject', {}),
-                'room': slot.get('room', {}).get('name', 'TBD') if isinstance(slot.get('room'), dict) else slot.get('room', 'TBD'),
-                'faculty': slot.get('faculty', {}),
-                'is_lab': slot.get('is_lab', False)
-            }
-        
-        # Regenerate result
-        timetable_result = solver.get_result()
-    
-    # Save to Supabase - delete existing slots for this section and insert new ones
-    try:
-        from services.supabase_service import SUPABASE_URL, get_headers
-        import httpx
+            slots_to_save.append({
+                'section_id': section_id,
+                'day': day_name.capitalize() if day_name else 'Monday',
+                'slot': slot_num,
+                'subject_name': subject.get('name', ''),
+                'subject_code': subject.get('course_code') or subject.get('code', ''),
+                'subject_type': subject.get('subject_type') or subject.get('type', 'Theory'),
+                'room_id': room_name,
+                'faculty_id': faculty.get('id', ''),
+                'faculty_name': faculty.get('name', ''),
+                'is_lab': slot.get('is_lab', False),
+                'department': subject.get('department', section_info.get('department', '')),
+                'semester': subject.get('semester', section_info.get('semester', 1)),
+                'semester_type': semester_type
+            })
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Delete existing slots for this section
-            delete_resp = await client.delete(
-                f"{SUPABASE_URL}/rest/v1/timetable_slots?section_id=eq.{section_id}",
-                headers=get_headers()
-            )
-            print(f"🗑️ Deleted existing slots for section {section_id}: {delete_resp.status_code}")
-            
-            # Prepare slots for insertion
-            slots_to_save = []
-            for slot in request.timetable:
-                day_name = slot.get('day_name', '')
-                slot_num = slot.get('slot', 0)
-                subject = slot.get('subject') or {}
-                faculty = slot.get('faculty') or {}
-                room = slot.get('room', {})
-                room_name = room.get('name', 'TBD') if isinstance(room, dict) else (room or 'TBD')
-                
-                slots_to_save.append({
-                    'section_id': section_id,
-                    'day': day_name.capitalize() if day_name else 'Monday',
-                    'slot': slot_num,
-                    'subject_name': subject.get('name', ''),
-                    'subject_code': subject.get('course_code') or subject.get('code', ''),
-                    'subject_type': subject.get('subject_type') or subject.get('type', 'Theory'),
-                    'room_id': room_name,
-                    'faculty_id': faculty.get('id', ''),
-                    'faculty_name': faculty.get('name', ''),
-                    'is_lab': slot.get('is_lab', False),
-                    'department': subject.get('department', section_info.get('department', '')),
-                    'semester': subject.get('semester', section_info.get('semester', 1)),
-                    'semester_type': semester_type
-                })
-            
-            # Insert new slots
-            if slots_to_save:
-                insert_resp = await client.post(
-                    f"{SUPABASE_URL}/rest/v1/timetable_slots",
-                    headers=get_headers(),
-                    json=slots_to_save
-                )
-                print(f"✅ Saved {len(slots_to_save)} slots to Supabase: {insert_resp.status_code}")
-                
-                if insert_resp.status_code not in [200, 201]:
-                    print(f"⚠️ Insert response: {insert_resp.text}")
+        job_id = get_persistence().enqueue(
+            'section', str(section_id),
+            {'slots': slots_to_save, 'section_id': section_id},
+            rows=len(slots_to_save)
+        )
+        print(f"📒 Queued section {section_id} for Supabase (job {job_id})")
     
     except Exception as save_error:
         print(f"⚠️ Warning: Could not save to Supabase: {save_error}")
@@ -1004,12 +1084,12 @@ class ValidateSlotRequest(BaseModel):
 @app.post("/api/timetable/validate-slot")
 async def validate_slot_assignment(request: ValidateSlotRequest):
     """Validate if a slot assignment is valid according to constraints"""
-    global timetable_result, solver
+    snap = snapshots.current
     
     conflicts = []
     warnings = []
     
-    if not solver or not timetable_result:
+    if snap is None:
         return {"valid": True, "conflicts": [], "warnings": [{"message": "No timetable generated - validation skipped"}]}
     
     section_id = request.section_id
@@ -1020,24 +1100,16 @@ async def validate_slot_assignment(request: ValidateSlotRequest):
     
     # 1. Check if slot is already occupied
     slot_key = f"{section_id}_{day}_{slot}"
-    if slot_key in timetable_result.get('schedule', {}):
+    if slot_key in snap.schedule:
         warnings.append({"message": f"Slot {day} {TIME_SLOTS.get(slot, '')} is already occupied and will be replaced"})
     
     # 2. Check faculty availability and hours
     if faculty_id:
-        faculty_slots = []
-        for key, val in timetable_result.get('schedule', {}).items():
-            fac = val.get('faculty', {})
-            if fac.get('id') == faculty_id:
-                parts = key.split('_')
-                if len(parts) >= 3:
-                    faculty_slots.append({'day': parts[1], 'slot': int(parts[2])})
+        model = snap.read_model
         
         # Check if faculty is busy at this time
-        for fs in faculty_slots:
-            if fs['day'] == day and fs['slot'] == slot:
-                conflicts.append({"message": f"Faculty is already teaching at {day} slot {slot}"})
-                break
+        if model.faculty_is_busy(faculty_id, day, slot):
+            conflicts.append({"message": f"Faculty is already teaching at {day} slot {slot}"})
         
         # Check faculty max hours
         try:
@@ -1048,15 +1120,15 @@ async def validate_slot_assignment(request: ValidateSlotRequest):
         faculty_info = next((f for f in faculty_list if f['id'] == faculty_id), None)
         if faculty_info:
             max_hours = faculty_info.get('max_hours', 40)
-            current_hours = len(faculty_slots)
+            current_hours = model.faculty_hours(faculty_id)
             if current_hours >= max_hours:
                 conflicts.append({"message": f"Faculty has reached maximum hours ({max_hours})"})
     
     # 3. Check consecutive same subject
     for check_slot in [slot - 1, slot + 1]:
         check_key = f"{section_id}_{day}_{check_slot}"
-        if check_key in timetable_result.get('schedule', {}):
-            existing = timetable_result['schedule'][check_key]
+        if check_key in snap.schedule:
+            existing = snap.schedule[check_key]
             existing_code = existing.get('subject', {}).get('course_code', '')
             if existing_code == subject_code:
                 warnings.append({"message": f"Same subject in consecutive slots (slot {check_slot})"})
@@ -1065,8 +1137,8 @@ async def validate_slot_assignment(request: ValidateSlotRequest):
     same_subject_count = 0
     for s in range(1, 7):
         check_key = f"{section_id}_{day}_{s}"
-        if check_key in timetable_result.get('schedule', {}):
-            existing = timetable_result['schedule'][check_key]
+        if check_key in snap.schedule:
+            existing = snap.schedule[check_key]
             existing_code = existing.get('subject', {}).get('course_code', '')
             if existing_code == subject_code and s != slot:
                 same_subject_count += 1
@@ -1089,15 +1161,10 @@ async def get_faculty_for_subject(subject_code: str):
     except:
         faculty_list = load_faculty_from_csv()
     
-    matching_faculty = []
-    for f in faculty_list:
-        subject_codes = f.get('subject_codes', [])
-        if isinstance(subject_codes, str):
-            subject_codes = [s.strip() for s in subject_codes.split(',')]
-        
-        # Check if this faculty can teach the subject
-        if subject_code in subject_codes or any(subject_code.startswith(sc.strip()) for sc in subject_codes if sc):
-            matching_faculty.append(f)
+    # Faculty listing the code or a code family it belongs to (services/faculty_index.py)
+    faculty_by_id = {f['id']: f for f in faculty_list}
+    matching_faculty = [faculty_by_id[fid] for fid in get_faculty_subject_index(faculty_list).match_ids(subject_code)
+                        if fid in faculty_by_id]
     
     # If no specific matches, return faculty from same department (first 3 chars of code usually indicate dept)
     if not matching_faculty:
@@ -1105,35 +1172,70 @@ async def get_faculty_for_subject(subject_code: str):
         matching_faculty = faculty_list
     
     # Add current assigned hours
-    if timetable_result:
+    snap = snapshots.current
+    if snap:
+        model = snap.read_model
         for f in matching_faculty:
-            hours = sum(1 for val in timetable_result.get('schedule', {}).values() 
-                       if val.get('faculty', {}).get('id') == f['id'])
-            f['assigned_hours'] = hours
+            f['assigned_hours'] = model.faculty_hours(f['id'])
     
     return {"faculty": matching_faculty[:50]}  # Limit to 50
 
 
+@app.get("/api/timetable/substitutes/{faculty_id}")
+async def find_substitutes(faculty_id: str, day: str, slot: Optional[int] = None, limit: int = 10):
+    """Faculty who could cover an absent teacher's slots on a day.
+    
+    Candidates can teach the slot's subject, are free at that time and are
+    below their max hours; the least loaded come first.
+    """
+    snap = require_snapshot()
+    try:
+        faculty_list = await load_faculty_from_supabase()
+    except:
+        faculty_list = load_faculty_from_csv()
+    faculty_by_id = {f['id']: f for f in faculty_list}
+    index = get_faculty_subject_index(faculty_list)
+    model = snap.read_model
+    
+    covers = []
+    for slot_ref in model.faculty_slots(faculty_id):
+        if slot_ref['day_name'] != day or (slot is not None and slot_ref['slot'] != slot):
+            continue
+        subject = slot_ref['entry'].get('subject') or {}
+        candidates = []
+        for fid in index.match_ids(subject.get('course_code', '')):
+            f = faculty_by_id.get(fid)
+            if fid == faculty_id or f is None or model.faculty_is_busy(fid, day, slot_ref['slot']):
+                continue
+            hours = model.faculty_hours(fid)
+            if hours < f.get('max_hours', 40):
+                candidates.append({**f, 'assigned_hours': hours})
+        candidates.sort(key=lambda c: c['assigned_hours'])
+        covers.append({
+            **model.slot_view(slot_ref, section_registry.get(slot_ref['section_id'])),
+            'substitutes': candidates[:limit]
+        })
+    
+    return {"faculty_id": faculty_id, "day": day, "slots": covers}
+
+
 @app.get("/api/timetable/section-summary/{section_id}")
 async def get_section_summary(section_id: int):
     """Get summary of a section's scheduled hours per subject"""
-    global timetable_result, solver
-    
-    if not timetable_result or not solver:
+    snap = snapshots.current
+    if snap is None:
         return {"scheduled_hours": {}, "total_hours": 0}
     
     # Count hours per subject for this section
     subject_hours = {}
     total_hours = 0
     
-    prefix = f"{section_id}_"
-    for key, val in timetable_result.get('schedule', {}).items():
-        if key.startswith(prefix):
-            subject = val.get('subject', {})
-            code = subject.get('course_code', subject.get('id', 'Unknown'))
-            if code:
-                subject_hours[code] = subject_hours.get(code, 0) + 1
-                total_hours += 1
+    for slot_ref in snap.read_model.section_slots(section_id):
+        subject = slot_ref['entry'].get('subject', {})
+        code = subject.get('course_code', subject.get('id', 'Unknown'))
+        if code:
+            subject_hours[code] = subject_hours.get(code, 0) + 1
+            total_hours += 1
     
     return {
         "section_id": section_id,
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Solver scaling benchmarks - fully offline.
+
+Runs TimetableSolverV7 on synthetic institutions (benchmarks/synthetic.py) at
+several sizes and records per-phase time, peak RSS and schedule quality.
+Each size runs in a fresh process so peak RSS is per size.
+
+Usage (from backend/):
+    python -m benchmarks.run_benchmarks                       # sizes 1,2,5,10
+    python -m benchmarks.run_benchmarks --sizes 1,2 --output results.json
+    python -m benchmarks.run_benchmarks --check               # compare with baselines.json
+    python -m benchmarks.run_benchmarks --update-baseline     # rewrite baselines.json
+
+--check exits with status 1 if any size regresses beyond the tolerances.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+DEFAULT_SIZES = [1, 2, 5, 10]
+
+# Regression tolerances
+TIME_TOLERANCE = 2.0        # total wall time may grow up to 2x (machines differ)
+MEMORY_TOLERANCE = 1.5      # peak RSS may grow up to 1.5x
+QUALITY_TOLERANCE = 0.10    # TBA/virtual/unscheduled may grow 10% ...
+QUALITY_SLACK = 2           # ... plus 2 in absolute terms
+ZERO_TOLERANCE_METRICS = ['room_clashes', 'faculty_clashes']
+QUALITY_METRICS = ['unscheduled_subjects', 'virtual_room_slots', 'tba_slots']
+SHARED_GROUP_TYPES = ('IE_Block', 'PCE_Block')
+
+
+def room_occupant(section_id: str, entry: Dict):
+    """Who holds a room at a slot: the section, or a basket/elective group sections share"""
+    subject = entry['subject']
+    if (subject.get('is_basket') or subject.get('is_pec') or subject.get('is_iec')
+            or subject.get('subject_type') in SHARED_GROUP_TYPES):
+        return ('group', subject.get('course_code'), bool(entry.get('is_lab')))
+    return ('section', section_id)
+
+
+def quality_metrics(result: Dict) -> Dict:
+    """Schedule quality of a get_result() dict"""
+    schedule = result['schedule']
+    room_occupants = defaultdict(set)
+    faculty_slots = defaultdict(int)
+    virtual = tba = 0
+    for key, entry in schedule.items():
+        section_id, day, slot = key.split('_')
+        room = entry['room']
+        faculty_id = (entry.get('faculty') or {}).get('id', 'TBA')
+        if room.startswith('Virtual_'):
+            virtual += 1
+        else:
+            room_occupants[(room, day, slot)].add(room_occupant(section_id, entry))
+        if faculty_id.startswith('TBA'):
+            tba += 1
+        else:
+            faculty_slots[(faculty_id, day, slot)] += 1
+
+    report = result.get('run_report', {})
+    return {
+        'scheduled_slots': len(schedule),
+        'unscheduled_subjects': report.get('unscheduled_subjects', 0),
+        'pending_faculty_hours': report.get('pending_faculty_hours', 0),
+        'virtual_room_slots': virtual,
+        'tba_slots': tba,
+        'room_clashes': sum(len(s) - 1 for s in room_occupants.values() if len(s) > 1),
+        'faculty_clashes': sum(n - 1 for n in faculty_slots.values() if n > 1)
+    }
+
+
+def run_size(scale: int, semester_type: str, seed: int) -> Dict:
+    """Generate and solve one synthetic institution (runs in a worker process)"""
+    from benchmarks.synthetic import make_institution
+    from services.data_sources import InMemoryDataSource
+    from timetable_solver_v7 import TimetableSolverV7
+
+    data = make_institution(scale, seed)
+    random.seed(seed)  # solver uses random subject ids and lab rotations
+    solver = TimetableSolverV7(semester_type, data_source=InMemoryDataSource(data))
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(solver.generate())
+
+    report = result['run_report']
+    return {
+        'scale': scale,
+        'semester_type': semester_type,
+        'seed': seed,
+        'sections': report['sections'],
+        'faculty': len(solver.faculty),
+        'rooms': len(solver.rooms),
+        'total_wall_s': report['total_wall_s'],
+        'total_cpu_s': report['total_cpu_s'],
+        'peak_rss_mb': report['peak_rss_mb'],
+        'phases': {p['name']: p['wall_s'] for p in report['phases']},
+        'quality': quality_metrics(result)
+    }
+
+
+def run_benchmarks(sizes: List[int], semester_type: str, seed: int) -> List[Dict]:
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    for scale in sizes:
+        with ctx.Pool(1) as pool:
+            entry = pool.apply(run_size, (scale, semester_type, seed))
+        q = entry['quality']
+        print(f"  scale {scale:>2}: {entry['sections']:>4} sections, {entry['faculty']:>4} faculty | "
+              f"{entry['total_wall_s']:>7.2f}s | {entry['peak_rss_mb']} MB | "
+              f"slots {q['scheduled_slots']}, TBA {q['tba_slots']}, virtual {q['virtual_room_slots']}, "
+              f"unscheduled {q['unscheduled_subjects']}, clashes {q['room_clashes']}/{q['faculty_clashes']}")
+        results.append(entry)
+    return results
+
+
+def check_regressions(results: List[Dict], baselines: List[Dict]) -> List[str]:
+    """Compare results with baselines of the same (scale, semester_type, seed)"""
+    by_key = {(b['scale'], b['semester_type'], b['seed']): b for b in baselines}
+    problems = []
+    for entry in results:
+        label = f"scale {entry['scale']}"
+        if entry['quality'].get('pending_faculty_hours'):
+            # Every pre-assigned hour is placed or released by the end of the solve
+            problems.append(f"{label}: {entry['quality']['pending_faculty_hours']} pre-assigned hours still pending")
+        base = by_key.get((entry['scale'], entry['semester_type'], entry['seed']))
+        if base is None:
+            print(f"  {label}: no baseline, skipped")
+            continue
+        if entry['total_wall_s'] > base['total_wall_s'] * TIME_TOLERANCE:
+            problems.append(f"{label}: wall time {entry['total_wall_s']}s vs baseline {base['total_wall_s']}s")
+        if entry['peak_rss_mb'] and base.get('peak_rss_mb') and \
+                entry['peak_rss_mb'] > base['peak_rss_mb'] * MEMORY_TOLERANCE:
+            problems.append(f"{label}: peak RSS {entry['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']} MB")
+        for metric in ZERO_TOLERANCE_METRICS:
+            if entry['quality'][metric] > base['quality'][metric]:
+                problems.append(f"{label}: {metric} {entry['quality'][metric]} vs baseline {base['quality'][metric]}")
+        for metric in QUALITY_METRICS:
+            limit = base['quality'][metric] * (1 + QUALITY_TOLERANCE) + QUALITY_SLACK
+            if entry['quality'][metric] > limit:
+                problems.append(f"{label}: {metric} {entry['quality'][metric]} vs baseline {base['quality'][metric]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline solver scaling benchmarks")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated scale factors (1 = current institution)")
+    parser.add_argument('--semester-type', default='odd', choices=['odd', 'even', 'all'])
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help="write results JSON to this path")
+    parser.add_argument('--check', action='store_true', help="fail on regressions against baselines.json")
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as baselines.json")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    print(f"📊 Benchmarking TimetableSolverV7 ({args.semester_type}, seed {args.seed}) at scales {sizes}")
+    results = run_benchmarks(sizes, args.semester_type, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"✅ Baselines updated: {BASELINES_PATH}")
+
+    if args.check:
+        with open(BASELINES_PATH) as f:
+            baselines = json.load(f)
+        problems = check_regressions(results, baselines)
+        if problems:
+            print("❌ Regressions:")
+            for p in problems:
+                print(f"  - {p}")
+            sys.exit(1)
+        print("✅ No regressions against baselines")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Seeded synthetic institution generator.
+
+Produces the exact dict shape of services.supabase_service.fetch_all_data
+(rows as Supabase returns them), so the solver runs offline through
+services.data_sources.InMemoryDataSource.
+
+scale=1 approximates the current institution: 8 core departments with 2
+sections per semester (64 sections per odd/even run), plus Physics,
+Chemistry, Mathematics and Humanities as teaching departments. Sections,
+classrooms, labs and faculty all grow linearly with scale.
+"""
+
+import random
+from typing import Dict, List
+
+CORE_DEPARTMENTS = ['CSE', 'ECE', 'ME', 'EEE', 'ISE', 'AIML', 'CYS', 'CDS']
+SUPPORT_DEPARTMENTS = {'PY': 'Physics', 'CH': 'Chemistry', 'MA': 'Mathematics', 'HS': 'Humanities'}
+CODE_PREFIX = {'CSE': 'CS', 'ECE': 'EC', 'ME': 'ME', 'EEE': 'EE', 'ISE': 'IS', 'AIML': 'AI', 'CYS': 'CY', 'CDS': 'CD'}
+
+SECTIONS_PER_SEMESTER = 2   # per core department at scale 1
+CORE_SUBJECTS_PER_SEMESTER = 4
+
+
+def make_institution(scale: int = 1, seed: int = 7) -> Dict[str, List[Dict]]:
+    """Build departments, faculty, rooms, sections and subjects for all 8 semesters"""
+    rng = random.Random(seed)
+    sections_per_semester = max(1, SECTIONS_PER_SEMESTER * scale)
+
+    departments = []
+    dept_ids = {}
+    for i, code in enumerate(CORE_DEPARTMENTS + list(SUPPORT_DEPARTMENTS) + ['Common']):
+        legacy_id = 5 + i
+        dept_ids[code] = legacy_id
+        departments.append({
+            'id': i + 1,
+            'department_id': legacy_id,
+            'department_code': code,
+            'department_name': SUPPORT_DEPARTMENTS.get(code, code)
+        })
+
+    rooms, sections, subjects, faculty = [], [], [], []
+
+    # Sections, each with a dedicated classroom; spare classrooms and labs per department
+    section_id = 1
+    for dept in CORE_DEPARTMENTS:
+        letters = [chr(ord('A') + k) for k in range(sections_per_semester)]
+        for sem in range(1, 9):
+            for letter in letters:
+                room_id = f"{dept}-CR-{sem}{letter}"
+                rooms.append({'room_id': room_id, 'department': dept, 'room_type': 'Classroom', 'capacity': 70})
+                sections.append({
+                    'id': section_id,
+                    'department': dept,
+                    'semester': sem,
+                    'section': letter,
+                    'dedicated_room': room_id,
+                    'student_count': rng.choice([55, 60, 65])
+                })
+                section_id += 1
+        for k in range(2):
+            rooms.append({'room_id': f"{dept}-SPARE-{k}", 'department': dept, 'room_type': 'Classroom', 'capacity': 80})
+        for k in range(2 + scale):
+            rooms.append({'room_id': f"{dept}-LAB-{k}", 'department': dept, 'room_type': 'Lab', 'capacity': 40})
+    for k in range(2 * scale):
+        rooms.append({'room_id': f"Physics-Lab-{k + 1}", 'department': 'PY', 'room_type': 'Lab', 'capacity': 60})
+        rooms.append({'room_id': f"Chemistry-Lab-{k + 1}", 'department': 'CH', 'room_type': 'Lab', 'capacity': 60})
+        rooms.append({'room_id': f"PL-{k + 1}", 'department': 'Common', 'room_type': 'Placement', 'capacity': 120})
+    rooms.append({'room_id': 'YOGA-Terrace', 'department': 'Common', 'room_type': 'Lab', 'capacity': 200})
+
+    codes_by_dept = {dept: [] for dept in CORE_DEPARTMENTS + list(SUPPORT_DEPARTMENTS)}
+
+    def add_subject(code, name, dept, sem, theory_hours, lab_hours, teaching_dept=None, **flags):
+        row = {
+            'subject_code': code,
+            'subject_name': name,
+            'department_id': dept_ids[dept],
+            'semester': sem,
+            'theory_hours': theory_hours,
+            'lab_hours': lab_hours,
+            'credits': 3,
+            'is_basket': False,
+            'is_pec': False,
+            'is_iec': False,
+            'is_nptel': False
+        }
+        row.update(flags)
+        subjects.append(row)
+        codes_by_dept[teaching_dept or dept].append(code)
+
+    for dept in CORE_DEPARTMENTS:
+        px = CODE_PREFIX[dept]
+        for sem in range(1, 9):
+            if sem in (1, 2):
+                add_subject(f"MA{sem}1{px}", 'Calculus and Linear Algebra', dept, sem, 4, 0, 'MA')
+                add_subject(f"PY{sem}1{px}", 'Engineering Physics', dept, sem, 3, 2, 'PY')
+                add_subject(f"HS{sem}1{px}", 'Professional English', dept, sem, 2, 2, 'HS')
+                add_subject(f"HS{sem}2{px}", 'Yoga for Health', dept, sem, 1, 0, 'HS')
+                add_subject(f"ME{sem}1{px}", 'Computer Aided Engineering Graphics', dept, sem, 2, 2)
+                add_subject(f"ES{sem}1{px}", 'Engineering Science Course - I', dept, sem, 3, 0, is_basket=True)
+                add_subject(f"PL{sem}1{px}", 'Programming Languages Course', dept, sem, 3, 2, is_basket=True)
+                add_subject(f"BR{sem}1{px}", 'Bridge Course Mathematics', dept, sem, 2, 0)
+                continue
+
+            for k in range(CORE_SUBJECTS_PER_SEMESTER):
+                add_subject(f"{px}{sem}{k}", f"{dept} Core {sem}.{k}", dept, sem,
+                            rng.choice([3, 4]), rng.choice([0, 2]))
+            add_subject(f"MA{sem}1{px}", 'Statistics and Probability', dept, sem, 3, 0, 'MA')
+            if sem in (3, 4):
+                add_subject(f"BA{sem}{px}", 'Basket Courses Group A', dept, sem, 3, 0, is_basket=True)
+                add_subject(f"BB{sem}{px}", 'Basket Courses Group B', dept, sem, 2, 0, is_basket=True)
+            else:
+                add_subject(f"{px}{sem}P", 'Professional Core Elective', dept, sem, 3, 0, is_pec=True)
+                add_subject(f"{px}{sem}I", 'Institutional Elective', dept, sem, 3, 0, is_iec=True)
+
+    # Faculty: each lists up to 4 of their department's course codes
+    faculty_id = 1
+    for dept, codes in codes_by_dept.items():
+        count = max(4, len(codes) * sections_per_semester // 6)
+        for k in range(count):
+            picks = rng.sample(codes, min(len(codes), 4)) if codes else []
+            faculty.append({
+                'faculty_id': f"F{faculty_id:05d}",
+                'faculty_name': f"Prof {dept} {k + 1}",
+                'department': dept,
+                'max_hours_per_week': rng.choice([14, 16, 18]),
+                'subject_codes': ','.join(picks)
+            })
+            faculty_id += 1
+
+    return {
+        'departments': departments,
+        'faculty': faculty,
+        'rooms': rooms,
+        'sections': sections,
+        'subjects': subjects
+    }
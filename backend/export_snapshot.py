@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Export Supabase data to a local snapshot for offline solving.
+
+Usage:
+    python export_snapshot.py snapshots/current              # Parquet (needs pyarrow)
+    python export_snapshot.py snapshots/current --format csv
+
+Then run the API or solver with TIMETABLE_SNAPSHOT_DIR=snapshots/current,
+or pass SnapshotDataSource('snapshots/current') to TimetableSolverV7.
+"""
+
+import argparse
+import asyncio
+
+from services.data_sources import SupabaseDataSource, save_snapshot, SNAPSHOT_FORMATS, TABLES
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Export Supabase tables to a local snapshot")
+    parser.add_argument('directory')
+    parser.add_argument('--format', default='parquet', choices=SNAPSHOT_FORMATS)
+    args = parser.parse_args()
+
+    print("📥 Fetching all data from Supabase...")
+    data = await SupabaseDataSource().fetch_all_data('all')
+    save_snapshot(data, args.directory, args.format)
+    for table in TABLES:
+        print(f"  {table}: {len(data.get(table, []))} rows")
+    print(f"✅ Snapshot written to {args.directory} ({args.format})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
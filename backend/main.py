@@ -6,8 +6,6 @@ from pydantic import BaseModel
 from typing import Optional, List
 import json
 import os
-import io
-import csv
 from pathlib import Path
 from datetime import datetime
 
@@ -19,6 +17,7 @@ if str(backend_dir) not in sys.path:
 from database import Base, engine
 from auth import router as auth_router
 from services.engine import TimetableEngine
+from services.timetable_export import csv_chunks
 from config import CORS_ORIGINS
 
 app = FastAPI(title="RVCE ERP API")
@@ -292,20 +291,15 @@ def download_timetable(section: str):
         
         section_data = data.get("section_timetable", {}).get(section, {})
         
-        # Convert to CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["Day", "Time Slot", "Course", "Room", "Faculty"])
+        # Rows are written to the response as they are produced
+        def rows():
+            for day in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]:
+                for slot in ["09:00-10:00", "10:00-11:00", "11:30-12:30", "12:30-01:30", "02:30-03:30", "03:30-04:30"]:
+                    for entry in section_data.get(day, {}).get(slot, []):
+                        yield [day, slot, entry[0], entry[1], entry[2]]
         
-        for day in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]:
-            for slot in ["09:00-10:00", "10:00-11:00", "11:30-12:30", "12:30-01:30", "02:30-03:30", "03:30-04:30"]:
-                entries = section_data.get(day, {}).get(slot, [])
-                for entry in entries:
-                    writer.writerow([day, slot, entry[0], entry[1], entry[2]])
-        
-        output.seek(0)
         return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
+            csv_chunks(rows(), ["Day", "Time Slot", "Course", "Room", "Faculty"]),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename={section}_timetable.csv"}
         )
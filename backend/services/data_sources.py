@@ -0,0 +1,163 @@
+"""
+Data sources for TimetableSolverV7.load_data.
+
+A data source is any object with an async fetch_all_data(semester_type)
+returning the dict shape of services.supabase_service.fetch_all_data:
+{'departments', 'faculty', 'rooms', 'sections', 'subjects'} as lists of rows.
+
+- SupabaseDataSource: live database (default)
+- SnapshotDataSource: local CSV or Parquet files, one per table
+- InMemoryDataSource: a prebuilt dict (fixtures, benchmarks)
+
+Set TIMETABLE_SNAPSHOT_DIR to make the default source a local snapshot.
+Snapshots are written with save_snapshot() (see export_snapshot.py).
+"""
+
+import copy
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+TABLES = ['departments', 'faculty', 'rooms', 'sections', 'subjects']
+SNAPSHOT_FORMATS = ['parquet', 'csv']
+CSV_TEXT_COLUMNS = ['subject_codes', 'subject_code', 'section']
+
+ODD_SEMESTERS = [1, 3, 5, 7]
+EVEN_SEMESTERS = [2, 4, 6, 8]
+
+
+def filter_by_semester_type(rows: List[Dict], semester_type: str) -> List[Dict]:
+    """Same semester filter fetch_sections/fetch_subjects apply server-side"""
+    if semester_type == 'odd':
+        return [r for r in rows if r.get('semester') in ODD_SEMESTERS]
+    if semester_type == 'even':
+        return [r for r in rows if r.get('semester') in EVEN_SEMESTERS]
+    return list(rows)
+
+
+class DataSource(ABC):
+    """Base class: subclasses implement fetch_all_data.
+
+    Sources that can time their reads set `timings` to
+    {table: {'wall_s', 'rows'}} on each fetch; the solver report picks it up.
+    """
+
+    timings: Optional[Dict] = None
+
+    @abstractmethod
+    async def fetch_all_data(self, semester_type: str = 'all') -> Dict:
+        """{'departments', 'faculty', 'rooms', 'sections', 'subjects'} rows"""
+
+
+class SupabaseDataSource(DataSource):
+    """Live Supabase REST API"""
+
+    async def fetch_all_data(self, semester_type: str = 'all') -> Dict:
+        from services.supabase_service import fetch_all_data
+        self.timings = {}
+        return await fetch_all_data(semester_type, timings=self.timings)
+
+
+class InMemoryDataSource(DataSource):
+    """Serves a prebuilt fetch_all_data-shaped dict (fixtures, benchmarks)"""
+
+    def __init__(self, data: Dict):
+        self.data = data
+
+    async def fetch_all_data(self, semester_type: str = 'all') -> Dict:
+        # Copy so a solver run can never leak changes into the fixture
+        data = copy.deepcopy(self.data)
+        return {
+            'departments': data.get('departments', []),
+            'faculty': data.get('faculty', []),
+            'rooms': data.get('rooms', []),
+            'sections': filter_by_semester_type(data.get('sections', []), semester_type),
+            'subjects': filter_by_semester_type(data.get('subjects', []), semester_type)
+        }
+
+
+def _snapshot_path(directory: str, table: str, fmt: str) -> str:
+    return os.path.join(directory, f"{table}.{fmt}")
+
+
+def _detect_format(directory: str) -> str:
+    for fmt in SNAPSHOT_FORMATS:
+        if os.path.exists(_snapshot_path(directory, 'sections', fmt)):
+            return fmt
+    raise FileNotFoundError(f"No sections.parquet or sections.csv snapshot in {directory}")
+
+
+def _frame_to_rows(df: pd.DataFrame) -> List[Dict]:
+    """DataFrame -> list of plain Python rows (NaN -> None, no numpy scalars)"""
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
+
+
+class SnapshotDataSource(DataSource):
+    """Local snapshot: <directory>/<table>.parquet (or .csv), one file per table.
+
+    Tables are read once and kept in memory, so repeated solves only pay the
+    semester filter. Parquet needs pyarrow; CSV works with pandas alone.
+    """
+
+    def __init__(self, directory: str, fmt: Optional[str] = None):
+        self.directory = directory
+        self.fmt = fmt or _detect_format(directory)
+        if self.fmt not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Snapshot format must be one of {SNAPSHOT_FORMATS}, got {self.fmt}")
+        self._tables = None
+
+    def load_tables(self) -> Dict[str, List[Dict]]:
+        if self._tables is None:
+            tables = {}
+            for table in TABLES:
+                path = _snapshot_path(self.directory, table, self.fmt)
+                if not os.path.exists(path):
+                    tables[table] = []
+                    continue
+                if self.fmt == 'parquet':
+                    df = pd.read_parquet(path)
+                else:
+                    # Keep codes like '0012' and comma lists as text; CSV cannot tell
+                    # '' from missing, so text columns read back as ''
+                    df = pd.read_csv(path, dtype={c: str for c in CSV_TEXT_COLUMNS + ['dedicated_room']})
+                    for column in CSV_TEXT_COLUMNS:
+                        if column in df:
+                            df[column] = df[column].fillna('')
+                tables[table] = _frame_to_rows(df)
+            self._tables = tables
+        return self._tables
+
+    async def fetch_all_data(self, semester_type: str = 'all') -> Dict:
+        tables = self.load_tables()
+        return {
+            'departments': copy.deepcopy(tables['departments']),
+            'faculty': copy.deepcopy(tables['faculty']),
+            'rooms': copy.deepcopy(tables['rooms']),
+            'sections': copy.deepcopy(filter_by_semester_type(tables['sections'], semester_type)),
+            'subjects': copy.deepcopy(filter_by_semester_type(tables['subjects'], semester_type))
+        }
+
+
+def save_snapshot(data: Dict, directory: str, fmt: str = 'parquet'):
+    """Write a fetch_all_data dict as one file per table"""
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Snapshot format must be one of {SNAPSHOT_FORMATS}, got {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    for table in TABLES:
+        df = pd.DataFrame(data.get(table, []))
+        path = _snapshot_path(directory, table, fmt)
+        if fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+
+
+def get_default_data_source() -> DataSource:
+    """Snapshot from TIMETABLE_SNAPSHOT_DIR if set, otherwise live Supabase"""
+    snapshot_dir = os.getenv("TIMETABLE_SNAPSHOT_DIR")
+    if snapshot_dir:
+        return SnapshotDataSource(snapshot_dir)
+    return SupabaseDataSource()
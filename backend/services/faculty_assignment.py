@@ -0,0 +1,247 @@
+"""
+Faculty pre-assignment for (section, subject) pairs.
+
+Runs before slot placement and binds one teacher to every (section, course_code)
+pair by min-cost flow, so early sections cannot grab faculty that later
+sections need. Flow units are weekly hours:
+
+    source -> pair group (dept, semester, course_code)  cap = sections x hours
+    group  -> (faculty, course_code)                    cap = hours, cost = affinity
+    (faculty, course_code) -> faculty                   cap = hours (ONE section per subject)
+    faculty -> sink                                     cap = max_hours, convex load cost
+    group  -> sink                                      unassigned fallback (high cost)
+
+Pairs that end up unassigned keep the solver's lazy binding at first placement.
+"""
+
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Affinity cost per hour
+COST_LISTED_SAME_DEPT = 0   # faculty lists the course code and belongs to the subject's department
+COST_LISTED_OTHER_DEPT = 1  # faculty lists the course code, other department
+COST_DEPT_FALLBACK = 4      # department faculty who do not list the code
+
+# Convex load-balancing cost per hour: (fraction of max_hours, cost per hour in that band)
+LOAD_BANDS = [(0.5, 0), (0.8, 2), (1.0, 5)]
+
+UNASSIGNED_COST = 100
+
+
+class MinCostFlow:
+    """Primal-dual min-cost flow on integer capacities.
+
+    Each round runs one Dijkstra (with potentials) and then pushes a blocking
+    flow over all shortest paths at once (Dinic on the zero reduced-cost
+    edges), so the number of rounds is the number of distinct path costs
+    rather than the number of augmenting paths.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        # graph[u] = list of [to, cap, cost, rev_index]
+        self.graph = [[] for _ in range(n)]
+
+    def add_edge(self, u: int, v: int, cap: int, cost: int) -> Tuple[int, int]:
+        self.graph[u].append([v, cap, cost, len(self.graph[v])])
+        self.graph[v].append([u, 0, -cost, len(self.graph[u]) - 1])
+        return u, len(self.graph[u]) - 1
+
+    def edge_flow(self, ref: Tuple[int, int]) -> int:
+        u, i = ref
+        v, _, _, rev = self.graph[u][i]
+        return self.graph[v][rev][1]
+
+    def flow(self, s: int, t: int, max_flow: int) -> Tuple[int, int]:
+        n = self.n
+        graph = self.graph
+        potential = [0] * n
+        total_flow = total_cost = 0
+        inf = float('inf')
+
+        while total_flow < max_flow:
+            # Shortest reduced-cost distances from s
+            dist = [inf] * n
+            dist[s] = 0
+            heap = [(0, s)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                pu = potential[u]
+                for v, cap, cost, _ in graph[u]:
+                    if cap > 0:
+                        nd = d + cost + pu - potential[v]
+                        if nd < dist[v]:
+                            dist[v] = nd
+                            heapq.heappush(heap, (nd, v))
+            if dist[t] == inf:
+                break
+            # Nodes unreachable now stay unreachable (only reverse edges of
+            # augmented paths gain capacity), so their potential can stay put
+            for v in range(n):
+                if dist[v] < inf:
+                    potential[v] += dist[v]
+
+            # Blocking flow on admissible edges (cap > 0, reduced cost 0)
+            while total_flow < max_flow:
+                level = [-1] * n
+                level[s] = 0
+                queue = [s]
+                for u in queue:
+                    pu = potential[u]
+                    for v, cap, cost, _ in graph[u]:
+                        if cap > 0 and level[v] < 0 and cost + pu - potential[v] == 0:
+                            level[v] = level[u] + 1
+                            queue.append(v)
+                if level[t] < 0:
+                    break
+                pushed, cost = self._blocking_flow(s, t, max_flow - total_flow, level, potential)
+                if not pushed:
+                    break
+                total_flow += pushed
+                total_cost += cost
+
+        return total_flow, total_cost
+
+    def _blocking_flow(self, s: int, t: int, limit: int, level: List[int],
+                       potential: List[int]) -> Tuple[int, int]:
+        """Push flow along level-increasing admissible paths (iterative DFS with current-arc)"""
+        graph = self.graph
+        it = [0] * self.n
+        pushed = total_cost = 0
+        while pushed < limit:
+            # Find one path s -> t
+            path = []
+            u = s
+            while u != t:
+                edges = graph[u]
+                advanced = False
+                while it[u] < len(edges):
+                    v, cap, cost, _ = edges[it[u]]
+                    if cap > 0 and level[v] == level[u] + 1 and cost + potential[u] - potential[v] == 0:
+                        path.append((u, it[u]))
+                        u = v
+                        advanced = True
+                        break
+                    it[u] += 1
+                if not advanced:
+                    if u == s:
+                        return pushed, total_cost
+                    # Dead end: retreat and skip the edge that led here
+                    level[u] = -1
+                    u, _ = path.pop()
+                    it[u] += 1
+            push = limit - pushed
+            for u, i in path:
+                push = min(push, graph[u][i][1])
+            for u, i in path:
+                edge = graph[u][i]
+                edge[1] -= push
+                graph[edge[0]][edge[3]][1] += push
+                total_cost += push * edge[2]
+            pushed += push
+        return pushed, total_cost
+
+
+def preassign_faculty(pairs: List[Dict], faculty: List[Dict],
+                      faculty_subject_map: Dict[str, List[Dict]]) -> Dict[Tuple[int, str], Dict]:
+    """Assign a faculty member to every (section, course_code) pair.
+
+    pairs: [{'section_id', 'course_code', 'department', 'semester', 'hours'}]
+    Returns {(section_id, course_code): faculty} for the pairs that could be assigned.
+    """
+    # Group interchangeable pairs: same code, department, semester and hours
+    groups = defaultdict(list)
+    for pair in pairs:
+        groups[(pair['course_code'], pair['department'], pair['semester'], pair['hours'])].append(pair)
+
+    faculty_by_id = {f['id']: f for f in faculty}
+    dept_faculty = defaultdict(list)
+    for f in faculty:
+        dept_faculty[f['department']].append(f)
+
+    # Node numbering: 0 = source, 1 = sink, then groups, (faculty, code) nodes, faculty nodes
+    source, sink = 0, 1
+    next_node = 2
+    group_nodes = {}
+    for key in groups:
+        group_nodes[key] = next_node
+        next_node += 1
+
+    fc_nodes = {}
+    fc_caps = defaultdict(int)
+    group_arcs = []  # (group_key, faculty_id, cost)
+    for key, members in groups.items():
+        code, dept, _, hours = key
+        listed = faculty_subject_map.get(code, [])
+        options = {f['id']: (COST_LISTED_SAME_DEPT if f['department'] == dept else COST_LISTED_OTHER_DEPT)
+                   for f in listed}
+        # Department faculty only when listed faculty cannot cover every section
+        if len(options) < len(members):
+            for f in dept_faculty.get(dept, []):
+                options.setdefault(f['id'], COST_DEPT_FALLBACK)
+        for fid, cost in options.items():
+            if (fid, code) not in fc_nodes:
+                fc_nodes[(fid, code)] = next_node
+                next_node += 1
+            fc_caps[(fid, code)] = max(fc_caps[(fid, code)], hours)
+            group_arcs.append((key, fid, cost))
+
+    faculty_nodes = {}
+    for fid, _ in fc_nodes:
+        if fid not in faculty_nodes:
+            faculty_nodes[fid] = next_node
+            next_node += 1
+
+    mcf = MinCostFlow(next_node)
+    demand = 0
+    for key, members in groups.items():
+        hours = key[3]
+        mcf.add_edge(source, group_nodes[key], hours * len(members), 0)
+        mcf.add_edge(group_nodes[key], sink, hours * len(members), UNASSIGNED_COST * hours)
+        demand += hours * len(members)
+
+    arc_refs = {}
+    for key, fid, cost in group_arcs:
+        arc_refs[(key, fid)] = mcf.add_edge(group_nodes[key], fc_nodes[(fid, key[0])], key[3], cost * key[3])
+    for (fid, code), node in fc_nodes.items():
+        mcf.add_edge(node, faculty_nodes[fid], fc_caps[(fid, code)], 0)
+    for fid, node in faculty_nodes.items():
+        max_hours = faculty_by_id[fid].get('max_hours', 18)
+        used = 0
+        for fraction, cost in LOAD_BANDS:
+            band = int(max_hours * fraction) - used
+            if band > 0:
+                mcf.add_edge(node, sink, band, cost)
+                used += band
+
+    mcf.flow(source, sink, demand)
+
+    # Round the flow to whole pairs: faculty carrying the most flow for a group
+    # take its sections first, as long as they still have the full hours free
+    remaining = {fid: faculty_by_id[fid].get('max_hours', 18) for fid in faculty_nodes}
+    used_fc = set()
+    assignment = {}
+    arcs_by_group = defaultdict(list)
+    for (key, fid), ref in arc_refs.items():
+        flow = mcf.edge_flow(ref)
+        if flow > 0:
+            arcs_by_group[key].append((flow, fid))
+
+    for key, members in groups.items():
+        code, _, _, hours = key
+        arcs = sorted(arcs_by_group.get(key, []), key=lambda x: (-x[0], x[1]))
+        pending = sorted(members, key=lambda p: p['section_id'])
+        for flow, fid in arcs:
+            if not pending:
+                break
+            if (fid, code) in used_fc or remaining[fid] < hours:
+                continue
+            pair = pending.pop(0)
+            assignment[(pair['section_id'], code)] = faculty_by_id[fid]
+            used_fc.add((fid, code))
+            remaining[fid] -= hours
+
+    return assignment
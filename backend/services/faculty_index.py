@@ -0,0 +1,108 @@
+"""
+Subject -> faculty index shared by the solver and the API.
+
+Faculty rows list the course codes they can teach as a comma-separated
+string. The index is built once at data load: `exact` maps each listed code
+to its faculty (the solver's faculty_subject_map), and a character trie over
+the same codes answers code-family questions without re-splitting every
+faculty's codes per request:
+
+- match(code): faculty listing `code` itself or any prefix of it
+  ("CS" covers "CS301")
+- family(prefix): faculty listing any code that starts with `prefix`
+
+Results keep the order faculty were added in.
+"""
+
+from typing import Dict, Iterable, List, Optional, Union
+
+
+def split_subject_codes(subject_codes: Union[str, Iterable, None]) -> List[str]:
+    if not subject_codes:
+        return []
+    if isinstance(subject_codes, str):
+        subject_codes = subject_codes.split(',')
+    return [code.strip() for code in subject_codes if code and str(code).strip()]
+
+
+class _TrieNode:
+    __slots__ = ('children', 'faculty_ids')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.faculty_ids: List[str] = []  # faculty listing the code ending here
+
+
+class FacultySubjectIndex:
+    """Course code -> faculty, exact and by code prefix"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.faculty_by_id: Dict[str, Dict] = {}
+        self.order: Dict[str, int] = {}
+        self.exact: Dict[str, List[Dict]] = {}
+        self.root = _TrieNode()
+
+    def __len__(self):
+        return len(self.faculty_by_id)
+
+    def add(self, faculty: Dict, subject_codes: Union[str, Iterable, None]):
+        """Index one faculty dict under its subject codes"""
+        fid = faculty['id']
+        self.faculty_by_id[fid] = faculty
+        self.order.setdefault(fid, len(self.order))
+        for code in split_subject_codes(subject_codes):
+            self.exact.setdefault(code, []).append(faculty)
+            node = self.root
+            for ch in code:
+                node = node.children.setdefault(ch, _TrieNode())
+            if fid not in node.faculty_ids:
+                node.faculty_ids.append(fid)
+
+    def build(self, faculty: Iterable[Dict], codes_key: str = 'subject_codes'):
+        """Rebuild from faculty dicts that carry their codes under codes_key"""
+        self.clear()
+        for f in faculty:
+            self.add(f, f.get(codes_key))
+
+    def _ordered(self, ids: Iterable[str]) -> List[str]:
+        return sorted(set(ids), key=self.order.__getitem__)
+
+    def match_ids(self, code: str) -> List[str]:
+        ids = []
+        node = self.root
+        for ch in code:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            ids.extend(node.faculty_ids)
+        return self._ordered(ids)
+
+    def family_ids(self, prefix: str) -> List[str]:
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        ids, stack = [], [node]
+        while stack:
+            node = stack.pop()
+            ids.extend(node.faculty_ids)
+            stack.extend(node.children.values())
+        return self._ordered(ids)
+
+    def match(self, code: str) -> List[Dict]:
+        return [self.faculty_by_id[fid] for fid in self.match_ids(code)]
+
+    def family(self, prefix: str) -> List[Dict]:
+        return [self.faculty_by_id[fid] for fid in self.family_ids(prefix)]
+
+    def get(self, faculty_id: str) -> Optional[Dict]:
+        return self.faculty_by_id.get(faculty_id)
+
+
+# Built by the solver at load_data; the API builds it from Supabase when no
+# solver has loaded yet
+faculty_subject_index = FacultySubjectIndex()
@@ -0,0 +1,93 @@
+"""
+Run instrumentation for the timetable solver.
+
+Collects, per generate() run:
+- wall and CPU time of every phase
+- call counts and hit rates of the hot constraint checks
+- outcome counters (faculty selection tier, compact-slot pass)
+- peak resident memory of the process
+- extra named sections, e.g. per-table data load timings
+
+Everything is a perf_counter/process_time pair or a dict increment, so it
+stays on in production. The report is plain JSON-serializable data.
+"""
+
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux and the BSDs report KB
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+class RunInstrumentation:
+    """Phase timers and counters for one solver run"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.phases = []
+        self.calls = defaultdict(int)
+        self.hits = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.sections = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block: with report.phase('labs'): ..."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                'name': name,
+                'wall_s': round(time.perf_counter() - wall, 4),
+                'cpu_s': round(time.process_time() - cpu, 4)
+            })
+
+    def check(self, name: str, hit: bool) -> bool:
+        """Count a constraint check and whether it hit; returns hit unchanged"""
+        self.calls[name] += 1
+        if hit:
+            self.hits[name] += 1
+        return hit
+
+    def tally(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def attach(self, name: str, value: Dict):
+        """Add a named JSON-serializable section to the report"""
+        self.sections[name] = value
+
+    def to_dict(self) -> Dict:
+        checks = {}
+        for name, calls in sorted(self.calls.items()):
+            hits = self.hits.get(name, 0)
+            checks[name] = {
+                'calls': calls,
+                'hits': hits,
+                'hit_rate': round(hits / calls, 4) if calls else 0.0
+            }
+        return {
+            'started_at': self.started_at,
+            'total_wall_s': round(sum(p['wall_s'] for p in self.phases), 4),
+            'total_cpu_s': round(sum(p['cpu_s'] for p in self.phases), 4),
+            'phases': list(self.phases),
+            'checks': checks,
+            'counters': dict(sorted(self.counters.items())),
+            'peak_rss_mb': peak_rss_mb(),
+            **self.sections
+        }
@@ -0,0 +1,128 @@
+"""
+NumPy occupancy mirror of the solver schedule.
+
+Keeps section x day x slot and room x day x slot boolean tensors in step with
+TimetableSolverV7.schedule, so synchronized schedulers (Baskets, IE, PCE, PLC
+labs) can test "free for every section of the group" with one reduction and
+score all candidate slots at once instead of walking a first-fit list.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Candidate scoring weights (lower score = better)
+ROOM_SHORTFALL_WEIGHT = 100.0  # per section that would need a virtual room
+SPREAD_WEIGHT = 10.0           # per hour this block already has on the same day
+DAY_LOAD_WEIGHT = 1.0          # per other synchronized hour of the group on that day
+FRAGMENT_WEIGHT = 2.0          # for splitting a free lab pair (1-2, 3-4, 5-6)
+
+
+class OccupancyTensor:
+    """Boolean occupancy tensors indexed by section/room, day and slot"""
+
+    def __init__(self, section_ids: Sequence[int], room_ids: Sequence[str],
+                 days: Sequence[str], slots_by_day: Dict[str, List[int]], max_slot: int = 6):
+        self.section_index = {sid: i for i, sid in enumerate(section_ids)}
+        self.room_index = {rid: i for i, rid in enumerate(room_ids)}
+        self.days = list(days)
+        self.day_index = {d: i for i, d in enumerate(self.days)}
+        self.max_slot = max_slot
+
+        shape = (len(self.days), max_slot)
+        self.sections = np.zeros((len(self.section_index),) + shape, dtype=bool)
+        self.rooms = np.zeros((len(self.room_index),) + shape, dtype=bool)
+
+        # valid[d, s] is False for slots that do not exist on that day (Sat 5-6)
+        self.valid = np.zeros(shape, dtype=bool)
+        for day, slots in slots_by_day.items():
+            for slot in slots:
+                self.valid[self.day_index[day], slot - 1] = True
+
+    def mark(self, section_id: int, room_id: str, day: str, slot: int, busy: bool = True):
+        """Mirror an assign (busy=True) or removal (busy=False)"""
+        d, s = self.day_index[day], slot - 1
+        i = self.section_index.get(section_id)
+        if i is not None:
+            self.sections[i, d, s] = busy
+        r = self.room_index.get(room_id)
+        if r is not None:
+            self.rooms[r, d, s] = busy
+
+    def group_free(self, section_ids: Iterable[int]) -> np.ndarray:
+        """(day, slot) mask of slots free for EVERY section in the group"""
+        idx = [self.section_index[sid] for sid in section_ids if sid in self.section_index]
+        if not idx:
+            return self.valid.copy()
+        return ~self.sections[idx].any(axis=0) & self.valid
+
+    def free_room_count(self, room_ids: Iterable[str]) -> np.ndarray:
+        """(day, slot) count of free rooms among room_ids"""
+        idx = [self.room_index[rid] for rid in room_ids if rid in self.room_index]
+        if not idx:
+            return np.zeros(self.valid.shape, dtype=np.int64)
+        return (~self.rooms[idx]).sum(axis=0)
+
+    def best_sync_slot(self, section_ids: Sequence[int], candidates: Sequence[Tuple[str, int]],
+                       span: int = 1, room_ids: Optional[Iterable[str]] = None,
+                       require_rooms: bool = False, exclude: Iterable[Tuple[str, int]] = (),
+                       spread: Optional[Dict[str, int]] = None,
+                       day_load: Optional[Dict[str, int]] = None) -> Optional[Tuple[str, int]]:
+        """Score every candidate (day, first_slot) at once and return the best.
+
+        A candidate must be free for all sections across `span` consecutive
+        slots. Among those, fewer sections without a room, fewer hours of the
+        same block on that day, lighter group load and intact lab pairs win;
+        candidate order breaks ties.
+        """
+        if not candidates:
+            return None
+        n = len(candidates)
+        day_idx = np.fromiter((self.day_index[d] for d, _ in candidates), dtype=np.int64, count=n)
+        slot_idx = np.fromiter((s - 1 for _, s in candidates), dtype=np.int64, count=n)
+
+        ok = (slot_idx + span) <= self.max_slot
+        slot_idx = np.where(ok, slot_idx, 0)
+
+        free = self.group_free(section_ids)
+        rooms_free = self.free_room_count(room_ids) if room_ids is not None else None
+        min_rooms = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        for k in range(span):
+            s_k = np.minimum(slot_idx + k, self.max_slot - 1)
+            ok &= free[day_idx, s_k]
+            if rooms_free is not None:
+                min_rooms = np.minimum(min_rooms, rooms_free[day_idx, s_k])
+
+        # A single-slot block whose lab-pair partner is still free splits a
+        # 2-slot window that labs could otherwise use
+        fragments = np.zeros(n, dtype=bool)
+        if span == 1:
+            fragments = free[day_idx, slot_idx ^ 1]
+
+        excluded = set(exclude)
+        if excluded:
+            ok &= np.fromiter(((d, s) not in excluded for d, s in candidates), dtype=bool, count=n)
+
+        score = np.arange(n, dtype=np.float64) / n
+        score += fragments * FRAGMENT_WEIGHT
+        if rooms_free is not None:
+            shortfall = np.maximum(0, len(section_ids) - min_rooms)
+            if require_rooms:
+                ok &= shortfall == 0
+            score += shortfall * ROOM_SHORTFALL_WEIGHT
+        if spread:
+            score += self._per_day(spread)[day_idx] * SPREAD_WEIGHT
+        if day_load:
+            score += self._per_day(day_load)[day_idx] * DAY_LOAD_WEIGHT
+
+        if not ok.any():
+            return None
+        score[~ok] = np.inf
+        best = int(np.argmin(score))
+        return candidates[best]
+
+    def _per_day(self, counts: Dict[str, int]) -> np.ndarray:
+        arr = np.zeros(len(self.days), dtype=np.float64)
+        for day, count in counts.items():
+            arr[self.day_index[day]] = count
+        return arr
@@ -0,0 +1,252 @@
+"""
+Write-behind persistence of timetables to Supabase.
+
+The API journals each save (a generated timetable, or one section's manual
+edit) to a local SQLite file and responds at once. A background worker then
+flushes the journal to Supabase in order, retrying with backoff. Jobs
+survive a restart: pending rows are picked up again when the worker starts.
+
+A newer job for the same target (semester type or section) supersedes an
+older one that has not been flushed yet, since only the latest state matters.
+Clearing the timetable is journaled too, so it runs after any save already
+being flushed instead of racing it.
+
+Several uvicorn workers share one journal. Only the worker holding the
+journal's lock file flushes; it also polls for jobs the others enqueue, and
+another worker takes over if it exits.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from services.supabase_service import sync_timetable_slots, sync_section_slots, clear_timetable_slots
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: every process flushes
+    fcntl = None
+
+JOURNAL_PATH = os.getenv(
+    "PERSISTENCE_JOURNAL",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "persistence_journal.db")
+)
+MAX_ATTEMPTS = 8
+BACKOFF_S = 2.0
+MAX_BACKOFF_S = 120.0
+KEEP_FINISHED = 50  # finished jobs kept for the status endpoint
+POLL_S = 5.0  # how often the flushing worker looks for jobs other workers enqueued
+
+PENDING, DONE, FAILED, SUPERSEDED, CANCELLED = 'pending', 'done', 'failed', 'superseded', 'cancelled'
+
+
+async def _clear_slots(payload: Dict) -> Dict:
+    if not await clear_timetable_slots(payload['semester_type']):
+        raise RuntimeError("Supabase did not clear the timetable slots")
+    return {'cleared': payload['semester_type'] or 'all'}
+
+
+class PersistenceQueue:
+    """SQLite journal of pending Supabase writes plus the worker that flushes it"""
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                target TEXT NOT NULL,
+                payload TEXT,
+                rows INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, id)")
+        self.handlers = {
+            'timetable': lambda p: sync_timetable_slots(p['slots'], p['semester_type']),
+            'section': lambda p: sync_section_slots(p['section_id'], p['slots']),
+            'clear': _clear_slots
+        }
+        self.wakeup: Optional[asyncio.Event] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.last_flush_at: Optional[float] = None
+        self.lock_file = None
+        self.leader = False
+
+    # ---------- journal ----------
+
+    def enqueue(self, kind: str, target: str, payload: Dict, rows: int = 0) -> int:
+        """Journal a write and wake the worker; returns the job id"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown persistence job kind: {kind}")
+        now = time.time()
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute(
+                "UPDATE jobs SET status = ?, payload = NULL, updated_at = ? "
+                "WHERE status = ? AND kind = ? AND target = ?",
+                (SUPERSEDED, now, PENDING, kind, target)
+            )
+            job_id = self.db.execute(
+                "INSERT INTO jobs (kind, target, payload, rows, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, target, json.dumps(payload, default=str), rows, PENDING, now, now)
+            ).lastrowid
+        if self.wakeup is not None:
+            self.wakeup.set()
+        return job_id
+
+    def cancel_pending(self, kind: Optional[str] = None, target: Optional[str] = None) -> int:
+        """Drop unflushed jobs (e.g. before clearing the timetable)"""
+        query = "UPDATE jobs SET status = ?, payload = NULL, updated_at = ? WHERE status = ?"
+        params = [CANCELLED, time.time(), PENDING]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if target:
+            query += " AND target = ?"
+            params.append(target)
+        return self.db.execute(query, params).rowcount
+
+    def pending_count(self) -> int:
+        """Jobs not flushed to Supabase yet (by any worker sharing the journal)"""
+        return self.db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (PENDING,)).fetchone()[0]
+
+    def _next_job(self) -> Optional[sqlite3.Row]:
+        return self.db.execute(
+            "SELECT id, kind, payload, attempts, updated_at FROM jobs WHERE status = ? ORDER BY id LIMIT 1",
+            (PENDING,)
+        ).fetchone()
+
+    def _finish(self, job_id: int, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        with self.db:
+            # A job cancelled or superseded while it was being flushed keeps that status
+            self.db.execute(
+                "UPDATE jobs SET status = ?, payload = NULL, result = ?, last_error = COALESCE(?, last_error), "
+                "updated_at = ? WHERE id = ? AND status = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, PENDING)
+            )
+            # Keep the journal small: only the latest finished jobs
+            self.db.execute(
+                "DELETE FROM jobs WHERE status != ? AND id NOT IN "
+                "(SELECT id FROM jobs WHERE status != ? ORDER BY id DESC LIMIT ?)",
+                (PENDING, PENDING, KEEP_FINISHED)
+            )
+
+    def _retry_later(self, job_id: int, attempts: int, error: str):
+        self.db.execute(
+            "UPDATE jobs SET attempts = ?, last_error = ?, updated_at = ? WHERE id = ?",
+            (attempts, error, time.time(), job_id)
+        )
+
+    # ---------- worker ----------
+
+    def start(self):
+        """Start the flush worker on the running event loop (app startup)"""
+        if self.worker is None or self.worker.done():
+            self.wakeup = asyncio.Event()
+            self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker (app shutdown); unflushed jobs stay in the journal"""
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+        if self.lock_file is not None:
+            self.lock_file.close()  # releases the flush lock for another worker
+            self.lock_file = None
+            self.leader = False
+
+    def _take_leadership(self) -> bool:
+        """Hold the journal's lock file: one flushing worker per journal"""
+        if fcntl is None:
+            return True
+        if self.lock_file is None:
+            self.lock_file = open(self.path + '.lock', 'a')
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    async def _run(self):
+        while not self._take_leadership():
+            await asyncio.sleep(POLL_S)
+        self.leader = True
+        pending = self.pending_count()
+        if pending:
+            print(f"📒 Resuming {pending} unflushed persistence job(s)")
+        while True:
+            job = self._next_job()
+            if job is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), POLL_S)
+                except asyncio.TimeoutError:
+                    pass  # look again: another worker may have enqueued
+                continue
+
+            job_id, kind, payload, attempts, updated_at = job
+            if attempts:
+                delay = min(MAX_BACKOFF_S, BACKOFF_S * (2 ** (attempts - 1)))
+                wait = updated_at + delay - time.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue  # the job may have been superseded meanwhile
+
+            try:
+                result = await self.handlers[kind](json.loads(payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                attempts += 1
+                error = f"{type(e).__name__}: {e}"
+                if attempts >= MAX_ATTEMPTS:
+                    print(f"❌ Persistence job {job_id} ({kind}) failed after {attempts} attempts: {error}")
+                    self._finish(job_id, FAILED, error=error)
+                else:
+                    print(f"⚠️ Persistence job {job_id} ({kind}) failed (attempt {attempts}): {error}")
+                    self._retry_later(job_id, attempts, error)
+                continue
+
+            self._finish(job_id, DONE, result=result)
+            self.last_flush_at = time.time()
+
+    # ---------- status ----------
+
+    def status(self) -> Dict:
+        counts = dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        columns = ['id', 'kind', 'target', 'rows', 'status', 'attempts', 'last_error', 'result',
+                   'created_at', 'updated_at']
+        jobs: List[Dict] = []
+        for row in self.db.execute(
+            f"SELECT {', '.join(columns)} FROM jobs ORDER BY id DESC LIMIT 20"
+        ).fetchall():
+            job = dict(zip(columns, row))
+            job['result'] = json.loads(job['result']) if job['result'] else None
+            jobs.append(job)
+        return {
+            # Every process runs a worker task, but only the lock holder flushes
+            'worker_running': self.leader and self.worker is not None and not self.worker.done(),
+            'is_leader': self.leader,
+            'pending': counts.get(PENDING, 0),
+            'failed': counts.get(FAILED, 0),
+            'counts': counts,
+            'last_flush_at': self.last_flush_at,
+            'journal': self.path,
+            'jobs': jobs
+        }
@@ -0,0 +1,264 @@
+"""
+Read model over a timetable result.
+
+get_result() keys the schedule by "section_Day_slot" strings, so answering a
+question about one section, faculty member or room means scanning every slot
+of the institute. TimetableReadModel parses each key once and keeps
+per-section, per-faculty (by id and by name) and per-room slot lists sorted
+by (day, slot), plus each faculty member's workload (total, theory, lab and
+per-day hours) as counters.
+
+A model is never modified once built: with_section() derives the model of
+an edited timetable, re-indexing only that section and sharing the rest.
+
+compact() emits the same slots dictionary-encoded: every subject, faculty
+member, room and section once, and slots as rows of integer references.
+"""
+
+import copy
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+# Compact format: column order of each encoded slot row
+COMPACT_SLOT_FIELDS = ['section', 'day', 'slot', 'subject', 'faculty', 'room', 'is_lab']
+
+
+def _slot_order(slot_ref: Dict):
+    return slot_ref['day'], slot_ref['slot']
+
+
+def _empty_load() -> Dict:
+    return {'total': 0, 'theory': 0, 'lab': 0, 'by_day': {}}
+
+
+class _RefTable:
+    """Dictionary encoding: each distinct object once, referenced by index"""
+
+    def __init__(self):
+        self.rows = []
+        self._by_ref = {}
+        self._by_content = {}
+
+    def index(self, obj) -> int:
+        # Solver results share one dict per subject/faculty; edited slots have
+        # their own copies, so fall back to comparing content
+        i = self._by_ref.get(id(obj))
+        if i is None:
+            content = repr(sorted(obj.items())) if isinstance(obj, dict) else obj
+            i = self._by_content.get(content)
+            if i is None:
+                i = len(self.rows)
+                self.rows.append(obj)
+                self._by_content[content] = i
+            self._by_ref[id(obj)] = i
+        return i
+
+
+class TimetableReadModel:
+    """Indexes of one timetable_result['schedule']"""
+
+    def __init__(self, schedule: Dict[str, Dict], days: Sequence[str], time_slots: Dict[int, str]):
+        self.schedule = schedule
+        self.days = list(days)
+        self.days_count = len(self.days)
+        self.time_slots = time_slots
+        self.day_index = {day: i + 1 for i, day in enumerate(days)}
+
+        self.by_section = defaultdict(list)
+        self.by_faculty_id = defaultdict(list)
+        self.by_faculty_name = defaultdict(list)
+        self.by_room = defaultdict(list)
+        # Workload counters per faculty id, kept in step with by_faculty_id
+        self.faculty_load = defaultdict(_empty_load)
+        self.faculty_busy = defaultdict(dict)  # (day_name, slot) -> slots held there
+
+        for key, val in schedule.items():
+            self._add(key, val)
+
+        for index in (self.by_section, self.by_faculty_id, self.by_faculty_name, self.by_room):
+            for slot_refs in index.values():
+                slot_refs.sort(key=_slot_order)
+
+    def _add(self, key: str, val: Dict) -> Dict:
+        section_id, day_name, slot = key.split('_')
+        slot_ref = {
+            'key': key,
+            'section_id': section_id,
+            'day': self.day_index.get(day_name, 0),
+            'day_name': day_name,
+            'slot': int(slot),
+            'entry': val
+        }
+        self.by_section[section_id].append(slot_ref)
+        faculty = val.get('faculty') or {}
+        if faculty.get('id'):
+            self.by_faculty_id[faculty['id']].append(slot_ref)
+            self._count(faculty['id'], slot_ref, 1)
+        if faculty.get('name'):
+            self.by_faculty_name[faculty['name']].append(slot_ref)
+        self.by_room[val.get('room', '')].append(slot_ref)
+        return slot_ref
+
+    def _count(self, faculty_id: str, slot_ref: Dict, delta: int):
+        load = self.faculty_load[faculty_id]
+        load['total'] += delta
+        load['lab' if slot_ref['entry'].get('is_lab') else 'theory'] += delta
+        by_day = load['by_day']
+        by_day[slot_ref['day_name']] = by_day.get(slot_ref['day_name'], 0) + delta
+        if not by_day[slot_ref['day_name']]:
+            del by_day[slot_ref['day_name']]
+        busy = self.faculty_busy[faculty_id]
+        at = (slot_ref['day_name'], slot_ref['slot'])
+        busy[at] = busy.get(at, 0) + delta
+        if not busy[at]:
+            del busy[at]
+
+    def with_section(self, section_id, entries: Dict[str, Dict], schedule: Dict[str, Dict]) -> 'TimetableReadModel':
+        """A new model where section_id's slots are replaced by entries.
+
+        schedule is the full new schedule. self is left untouched, so readers
+        still holding it see a consistent old version. Only the lists and
+        counters this section touches are copied; everything else is shared.
+        """
+        section_id = str(section_id)
+        old_refs = self.by_section.get(section_id, [])
+        old_ids = {id(slot_ref) for slot_ref in old_refs}
+
+        model = copy.copy(self)
+        model.schedule = schedule
+        model.by_section = defaultdict(list, self.by_section)
+        model.by_faculty_id = defaultdict(list, self.by_faculty_id)
+        model.by_faculty_name = defaultdict(list, self.by_faculty_name)
+        model.by_room = defaultdict(list, self.by_room)
+        model.faculty_load = defaultdict(_empty_load, self.faculty_load)
+        model.faculty_busy = defaultdict(dict, self.faculty_busy)
+
+        # Copy-on-write: private copies of every list and counter this section touches
+        touched = {'id': set(), 'name': set(), 'room': set()}
+        for entry in [slot_ref['entry'] for slot_ref in old_refs] + list(entries.values()):
+            faculty = entry.get('faculty') or {}
+            if faculty.get('id'):
+                touched['id'].add(faculty['id'])
+            if faculty.get('name'):
+                touched['name'].add(faculty['name'])
+            touched['room'].add(entry.get('room', ''))
+        for index, field in ((model.by_faculty_id, 'id'), (model.by_faculty_name, 'name'), (model.by_room, 'room')):
+            for value in touched[field]:
+                if value in index:
+                    index[value] = [s for s in index[value] if id(s) not in old_ids]
+        for fid in touched['id']:
+            if fid in model.faculty_load:
+                load = model.faculty_load[fid]
+                model.faculty_load[fid] = {**load, 'by_day': dict(load['by_day'])}
+                model.faculty_busy[fid] = dict(model.faculty_busy[fid])
+
+        model.by_section[section_id] = []
+        for slot_ref in old_refs:
+            faculty = slot_ref['entry'].get('faculty') or {}
+            if faculty.get('id'):
+                model._count(faculty['id'], slot_ref, -1)
+        for key, val in entries.items():
+            model._add(key, val)
+
+        model.by_section[section_id].sort(key=_slot_order)
+        if not model.by_section[section_id]:
+            del model.by_section[section_id]
+        for index, field in ((model.by_faculty_id, 'id'), (model.by_faculty_name, 'name'), (model.by_room, 'room')):
+            for value in touched[field]:
+                if index.get(value):
+                    index[value].sort(key=_slot_order)
+                else:
+                    index.pop(value, None)
+        return model
+
+    def faculty_workload(self, faculty_id: str) -> Dict:
+        """Total, theory and lab hours and hours per day of one faculty id"""
+        load = self.faculty_load.get(faculty_id)
+        return _empty_load() if load is None else {**load, 'by_day': dict(load['by_day'])}
+
+    def faculty_hours(self, faculty_id: str) -> int:
+        load = self.faculty_load.get(faculty_id)
+        return load['total'] if load else 0
+
+    def faculty_is_busy(self, faculty_id: str, day_name: str, slot: int) -> bool:
+        busy = self.faculty_busy.get(faculty_id)
+        return busy is not None and (day_name, slot) in busy
+
+    def section_slots(self, section_id) -> List[Dict]:
+        return self.by_section.get(str(section_id), [])
+
+    def faculty_slots(self, faculty_id: str, match_name: bool = False) -> List[Dict]:
+        """Slots taught by a faculty id (or, with match_name, by that name too)"""
+        slot_refs = self.by_faculty_id.get(faculty_id, [])
+        if not match_name or faculty_id not in self.by_faculty_name:
+            return slot_refs
+        seen = {s['key'] for s in slot_refs}
+        merged = slot_refs + [s for s in self.by_faculty_name[faculty_id] if s['key'] not in seen]
+        merged.sort(key=_slot_order)
+        return merged
+
+    def room_slots(self, room_id: str) -> List[Dict]:
+        return self.by_room.get(room_id, [])
+
+    def slot_view(self, slot_ref: Dict, section: Optional[Dict] = None, with_section: bool = True) -> Dict:
+        """The slot shape the timetable endpoints return"""
+        val = slot_ref['entry']
+        view = {
+            'day': slot_ref['day'],
+            'day_name': slot_ref['day_name'],
+            'slot': slot_ref['slot'],
+            'time': self.time_slots.get(slot_ref['slot'], ''),
+            'subject': val.get('subject', {}),
+            'room': {'name': val.get('room', '')},
+            'is_lab': val.get('is_lab', False),
+            'faculty': val.get('faculty', {})
+        }
+        if with_section:
+            view['section'] = section
+        return view
+
+    def compact(self, section_ids: Iterable, section_lookup: Callable[[str], Optional[Dict]]) -> Dict:
+        """Normalized payload for the given sections (opt-in format=compact).
+
+        subjects/faculty/rooms/sections are tables; each slot is a row of
+        integer references in COMPACT_SLOT_FIELDS order (day is 1-based,
+        is_lab 0/1); grid[i] maps (day - 1) * slots_per_day + (slot - 1) of
+        sections[i] to a slot row, or -1 when free.
+        """
+        slots_per_day = max(self.time_slots) if self.time_slots else 0
+        subjects, faculty, rooms = _RefTable(), _RefTable(), _RefTable()
+        sections, slots, grid = [], [], []
+
+        for section_id in section_ids:
+            section_id = str(section_id)
+            section_index = len(sections)
+            sections.append(section_lookup(section_id) or {'id': section_id})
+            cells = [-1] * (self.days_count * slots_per_day)
+            for slot_ref in self.section_slots(section_id):
+                val = slot_ref['entry']
+                if 0 < slot_ref['day'] and 0 < slot_ref['slot'] <= slots_per_day:
+                    cells[(slot_ref['day'] - 1) * slots_per_day + slot_ref['slot'] - 1] = len(slots)
+                slots.append([
+                    section_index,
+                    slot_ref['day'],
+                    slot_ref['slot'],
+                    subjects.index(val.get('subject') or {}),
+                    faculty.index(val.get('faculty') or {}),
+                    rooms.index(val.get('room', '')),
+                    1 if val.get('is_lab') else 0
+                ])
+            grid.append(cells)
+
+        return {
+            'format': 'compact',
+            'days': self.days,
+            'time_slots': self.time_slots,
+            'slots_per_day': slots_per_day,
+            'subjects': subjects.rows,
+            'faculty': faculty.rows,
+            'rooms': rooms.rows,
+            'sections': sections,
+            'slot_fields': COMPACT_SLOT_FIELDS,
+            'slots': slots,
+            'grid': grid
+        }
@@ -0,0 +1,79 @@
+"""
+Compact record types for the solver's per-slot state.
+
+A timetable holds one assignment per (section, day, slot) - thousands per run -
+while sections, subjects, rooms and faculty are loaded once. Assignments are
+therefore __slots__ records holding shared references to the entity dicts
+instead of a fresh dict per slot, and TBA faculty placeholders are interned
+per (department, reason) instead of being rebuilt on every fallback.
+
+Assignment keeps dict-style read access (entry['subject'], entry.get('is_lab'))
+so code that also sees plain dict entries (manual edits from the API) works on
+both; get_result() serializes with to_dict().
+"""
+
+import sys
+from typing import Any, Dict, Optional
+
+
+class Assignment:
+    """One scheduled hour of a section"""
+
+    __slots__ = ('subject', 'room', 'is_lab', 'faculty')
+
+    def __init__(self, subject: Dict, room: str, is_lab: bool = False, faculty: Optional[Dict] = None):
+        self.subject = subject
+        self.room = sys.intern(room)
+        self.is_lab = is_lab
+        self.faculty = faculty
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_dict(self) -> Dict:
+        return {
+            'subject': self.subject,
+            'room': self.room,
+            'is_lab': self.is_lab,
+            'faculty': self.faculty
+        }
+
+
+# (department, name) -> shared TBA faculty record
+_tba_faculty = {}
+
+
+def tba_faculty(department: str, name: str = 'TBA') -> Dict:
+    """Interned placeholder faculty for a department (never mutate the result)"""
+    key = (department, name)
+    faculty = _tba_faculty.get(key)
+    if faculty is None:
+        faculty = {
+            'id': sys.intern(f"TBA_{department}"),
+            'name': name,
+            'department': department,
+            'max_hours': 99
+        }
+        _tba_faculty[key] = faculty
+    return faculty
+
+
+def course_code_of(subject: Dict) -> str:
+    """Course code used for locks and patterns (falls back to the subject name)"""
+    if 'course_code' in subject:
+        return subject['course_code']
+    return subject.get('name', '')
+
+
+def intern_fields(entity: Dict, *fields: str) -> Dict:
+    """Intern string id/code fields so every reference shares one object"""
+    for field in fields:
+        value = entity.get(field)
+        if isinstance(value, str):
+            entity[field] = sys.intern(value)
+    return entity
@@ -0,0 +1,158 @@
+"""
+Pre-serialized response cache for the timetable read endpoints.
+
+Between regenerations the timetable does not change, so each response is
+encoded once (orjson when installed) and kept as bytes together with gzip and
+brotli variants. Entries are keyed by (path, sorted query parameters) and
+belong to one timetable version: a request for a newer snapshot, or a call to
+invalidate(), drops the whole cache in a single assignment. Requests still
+holding an older snapshot are answered without touching the cache.
+
+Responses carry a strong ETag per encoding and answer If-None-Match with 304.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoding
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: br encoding
+    brotli = None
+
+MAX_ENTRIES = 5000
+MIN_COMPRESS_BYTES = 1024
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def encode_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode()
+
+
+def _accepted_encodings(header: str) -> set:
+    """Codings in Accept-Encoding, minus any sent with q=0"""
+    accepted = set()
+    for part in header.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding and params.replace(' ', '') not in ('q=0', 'q=0.0'):
+            accepted.add(coding)
+    return accepted
+
+
+class CachedResponse:
+    """One encoded response body and its compressed variants"""
+
+    __slots__ = ('body', 'digest', 'variants')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants: Dict[str, bytes] = {}
+
+    def etag(self, coding: str) -> str:
+        return f'"{self.digest}"' if coding == 'identity' else f'"{self.digest}-{coding}"'
+
+    def encoded(self, coding: str) -> bytes:
+        if coding == 'identity':
+            return self.body
+        if coding not in self.variants:
+            if coding == 'br':
+                self.variants[coding] = brotli.compress(self.body, quality=5)
+            else:
+                self.variants[coding] = gzip.compress(self.body, compresslevel=6)
+        return self.variants[coding]
+
+    def pick_coding(self, accept_encoding: str) -> str:
+        if len(self.body) < MIN_COMPRESS_BYTES:
+            return 'identity'
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return 'identity'
+
+    def respond(self, request: Request) -> Response:
+        coding = self.pick_coding(request.headers.get('accept-encoding', ''))
+        headers = {
+            'ETag': self.etag(coding),
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': 'no-cache'  # always revalidate; 304s are cheap
+        }
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match:
+            tags = {tag.strip() for tag in if_none_match.split(',')}
+            if '*' in tags or tags & {self.etag(c) for c in ('identity', 'gzip', 'br')}:
+                return Response(status_code=304, headers=headers)
+        if coding != 'identity':
+            headers['Content-Encoding'] = coding
+        return Response(content=self.encoded(coding), media_type='application/json', headers=headers)
+
+
+class ResponseCache:
+    """Encoded responses of one timetable version"""
+
+    def __init__(self):
+        self.version = 0
+        self.source: Any = None
+        self.source_version = 0  # version of the newest source seen
+        self.entries: Dict[Tuple[str, Tuple], CachedResponse] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, source: Any = None):
+        """Drop every entry at once (generate, clear, manual edit)"""
+        self.entries = {}
+        self.source = source
+        source_version = getattr(source, 'version', None)
+        if source_version is not None:
+            self.source_version = source_version
+        self.version += 1
+
+    async def respond(self, request: Request, source: Any, build: Callable[[], Awaitable[Any]]) -> Response:
+        """Serve request from the cache, building the payload once per version.
+
+        source is the object the payload derives from (the timetable
+        snapshot). A different object with a newer `version` replaces the
+        cached one; an older one is built and served but never cached.
+        """
+        if source is not self.source:
+            source_version = getattr(source, 'version', None)
+            if source_version is None or source_version > self.source_version:
+                self.invalidate(source)
+            else:
+                self.misses += 1
+                return CachedResponse(encode_json(await build())).respond(request)
+        entries = self.entries
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+        entry = entries.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = CachedResponse(encode_json(await build()))
+            # Only store into the version the payload was built from
+            if entries is self.entries:
+                if len(entries) >= MAX_ENTRIES:
+                    entries.pop(next(iter(entries)))
+                entries[key] = entry
+        else:
+            self.hits += 1
+        return entry.respond(request)
+
+    def stats(self) -> Dict:
+        return {'version': self.version, 'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,176 @@
+"""
+Room allocation for synchronized blocks (Baskets, IE, PCE).
+
+All sections of a synchronized block meet at the same day/slot, so their rooms
+have to be chosen together. This solves the choice as a min-cost assignment
+(Hungarian algorithm) instead of picking one section at a time:
+- Dedicated room is preferred, then department rooms, then shared rooms
+- Rooms smaller than the section's student_count are never used, except the
+  section's own dedicated room as a last resort before a virtual room
+- Virtual rooms are used only when no physical assignment exists
+"""
+
+from typing import Callable, Dict, List
+
+# Cost tiers (lower = preferred). Each tier is worth more than any capacity slack.
+TIER_DEDICATED = 0
+TIER_DEPT_SPARE = 1
+TIER_DEPT_CLASSROOM = 2
+TIER_ANY_SPARE = 3
+TIER_PLACEMENT = 4
+TIER_ANY_CLASSROOM = 5
+TIER_UNDERSIZED_DEDICATED = 9  # home room, too small: still better than Virtual_
+TIER_WEIGHT = 100
+MAX_SLACK_COST = TIER_WEIGHT - 1
+
+VIRTUAL_COST = 1_000_000
+FORBIDDEN_COST = 1_000_000_000
+
+
+def solve_assignment(cost: List[List[int]]) -> List[int]:
+    """Min-cost assignment for an n x m cost matrix (n <= m).
+
+    Returns the column assigned to each row. O(n^2 * m) worst case.
+    """
+    n = len(cost)
+    if n == 0:
+        return []
+    m = len(cost[0])
+    inf = float('inf')
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    p = [0] * (m + 1)   # p[j] = row matched to column j (1-based, 0 = free)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # Augment along the alternating path
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+
+class SyncRoomAllocator:
+    """Assigns distinct rooms to all sections of a synchronized block"""
+
+    def __init__(self, rooms: List[Dict]):
+        self.rooms_by_id = {r['id']: r for r in rooms}
+        # Theory blocks never go to labs
+        self.shared_rooms = [r for r in rooms if r['room_type'] in ('Classroom', 'Placement')]
+
+    def virtual_room(self, section: Dict) -> str:
+        return f"Virtual_{section['department']}_{section['section']}"
+
+    def room_cost(self, section: Dict, room_id: str) -> int:
+        """Cost of seating a section in a room (FORBIDDEN_COST if it cannot be used)"""
+        room = self.rooms_by_id.get(room_id)
+        capacity = room.get('capacity') if room else None
+        students = section.get('student_count') or 0
+        slack = 0
+        if capacity:
+            slack = int(capacity) - int(students)
+            if slack < 0:
+                if room_id != section.get('dedicated_room'):
+                    return FORBIDDEN_COST
+                return TIER_UNDERSIZED_DEDICATED * TIER_WEIGHT + min(-slack, MAX_SLACK_COST)
+
+        if room_id == section.get('dedicated_room'):
+            tier = TIER_DEDICATED
+        elif room is None or room['room_type'] not in ('Classroom', 'Placement'):
+            # Someone else's dedicated room of unknown/lab type - never borrow it
+            return FORBIDDEN_COST
+        elif room['room_type'] == 'Placement':
+            # Placement rooms are only for 3rd/4th year students (Sem 5-8)
+            if section.get('semester', 1) < 5:
+                return FORBIDDEN_COST
+            tier = TIER_PLACEMENT
+        elif room['department'] == section['department']:
+            tier = TIER_DEPT_SPARE if 'SPARE' in room_id else TIER_DEPT_CLASSROOM
+        elif 'SPARE' in room_id:
+            tier = TIER_ANY_SPARE
+        else:
+            tier = TIER_ANY_CLASSROOM
+
+        return tier * TIER_WEIGHT + min(slack, MAX_SLACK_COST)
+
+    def allocate(self, sections: List[Dict], day: str, slots: List[int],
+                 is_room_free: Callable[[str, str, int], bool]) -> Dict[int, str]:
+        """Return section_id -> room for every section, free for all given slots.
+
+        Sections that cannot be seated in any physical room get a Virtual_ room.
+        """
+        if not sections:
+            return {}
+
+        def free_for_block(room_id: str) -> bool:
+            return all(is_room_free(room_id, day, slot) for slot in slots)
+
+        # Candidate rooms: free shared rooms plus the sections' own dedicated rooms
+        candidates = [r['id'] for r in self.shared_rooms if free_for_block(r['id'])]
+        seen = set(candidates)
+        for sec in sections:
+            dedicated = sec.get('dedicated_room')
+            if dedicated and dedicated not in seen and not dedicated.startswith("Virtual_") and free_for_block(dedicated):
+                candidates.append(dedicated)
+                seen.add(dedicated)
+
+        n = len(sections)
+        costs = [[self.room_cost(sec, room_id) for room_id in candidates] for sec in sections]
+
+        # Keep only each section's n cheapest rooms - an optimal assignment never
+        # needs more, and it keeps the matrix small for large institutions
+        keep = set()
+        for row in costs:
+            usable = [j for j, c in enumerate(row) if c < FORBIDDEN_COST]
+            usable.sort(key=lambda j: row[j])
+            keep.update(usable[:n])
+        cols = sorted(keep)
+
+        # One virtual column per section guarantees a complete assignment
+        matrix = [[row[j] for j in cols] + [VIRTUAL_COST] * n for row in costs]
+        assignment = solve_assignment(matrix)
+
+        section_room_map = {}
+        for sec, col in zip(sections, assignment):
+            if col < len(cols):
+                section_room_map[sec['id']] = candidates[cols[col]]
+            else:
+                section_room_map[sec['id']] = self.virtual_room(sec)
+        return section_room_map
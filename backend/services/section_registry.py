@@ -0,0 +1,71 @@
+"""
+Section registry: one id -> section map for the whole process.
+
+The solver registers its sections after load_data, the restore path loads
+them from Supabase, and the read endpoints join slots to sections with a
+dict lookup instead of scanning the section list. A lookup of an unknown id
+refreshes the registry from Supabase (at most once per MIN_REFRESH_INTERVAL_S),
+so sections added since the last load are picked up.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+MIN_REFRESH_INTERVAL_S = 5.0
+
+
+def section_record(row: Dict) -> Dict:
+    """A Supabase sections row in the shape the solver and endpoints use"""
+    sem = row['semester']
+    year = (sem + 1) // 2
+    return {
+        'id': row['id'],
+        'department': row['department'],
+        'academic_year': year,
+        'semester': sem,
+        'section': row['section'],
+        'dedicated_room': row.get('dedicated_room'),
+        'student_count': row.get('student_count', 60),
+        'academic_year_display': f"Year {year}"
+    }
+
+
+class SectionRegistry:
+    """Sections keyed by str(id), so schedule keys and int ids both hit"""
+
+    def __init__(self):
+        self.by_id: Dict[str, Dict] = {}
+        self.refreshed_at: Optional[float] = None
+
+    def register(self, sections: List[Dict]):
+        """Add or replace sections (the solver registers its own dicts)"""
+        for sec in sections:
+            self.by_id[str(sec['id'])] = sec
+
+    def get(self, section_id) -> Optional[Dict]:
+        return self.by_id.get(str(section_id))
+
+    def sections(self, semesters: Optional[List[int]] = None) -> List[Dict]:
+        if semesters is None:
+            return list(self.by_id.values())
+        return [sec for sec in self.by_id.values() if sec['semester'] in semesters]
+
+    async def refresh(self):
+        """Reload every section from Supabase"""
+        from services.supabase_service import fetch_sections
+        rows = await fetch_sections('all')
+        self.by_id = {str(row['id']): section_record(row) for row in rows}
+        self.refreshed_at = time.time()
+
+    async def lookup(self, section_id) -> Optional[Dict]:
+        """get(), refreshing from Supabase once if the id is unknown"""
+        sec = self.get(section_id)
+        if sec is None and (self.refreshed_at is None or
+                            time.time() - self.refreshed_at >= MIN_REFRESH_INTERVAL_S):
+            await self.refresh()
+            sec = self.get(section_id)
+        return sec
+
+
+# Shared by the solver, the restore path and the API endpoints
+section_registry = SectionRegistry()
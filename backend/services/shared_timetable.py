@@ -0,0 +1,145 @@
+"""
+Published timetable shared by every uvicorn worker on the host.
+
+Each worker process keeps its own SnapshotStore. With `--workers N` those
+stores must agree, so every publish (generate, edit, clear, restore) is also
+written to a local SQLite file as one encoded payload under a global,
+increasing version. Workers read the file through a read-only, memory-mapped
+connection. Before each request they compare SQLite's data_version (a
+cheap, in-memory check); when another worker has published, the new version
+is decoded in a background thread while requests keep the current one.
+
+The file outlives restarts, while Supabase may have changed meanwhile (a
+redeploy, a direct edit). At startup the first worker to take the restore
+lease reloads it from Supabase; workers starting within RESTORE_FRESH_S of
+that restore pick the restored version up from the file instead.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from services.response_cache import encode_json
+
+try:
+    import orjson
+except ImportError:  # optional: faster decoding
+    orjson = None
+
+SHARED_DB_PATH = os.getenv(
+    "TIMETABLE_SHARED_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared_timetable.db")
+)
+KEEP_VERSIONS = 2          # older payloads are deleted on publish
+RESTORE_LEASE_S = 120.0    # a crashed restorer's lease expires after this
+RESTORE_FRESH_S = 60.0     # a restore this recent belongs to the current start-up
+MMAP_BYTES = 256 * 1024 * 1024
+
+
+class VersionConflict(Exception):
+    """Another worker published since the version an edit was based on"""
+
+
+class SharedTimetableFile:
+    """SQLite file holding the latest published timetable payloads"""
+
+    def __init__(self, path: str = SHARED_DB_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS versions (
+                version INTEGER PRIMARY KEY,
+                published_at REAL NOT NULL,
+                payload BLOB
+            )
+        """)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)")
+        # Readers go through their own read-only, memory-mapped connection
+        self.reader = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False,
+                                      isolation_level=None)
+        self.reader.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+        self.reader_lock = threading.Lock()  # load() and publish() also run in worker threads
+        self.writer_lock = threading.Lock()
+        self.data_version: Optional[int] = None
+
+    def changed(self) -> bool:
+        """True when any connection has committed to the file since the last call"""
+        with self.reader_lock:
+            data_version = self.reader.execute("PRAGMA data_version").fetchone()[0]
+        changed = data_version != self.data_version
+        self.data_version = data_version
+        return changed
+
+    def latest_version(self) -> int:
+        with self.reader_lock:
+            row = self.reader.execute("SELECT MAX(version) FROM versions").fetchone()
+        return row[0] or 0
+
+    def load(self) -> Optional[Tuple[int, Optional[Dict]]]:
+        """(version, payload) of the newest publish; payload None means cleared"""
+        with self.reader_lock:
+            row = self.reader.execute(
+                "SELECT version, payload FROM versions ORDER BY version DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        version, payload = row
+        if payload is None:
+            return version, None
+        return version, orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+    def publish(self, payload: Optional[Dict], base_version: Optional[int] = None) -> int:
+        """Store payload as the next version and return it.
+
+        With base_version, refuse (VersionConflict) if someone else has
+        published after it. A None payload records a clear.
+        """
+        blob = encode_json(payload) if payload is not None else None
+        with self.writer_lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            latest = self.db.execute("SELECT COALESCE(MAX(version), 0) FROM versions").fetchone()[0]
+            if base_version is not None and latest != base_version:
+                raise VersionConflict(f"based on version {base_version}, latest is {latest}")
+            version = latest + 1
+            self.db.execute(
+                "INSERT INTO versions (version, published_at, payload) VALUES (?, ?, ?)",
+                (version, time.time(), blob)
+            )
+            self.db.execute("DELETE FROM versions WHERE version <= ?", (version - KEEP_VERSIONS,))
+        return version
+
+    def claim_restore(self, lease_s: float = RESTORE_LEASE_S) -> bool:
+        """Take the startup restore lease unless another worker holds a live one"""
+        now = time.time()
+        with self.writer_lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'restore_lease'").fetchone()
+            if row is not None and row[0] > now:
+                return False
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('restore_lease', ?)", (now + lease_s,)
+            )
+        return True
+
+    def release_restore(self, restored: bool = False):
+        """Give the lease back; restored records that the file now matches Supabase"""
+        with self.writer_lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute("DELETE FROM meta WHERE key = 'restore_lease'")
+            if restored:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('restored_at', ?)", (time.time(),)
+                )
+
+    def restored_within(self, seconds: float = RESTORE_FRESH_S) -> bool:
+        with self.writer_lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'restored_at'").fetchone()
+        return row is not None and time.time() - row[0] < seconds
+
+    def close(self):
+        self.reader.close()
+        self.db.close()
@@ -0,0 +1,63 @@
+"""
+Diff of timetable_slots rows for differential persistence.
+
+Compares the rows about to be saved with the rows already in Supabase by
+slot key and classifies them, so only changed slots are written:
+- insert: key not persisted yet
+- update: key persisted with different values (carries the persisted id)
+- delete: persisted ids whose key is gone (or duplicates of a kept key)
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+# A slot is identified by where it sits, not by what is in it
+SLOT_KEY = ('semester_type', 'section_id', 'day', 'slot')
+SECTION_SLOT_KEY = ('section_id', 'day', 'slot')
+
+# Bookkeeping columns never count as a change
+IGNORED_FIELDS = {'id', 'generation_id', 'created_at', 'updated_at'}
+
+
+def slot_key(row: Dict, key_fields: Sequence[str] = SLOT_KEY) -> Tuple:
+    return tuple(row.get(f) for f in key_fields)
+
+
+def row_changed(persisted: Dict, row: Dict) -> bool:
+    """True if any field of the new row differs from the persisted row"""
+    return any(persisted.get(f) != v for f, v in row.items() if f not in IGNORED_FIELDS)
+
+
+def diff_slots(persisted: List[Dict], rows: List[Dict],
+               key_fields: Sequence[str] = SLOT_KEY) -> Dict[str, List]:
+    """Classify rows against persisted rows (which must carry 'id')"""
+    by_key = {}
+    delete = []
+    for old in persisted:
+        key = slot_key(old, key_fields)
+        if key in by_key:
+            delete.append(old['id'])  # duplicate left by an older writer
+        else:
+            by_key[key] = old
+
+    insert, update = [], []
+    unchanged = 0
+    for row in rows:
+        old = by_key.pop(slot_key(row, key_fields), None)
+        if old is None:
+            insert.append(row)
+        elif row_changed(old, row):
+            update.append({**row, 'id': old['id']})
+        else:
+            unchanged += 1
+
+    delete.extend(old['id'] for old in by_key.values())
+    return {'insert': insert, 'update': update, 'delete': delete, 'unchanged': unchanged}
+
+
+def diff_summary(diff: Dict[str, List]) -> Dict[str, int]:
+    return {
+        'inserted': len(diff['insert']),
+        'updated': len(diff['update']),
+        'deleted': len(diff['delete']),
+        'unchanged': diff['unchanged']
+    }
@@ -4,10 +4,17 @@ Uses Supabase REST API for reliable data access
 """
 
 import os
+import time
+import asyncio
+import random
+import uuid
 import httpx
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 from dotenv import load_dotenv
 
+from services.slot_diff import diff_slots, diff_summary, SLOT_KEY, SECTION_SLOT_KEY
+
 load_dotenv(override=True)
 
 SUPABASE_URL = os.getenv("VITE_SUPABASE_URL", "https://mmkkmjsqrqwfkbazznaw.supabase.co")
@@ -23,55 +30,180 @@ def get_headers():
         "Prefer": "return=representation"
     }
 
+# PostgREST caps each response (Supabase default max-rows = 1000)
+PAGE_SIZE = 1000
+# Pages of one table in flight at once
+PAGE_PARALLELISM = int(os.getenv("SUPABASE_PAGE_PARALLELISM", "4"))
+
+# ============================================
+# SHARED HTTP CLIENT
+# ============================================
+# One pooled client per process (keep-alive, HTTP/2 when h2 is installed),
+# opened on app startup and closed on shutdown. Scripts that never call
+# start_http_client() get one lazily on first request.
+
+HTTP_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "10"))
+HTTP_MAX_CONCURRENT_REQUESTS = int(os.getenv("SUPABASE_MAX_CONCURRENT_REQUESTS", "16"))
+HTTP2_ENABLED = os.getenv("SUPABASE_HTTP2", "1") == "1"
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop = None
+_request_slots: Optional[asyncio.Semaphore] = None
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+async def start_http_client(**client_kwargs) -> httpx.AsyncClient:
+    """Open the shared client (call from app startup). Extra kwargs go to httpx.AsyncClient."""
+    global _http_client, _http_client_loop, _request_slots
+    await close_http_client()
+    options = {
+        'timeout': httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        'limits': httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                               max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        'http2': HTTP2_ENABLED and _http2_available()
+    }
+    options.update(client_kwargs)
+    _http_client = httpx.AsyncClient(**options)
+    _http_client_loop = asyncio.get_running_loop()
+    _request_slots = asyncio.Semaphore(HTTP_MAX_CONCURRENT_REQUESTS)
+    return _http_client
+
+async def close_http_client():
+    """Close the shared client (call from app shutdown)"""
+    global _http_client, _http_client_loop, _request_slots
+    if _http_client is not None and _http_client_loop is asyncio.get_running_loop():
+        await _http_client.aclose()
+    _http_client = _http_client_loop = _request_slots = None
+
+async def get_http_client() -> httpx.AsyncClient:
+    """The shared client, opened lazily (and reopened if the event loop changed)"""
+    if _http_client is None or _http_client_loop is not asyncio.get_running_loop():
+        await start_http_client()
+    return _http_client
+
+async def _request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send one request on the shared client, at most HTTP_MAX_CONCURRENT_REQUESTS at a time"""
+    client = await get_http_client()
+    async with _request_slots:
+        return await client.request(method, url, **kwargs)
+
+def _content_range_total(resp: httpx.Response) -> Optional[int]:
+    """Total row count from a 'Content-Range: 0-999/5234' header (None if unknown)"""
+    total = resp.headers.get("content-range", "*/*").split("/")[-1]
+    return int(total) if total.isdigit() else None
+
+async def _iter_pages(table: str, query: str, max_parallel: int = PAGE_PARALLELISM) -> AsyncIterator[List[Dict]]:
+    """Yield every row of a (filtered, ordered) table, one page at a time.
+    
+    The first page also asks for the exact count; the remaining pages are
+    requested concurrently, at most max_parallel ahead of the consumer, and
+    yielded in order. The query's order must be unique for offsets to be stable.
+    """
+    url = f"{SUPABASE_URL}/rest/v1/{table}?{query}"
+    resp = await _request("GET", url, headers={
+        **get_headers(), "Prefer": "count=exact", "Range-Unit": "items", "Range": f"0-{PAGE_SIZE - 1}"
+    })
+    if resp.status_code not in [200, 206]:
+        # Never pass a failed read off as an empty table: diffs would re-insert
+        # every row and restore would silently restore nothing
+        print(f"❌ Failed to read {table}: HTTP {resp.status_code} {resp.text[:200]}")
+        raise httpx.HTTPStatusError(
+            f"Reading {table} failed with HTTP {resp.status_code}", request=resp.request, response=resp
+        )
+    first = resp.json()
+    total = _content_range_total(resp)
+    yield first
+    if total is None or len(first) >= total or not first:
+        return
+    
+    # The server may cap pages below PAGE_SIZE - use what it actually returned
+    page_size = len(first)
+    
+    async def fetch_page(offset: int) -> List[Dict]:
+        page = await _request("GET", url, headers={
+            **get_headers(), "Range-Unit": "items", "Range": f"{offset}-{offset + page_size - 1}"
+        })
+        page.raise_for_status()
+        return page.json()
+    
+    offsets = iter(range(page_size, total, page_size))
+    pending = deque()
+    
+    def schedule_next():
+        offset = next(offsets, None)
+        if offset is not None:
+            pending.append(asyncio.ensure_future(fetch_page(offset)))
+    
+    for _ in range(max(1, max_parallel)):
+        schedule_next()
+    received = len(first)
+    try:
+        while pending:
+            page = await pending.popleft()
+            schedule_next()
+            received += len(page)
+            yield page
+    finally:
+        for task in pending:
+            task.cancel()
+    
+    if received != total:
+        print(f"⚠️ {table} changed while paging: expected {total} rows, got {received}")
+
+async def _fetch_rows(table: str, query: str) -> List[Dict]:
+    """GET every row of a (filtered, ordered) table"""
+    rows = []
+    async for page in _iter_pages(table, query):
+        rows.extend(page)
+    return rows
+
 # ============================================
 # DEPARTMENTS
 # ============================================
 
 async def fetch_departments() -> List[Dict]:
     """Fetch all departments from Supabase"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{SUPABASE_URL}/rest/v1/departments?select=*&order=id",
-            headers=get_headers()
-        )
-        if resp.status_code == 200:
-            return resp.json()
-        return []
+    return await _fetch_rows("departments", "select=*&order=id")
 
 async def add_department(department_code: str, department_name: str) -> Dict:
     """Add a new department"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{SUPABASE_URL}/rest/v1/departments",
-            headers=get_headers(),
-            json={"department_code": department_code, "department_name": department_name}
-        )
-        if resp.status_code in [200, 201]:
-            data = resp.json()
-            return data[0] if isinstance(data, list) else data
-        return None
+    resp = await _request("POST",
+        f"{SUPABASE_URL}/rest/v1/departments",
+        headers=get_headers(),
+        json={"department_code": department_code, "department_name": department_name}
+    )
+    if resp.status_code in [200, 201]:
+        data = resp.json()
+        return data[0] if isinstance(data, list) else data
+    return None
 
 async def update_department(id: int, department_code: str, department_name: str) -> Dict:
     """Update a department"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.patch(
-            f"{SUPABASE_URL}/rest/v1/departments?id=eq.{id}",
-            headers=get_headers(),
-            json={"department_code": department_code, "department_name": department_name}
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return data[0] if isinstance(data, list) and data else None
-        return None
+    resp = await _request("PATCH",
+        f"{SUPABASE_URL}/rest/v1/departments?id=eq.{id}",
+        headers=get_headers(),
+        json={"department_code": department_code, "department_name": department_name}
+    )
+    if resp.status_code == 200:
+        data = resp.json()
+        return data[0] if isinstance(data, list) and data else None
+    return None
 
 async def delete_department(id: int) -> bool:
     """Delete a department"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.delete(
-            f"{SUPABASE_URL}/rest/v1/departments?id=eq.{id}",
-            headers=get_headers()
-        )
-        return resp.status_code in [200, 204]
+    resp = await _request("DELETE",
+        f"{SUPABASE_URL}/rest/v1/departments?id=eq.{id}",
+        headers=get_headers()
+    )
+    return resp.status_code in [200, 204]
 
 # ============================================
 # FACULTY
@@ -79,49 +211,39 @@ async def delete_department(id: int) -> bool:
 
 async def fetch_faculty() -> List[Dict]:
     """Fetch all faculty from Supabase"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{SUPABASE_URL}/rest/v1/faculty?select=*&order=faculty_name",
-            headers=get_headers()
-        )
-        if resp.status_code == 200:
-            return resp.json()
-        return []
+    return await _fetch_rows("faculty", "select=*&order=faculty_name,id")
 
 async def add_faculty(faculty_data: Dict) -> Dict:
     """Add a new faculty member"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{SUPABASE_URL}/rest/v1/faculty",
-            headers=get_headers(),
-            json=faculty_data
-        )
-        if resp.status_code in [200, 201]:
-            data = resp.json()
-            return data[0] if isinstance(data, list) else data
-        return None
+    resp = await _request("POST",
+        f"{SUPABASE_URL}/rest/v1/faculty",
+        headers=get_headers(),
+        json=faculty_data
+    )
+    if resp.status_code in [200, 201]:
+        data = resp.json()
+        return data[0] if isinstance(data, list) else data
+    return None
 
 async def update_faculty(id: int, faculty_data: Dict) -> Dict:
     """Update a faculty member"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.patch(
-            f"{SUPABASE_URL}/rest/v1/faculty?id=eq.{id}",
-            headers=get_headers(),
-            json=faculty_data
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return data[0] if isinstance(data, list) and data else None
-        return None
+    resp = await _request("PATCH",
+        f"{SUPABASE_URL}/rest/v1/faculty?id=eq.{id}",
+        headers=get_headers(),
+        json=faculty_data
+    )
+    if resp.status_code == 200:
+        data = resp.json()
+        return data[0] if isinstance(data, list) and data else None
+    return None
 
 async def delete_faculty(id: int) -> bool:
     """Delete a faculty member"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.delete(
-            f"{SUPABASE_URL}/rest/v1/faculty?id=eq.{id}",
-            headers=get_headers()
-        )
-        return resp.status_code in [200, 204]
+    resp = await _request("DELETE",
+        f"{SUPABASE_URL}/rest/v1/faculty?id=eq.{id}",
+        headers=get_headers()
+    )
+    return resp.status_code in [200, 204]
 
 # ============================================
 # ROOMS
@@ -129,49 +251,39 @@ async def delete_faculty(id: int) -> bool:
 
 async def fetch_rooms() -> List[Dict]:
     """Fetch all rooms from Supabase"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{SUPABASE_URL}/rest/v1/rooms?select=*&order=room_id",
-            headers=get_headers()
-        )
-        if resp.status_code == 200:
-            return resp.json()
-        return []
+    return await _fetch_rows("rooms", "select=*&order=room_id")
 
 async def add_room(room_data: Dict) -> Dict:
     """Add a new room"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{SUPABASE_URL}/rest/v1/rooms",
-            headers=get_headers(),
-            json=room_data
-        )
-        if resp.status_code in [200, 201]:
-            data = resp.json()
-            return data[0] if isinstance(data, list) else data
-        return None
+    resp = await _request("POST",
+        f"{SUPABASE_URL}/rest/v1/rooms",
+        headers=get_headers(),
+        json=room_data
+    )
+    if resp.status_code in [200, 201]:
+        data = resp.json()
+        return data[0] if isinstance(data, list) else data
+    return None
 
 async def update_room(id: int, room_data: Dict) -> Dict:
     """Update a room"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.patch(
-            f"{SUPABASE_URL}/rest/v1/rooms?id=eq.{id}",
-            headers=get_headers(),
-            json=room_data
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return data[0] if isinstance(data, list) and data else None
-        return None
+    resp = await _request("PATCH",
+        f"{SUPABASE_URL}/rest/v1/rooms?id=eq.{id}",
+        headers=get_headers(),
+        json=room_data
+    )
+    if resp.status_code == 200:
+        data = resp.json()
+        return data[0] if isinstance(data, list) and data else None
+    return None
 
 async def delete_room(id: int) -> bool:
     """Delete a room"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.delete(
-            f"{SUPABASE_URL}/rest/v1/rooms?id=eq.{id}",
-            headers=get_headers()
-        )
-        return resp.status_code in [200, 204]
+    resp = await _request("DELETE",
+        f"{SUPABASE_URL}/rest/v1/rooms?id=eq.{id}",
+        headers=get_headers()
+    )
+    return resp.status_code in [200, 204]
 
 # ============================================
 # SECTIONS
@@ -179,52 +291,45 @@ async def delete_room(id: int) -> bool:
 
 async def fetch_sections(semester_type: str = 'all') -> List[Dict]:
     """Fetch sections from Supabase, optionally filtered by semester type"""
-    async with httpx.AsyncClient() as client:
-        url = f"{SUPABASE_URL}/rest/v1/sections?select=*&order=department,semester,section"
-        if semester_type == 'odd':
-            url += "&semester=in.(1,3,5,7)"
-        elif semester_type == 'even':
-            url += "&semester=in.(2,4,6,8)"
+    query = "select=*&order=department,semester,section,id"
+    if semester_type == 'odd':
+        query += "&semester=in.(1,3,5,7)"
+    elif semester_type == 'even':
+        query += "&semester=in.(2,4,6,8)"
         
-        resp = await client.get(url, headers=get_headers())
-        if resp.status_code == 200:
-            return resp.json()
-        return []
+    return await _fetch_rows("sections", query)
 
 async def add_section(section_data: Dict) -> Dict:
     """Add a new section"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{SUPABASE_URL}/rest/v1/sections",
-            headers=get_headers(),
-            json=section_data
-        )
-        if resp.status_code in [200, 201]:
-            data = resp.json()
-            return data[0] if isinstance(data, list) else data
-        return None
+    resp = await _request("POST",
+        f"{SUPABASE_URL}/rest/v1/sections",
+        headers=get_headers(),
+        json=section_data
+    )
+    if resp.status_code in [200, 201]:
+        data = resp.json()
+        return data[0] if isinstance(data, list) else data
+    return None
 
 async def update_section(id: int, section_data: Dict) -> Dict:
     """Update a section"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.patch(
-            f"{SUPABASE_URL}/rest/v1/sections?id=eq.{id}",
-            headers=get_headers(),
-            json=section_data
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return data[0] if isinstance(data, list) and data else None
-        return None
+    resp = await _request("PATCH",
+        f"{SUPABASE_URL}/rest/v1/sections?id=eq.{id}",
+        headers=get_headers(),
+        json=section_data
+    )
+    if resp.status_code == 200:
+        data = resp.json()
+        return data[0] if isinstance(data, list) and data else None
+    return None
 
 async def delete_section(id: int) -> bool:
     """Delete a section"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.delete(
-            f"{SUPABASE_URL}/rest/v1/sections?id=eq.{id}",
-            headers=get_headers()
-        )
-        return resp.status_code in [200, 204]
+    resp = await _request("DELETE",
+        f"{SUPABASE_URL}/rest/v1/sections?id=eq.{id}",
+        headers=get_headers()
+    )
+    return resp.status_code in [200, 204]
 
 # ============================================
 # SUBJECTS
@@ -232,166 +337,383 @@ async def delete_section(id: int) -> bool:
 
 async def fetch_subjects(semester_type: str = 'all') -> List[Dict]:
     """Fetch subjects from Supabase, optionally filtered by semester type"""
-    async with httpx.AsyncClient() as client:
-        url = f"{SUPABASE_URL}/rest/v1/subjects?select=*&order=department_id,semester"
-        if semester_type == 'odd':
-            url += "&semester=in.(1,3,5,7)"
-        elif semester_type == 'even':
-            url += "&semester=in.(2,4,6,8)"
+    query = "select=*&order=department_id,semester,id"
+    if semester_type == 'odd':
+        query += "&semester=in.(1,3,5,7)"
+    elif semester_type == 'even':
+        query += "&semester=in.(2,4,6,8)"
         
-        resp = await client.get(url, headers=get_headers())
-        if resp.status_code == 200:
-            return resp.json()
-        return []
+    return await _fetch_rows("subjects", query)
 
 async def add_subject(subject_data: Dict) -> Dict:
     """Add a new subject"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{SUPABASE_URL}/rest/v1/subjects",
-            headers=get_headers(),
-            json=subject_data
-        )
-        if resp.status_code in [200, 201]:
-            data = resp.json()
-            return data[0] if isinstance(data, list) else data
-        return None
+    resp = await _request("POST",
+        f"{SUPABASE_URL}/rest/v1/subjects",
+        headers=get_headers(),
+        json=subject_data
+    )
+    if resp.status_code in [200, 201]:
+        data = resp.json()
+        return data[0] if isinstance(data, list) else data
+    return None
 
 async def update_subject(id: int, subject_data: Dict) -> Dict:
     """Update a subject"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.patch(
-            f"{SUPABASE_URL}/rest/v1/subjects?id=eq.{id}",
-            headers=get_headers(),
-            json=subject_data
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return data[0] if isinstance(data, list) and data else None
-        return None
+    resp = await _request("PATCH",
+        f"{SUPABASE_URL}/rest/v1/subjects?id=eq.{id}",
+        headers=get_headers(),
+        json=subject_data
+    )
+    if resp.status_code == 200:
+        data = resp.json()
+        return data[0] if isinstance(data, list) and data else None
+    return None
 
 async def delete_subject(id: int) -> bool:
     """Delete a subject"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.delete(
-            f"{SUPABASE_URL}/rest/v1/subjects?id=eq.{id}",
-            headers=get_headers()
-        )
-        return resp.status_code in [200, 204]
+    resp = await _request("DELETE",
+        f"{SUPABASE_URL}/rest/v1/subjects?id=eq.{id}",
+        headers=get_headers()
+    )
+    return resp.status_code in [200, 204]
 
 # ============================================
 # TIMETABLE SLOTS
 # ============================================
 
+# Bulk writes: batches are sized from the slot count, a few upload at once, and
+# failed batches are retried with backoff (split in half if too large).
+BULK_MIN_BATCH = 200
+BULK_MAX_BATCH = 1000
+BULK_PARALLELISM = int(os.getenv("SUPABASE_BULK_PARALLELISM", "4"))
+BULK_RETRIES = 3
+BULK_BACKOFF_S = 0.5
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# sync_timetable_slots rewrites everything once more than this share of slots changed
+DIFF_MAX_FRACTION = 0.5
+
+# Generations: a save writes its rows under a new generation_id and then flips
+# timetable_generations.generation_id for the semester type, so readers never
+# see a half-written timetable. Needs sql/timetable_generations.sql; without it
+# saves fall back to delete-then-insert.
+_generations_supported: Optional[bool] = None
+
+async def generations_supported() -> bool:
+    """Whether the timetable_generations table exists (checked once per process)"""
+    global _generations_supported
+    if _generations_supported is None:
+        resp = await _request("GET",
+            f"{SUPABASE_URL}/rest/v1/timetable_generations?select=semester_type&limit=1",
+            headers=get_headers()
+        )
+        if resp.status_code == 200:
+            _generations_supported = True
+        elif resp.status_code in [400, 404]:
+            # PostgREST answers an unknown table with 404 (or 400 on older versions)
+            _generations_supported = False
+            print("⚠️ timetable_generations missing - run sql/timetable_generations.sql for atomic saves")
+        else:
+            # Transient failure: do not remember an answer, let the caller retry
+            resp.raise_for_status()
+            raise httpx.HTTPStatusError(
+                f"Checking timetable_generations failed with HTTP {resp.status_code}",
+                request=resp.request, response=resp
+            )
+    return _generations_supported
+
+async def fetch_active_generations() -> Dict[str, str]:
+    """{semester_type: active generation_id} ({} without generation support)"""
+    if not await generations_supported():
+        return {}
+    resp = await _request("GET",
+        f"{SUPABASE_URL}/rest/v1/timetable_generations?select=semester_type,generation_id",
+        headers=get_headers()
+    )
+    resp.raise_for_status()
+    return {row['semester_type']: row['generation_id'] for row in resp.json()}
+
+def _bulk_batch_size(count: int) -> int:
+    """Roughly a few batches per parallel upload, within [BULK_MIN_BATCH, BULK_MAX_BATCH]"""
+    per_upload = -(-count // (BULK_PARALLELISM * 2)) if count else BULK_MIN_BATCH
+    return max(BULK_MIN_BATCH, min(BULK_MAX_BATCH, per_upload))
+
+async def _insert_batch(table: str, batch: List[Dict], on_conflict: Optional[str] = None) -> int:
+    """POST one batch with retries; a batch rejected as too large is split in half.
+    With on_conflict the batch is an upsert on those columns."""
+    url = f"{SUPABASE_URL}/rest/v1/{table}"
+    headers = {**get_headers(), "Prefer": "return=minimal"}
+    if on_conflict:
+        url += f"?on_conflict={on_conflict}"
+        headers["Prefer"] = "resolution=merge-duplicates,return=minimal"
+    for attempt in range(BULK_RETRIES + 1):
+        try:
+            resp = await _request("POST", url, headers=headers, json=batch, timeout=60.0)
+        except httpx.TransportError as e:
+            error = str(e) or type(e).__name__
+        else:
+            if resp.status_code in [200, 201, 204]:
+                return len(batch)
+            if resp.status_code == 413 and len(batch) > 1:
+                half = len(batch) // 2
+                return (await _insert_batch(table, batch[:half], on_conflict) +
+                        await _insert_batch(table, batch[half:], on_conflict))
+            if resp.status_code not in RETRYABLE_STATUS:
+                raise RuntimeError(f"{table} batch rejected ({resp.status_code}): {resp.text[:200]}")
+            error = f"HTTP {resp.status_code}"
+        if attempt < BULK_RETRIES:
+            delay = BULK_BACKOFF_S * (2 ** attempt) * (1 + random.random())
+            print(f"  ⚠️ {table} batch of {len(batch)} failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    raise RuntimeError(f"{table} batch of {len(batch)} failed after {BULK_RETRIES + 1} attempts: {error}")
+
+async def bulk_insert(table: str, rows: List[Dict], on_conflict: Optional[str] = None) -> int:
+    """Insert (or upsert on on_conflict) rows in adaptive batches, BULK_PARALLELISM
+    at a time. Raises if any batch fails."""
+    if not rows:
+        return 0
+    batch_size = _bulk_batch_size(len(rows))
+    slots = asyncio.Semaphore(BULK_PARALLELISM)
+    
+    async def upload(batch: List[Dict]) -> int:
+        async with slots:
+            return await _insert_batch(table, batch, on_conflict)
+    
+    counts = await asyncio.gather(*(upload(rows[i:i + batch_size]) for i in range(0, len(rows), batch_size)))
+    return sum(counts)
+
 async def save_timetable_slots(slots: List[Dict], semester_type: str) -> int:
-    """Save generated timetable slots to Supabase."""
+    """Save generated timetable slots to Supabase.
+    
+    With generation support the new rows become visible in one pointer flip,
+    and a failed save leaves the previous timetable untouched.
+    """
     print(f"💾 Saving {len(slots)} timetable slots to Supabase...")
+    start = time.perf_counter()
+    
+    # Add semester_type to each slot
+    for slot in slots:
+        slot['semester_type'] = semester_type
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        # Clear existing slots for this semester type
-        await client.delete(
+    if not await generations_supported():
+        # Legacy path: not atomic
+        await _request("DELETE",
             f"{SUPABASE_URL}/rest/v1/timetable_slots?semester_type=eq.{semester_type}",
-            headers=get_headers()
+            headers=get_headers(),
+            timeout=60.0
         )
-        
-        # Add semester_type to each slot
-        for slot in slots:
-            slot['semester_type'] = semester_type
-        
-        # Insert in batches of 100
-        inserted = 0
-        batch_size = 100
-        for i in range(0, len(slots), batch_size):
-            batch = slots[i:i+batch_size]
-            resp = await client.post(
-                f"{SUPABASE_URL}/rest/v1/timetable_slots",
+        inserted = await bulk_insert("timetable_slots", slots)
+        print(f"✅ Saved {inserted} timetable slots in {time.perf_counter() - start:.2f}s")
+        return inserted
+    
+    generation_id = uuid.uuid4().hex
+    for slot in slots:
+        slot['generation_id'] = generation_id
+    
+    try:
+        inserted = await bulk_insert("timetable_slots", slots)
+    except Exception:
+        # Readers still point at the previous generation - just drop the partial one
+        await _request("DELETE",
+            f"{SUPABASE_URL}/rest/v1/timetable_slots?generation_id=eq.{generation_id}",
+            headers=get_headers(),
+            timeout=60.0
+        )
+        raise
+    
+    # Flip the pointer
+    resp = await _request("POST",
+        f"{SUPABASE_URL}/rest/v1/timetable_generations?on_conflict=semester_type",
+        headers={**get_headers(), "Prefer": "resolution=merge-duplicates,return=minimal"},
+        json={'semester_type': semester_type, 'generation_id': generation_id, 'slot_count': inserted}
+    )
+    resp.raise_for_status()
+    
+    # Older generations (and legacy rows without one) are no longer visible
+    await _request("DELETE",
+        f"{SUPABASE_URL}/rest/v1/timetable_slots?semester_type=eq.{semester_type}"
+        f"&or=(generation_id.is.null,generation_id.neq.{generation_id})",
+        headers=get_headers(),
+        timeout=60.0
+    )
+    
+    print(f"✅ Saved {inserted} timetable slots in {time.perf_counter() - start:.2f}s (generation {generation_id[:8]})")
+    return inserted
+
+async def bulk_delete_ids(table: str, ids: List[int]) -> int:
+    """DELETE rows by primary key, in concurrent id=in.(...) chunks"""
+    slots = asyncio.Semaphore(BULK_PARALLELISM)
+    
+    async def delete_chunk(chunk: List[int]) -> int:
+        async with slots:
+            resp = await _request("DELETE",
+                f"{SUPABASE_URL}/rest/v1/{table}?id=in.({','.join(map(str, chunk))})",
                 headers=get_headers(),
-                json=batch
+                timeout=60.0
             )
-            if resp.status_code in [200, 201]:
-                inserted += len(batch)
-        
-        print(f"✅ Saved {inserted} timetable slots")
-        return inserted
+            resp.raise_for_status()
+            return len(chunk)
+    
+    chunk = BULK_MIN_BATCH  # ids go in the URL, keep it short
+    counts = await asyncio.gather(*(delete_chunk(ids[i:i + chunk]) for i in range(0, len(ids), chunk)))
+    return sum(counts)
+
+async def apply_slot_diff(diff: Dict[str, List]) -> Dict[str, int]:
+    """Write a services.slot_diff.diff_slots result: deletes, then updates and inserts"""
+    await bulk_delete_ids("timetable_slots", diff['delete'])
+    await asyncio.gather(
+        bulk_insert("timetable_slots", diff['update'], on_conflict="id"),
+        bulk_insert("timetable_slots", diff['insert'])
+    )
+    return diff_summary(diff)
+
+async def sync_timetable_slots(slots: List[Dict], semester_type: str) -> Dict[str, int]:
+    """Persist a generated timetable, writing only slots that changed.
+    
+    Small changes are applied in place to the visible rows. Large changes (or
+    a first save) go through save_timetable_slots, which swaps generations
+    atomically when supported.
+    """
+    start = time.perf_counter()
+    for slot in slots:
+        slot['semester_type'] = semester_type
+    persisted = await fetch_timetable_slots(semester_type)
+    
+    diff = diff_slots(persisted, slots, SLOT_KEY)
+    summary = diff_summary(diff)
+    changed = summary['inserted'] + summary['updated'] + summary['deleted']
+    if not persisted or changed > DIFF_MAX_FRACTION * max(len(persisted), len(slots)):
+        inserted = await save_timetable_slots(slots, semester_type)
+        return {'mode': 'full', 'inserted': inserted, 'updated': 0, 'deleted': len(persisted), 'unchanged': 0}
+    
+    generation_id = (await fetch_active_generations()).get(semester_type)
+    if generation_id:
+        for row in diff['insert'] + diff['update']:
+            row['generation_id'] = generation_id
+    await apply_slot_diff(diff)
+    print(f"✅ Synced timetable slots in {time.perf_counter() - start:.2f}s: "
+          f"+{summary['inserted']} ~{summary['updated']} -{summary['deleted']} ({summary['unchanged']} unchanged)")
+    return {'mode': 'diff', **summary}
+
+async def sync_section_slots(section_id: int, slots: List[Dict]) -> Dict[str, int]:
+    """Persist one section's slots (manual edit), writing only slots that changed"""
+    persisted = await fetch_timetable_slots(section_id=section_id)
+    diff = diff_slots(persisted, slots, SECTION_SLOT_KEY)
+    
+    # Edited rows join the active generation of their semester type so readers still see them
+    active = await fetch_active_generations()
+    if active:
+        for row in diff['insert'] + diff['update']:
+            row['generation_id'] = active.get(row.get('semester_type'))
+    return await apply_slot_diff(diff)
+
+async def _active_generation_filter() -> str:
+    """Query filter that hides rows of inactive (in-flight or superseded) generations.
+    
+    A semester type without an active pointer shows only its legacy rows
+    (no generation_id), never those of a first save still uploading.
+    """
+    if not await generations_supported():
+        return ""
+    active = await fetch_active_generations()
+    if not active:
+        return "&generation_id=is.null"
+    return (f"&or=(generation_id.in.({','.join(active.values())}),"
+            f"and(semester_type.not.in.({','.join(active)}),generation_id.is.null))")
+
+async def iter_timetable_slot_pages(semester_type: str = None, section_id: int = None,
+                                    department: str = None) -> AsyncIterator[List[Dict]]:
+    """Stream timetable slots page by page (all rows, however many)"""
+    # id makes the order unique so concurrent offset pages never overlap or skip
+    query = "select=*&order=section_id,day,slot,id"
+    
+    if semester_type:
+        query += f"&semester_type=eq.{semester_type}"
+    if section_id:
+        query += f"&section_id=eq.{section_id}"
+    if department:
+        query += f"&department=eq.{department}"
+    query += await _active_generation_filter()
+    
+    async for page in _iter_pages("timetable_slots", query):
+        yield page
 
 async def fetch_timetable_slots(semester_type: str = None, section_id: int = None, 
                                  department: str = None) -> List[Dict]:
     """Fetch timetable slots from Supabase"""
-    async with httpx.AsyncClient() as client:
-        url = f"{SUPABASE_URL}/rest/v1/timetable_slots?select=*&order=section_id,day,slot"
-        
-        if semester_type:
-            url += f"&semester_type=eq.{semester_type}"
-        if section_id:
-            url += f"&section_id=eq.{section_id}"
-        if department:
-            url += f"&department=eq.{department}"
-        
-        resp = await client.get(url, headers=get_headers())
-        if resp.status_code == 200:
-            return resp.json()
-        return []
+    slots = []
+    async for page in iter_timetable_slot_pages(semester_type, section_id, department):
+        slots.extend(page)
+    return slots
 
 async def clear_timetable_slots(semester_type: str = None) -> bool:
     """Clear timetable slots"""
-    async with httpx.AsyncClient() as client:
-        url = f"{SUPABASE_URL}/rest/v1/timetable_slots"
-        if semester_type:
-            url += f"?semester_type=eq.{semester_type}"
-        else:
-            url += "?id=gt.0"  # Delete all
+    url = f"{SUPABASE_URL}/rest/v1/timetable_slots"
+    if semester_type:
+        url += f"?semester_type=eq.{semester_type}"
+    else:
+        url += "?id=gt.0"  # Delete all
         
-        resp = await client.delete(url, headers=get_headers())
-        return resp.status_code in [200, 204]
+    resp = await _request("DELETE", url, headers=get_headers())
+    if resp.status_code in [200, 204] and await generations_supported():
+        url = f"{SUPABASE_URL}/rest/v1/timetable_generations"
+        url += f"?semester_type=eq.{semester_type}" if semester_type else "?semester_type=not.is.null"
+        await _request("DELETE", url, headers=get_headers())
+    return resp.status_code in [200, 204]
 
 async def update_timetable_slot(id: int, slot_data: Dict) -> Dict:
     """Update a single timetable slot"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.patch(
-            f"{SUPABASE_URL}/rest/v1/timetable_slots?id=eq.{id}",
-            headers=get_headers(),
-            json=slot_data
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return data[0] if isinstance(data, list) and data else None
-        return None
+    resp = await _request("PATCH",
+        f"{SUPABASE_URL}/rest/v1/timetable_slots?id=eq.{id}",
+        headers=get_headers(),
+        json=slot_data
+    )
+    if resp.status_code == 200:
+        data = resp.json()
+        return data[0] if isinstance(data, list) and data else None
+    return None
 
 # ============================================
 # UTILITY FUNCTIONS
 # ============================================
 
-async def fetch_all_data(semester_type: str = 'all') -> Dict:
-    """Fetch all data needed for timetable generation"""
-    departments = await fetch_departments()
-    faculty = await fetch_faculty()
-    rooms = await fetch_rooms()
-    sections = await fetch_sections(semester_type)
-    subjects = await fetch_subjects(semester_type)
+async def fetch_all_data(semester_type: str = 'all', timings: Optional[Dict] = None) -> Dict:
+    """Fetch all data needed for timetable generation
     
-    return {
-        'departments': departments,
-        'faculty': faculty,
-        'rooms': rooms,
-        'sections': sections,
-        'subjects': subjects
-    }
+    All five tables are read concurrently over the shared client. If `timings` is
+    given it is filled with {table: {'wall_s', 'rows'}}.
+    """
+    async def timed(table: str, fetch) -> Tuple[str, List[Dict]]:
+        start = time.perf_counter()
+        rows = await fetch
+        if timings is not None:
+            timings[table] = {'wall_s': round(time.perf_counter() - start, 4), 'rows': len(rows)}
+        return table, rows
+        
+    results = await asyncio.gather(
+        timed('departments', fetch_departments()),
+        timed('faculty', fetch_faculty()),
+        timed('rooms', fetch_rooms()),
+        timed('sections', fetch_sections(semester_type)),
+        timed('subjects', fetch_subjects(semester_type))
+    )
+    
+    return dict(results)
 
 async def get_stats() -> Dict:
     """Get database statistics"""
-    async with httpx.AsyncClient() as client:
-        stats = {}
-        tables = ['departments', 'faculty', 'rooms', 'sections', 'subjects', 'timetable_slots']
+    stats = {}
+    tables = ['departments', 'faculty', 'rooms', 'sections', 'subjects', 'timetable_slots']
         
-        for table in tables:
-            resp = await client.get(
-                f"{SUPABASE_URL}/rest/v1/{table}?select=count",
-                headers={**get_headers(), "Prefer": "count=exact"}
-            )
-            if resp.status_code == 200:
-                count = resp.headers.get("content-range", "*/0").split("/")[-1]
-                stats[table] = int(count) if count != "*" else 0
-            else:
-                stats[table] = 0
+    for table in tables:
+        resp = await _request("GET",
+            f"{SUPABASE_URL}/rest/v1/{table}?select=count",
+            headers={**get_headers(), "Prefer": "count=exact"}
+        )
+        if resp.status_code == 200:
+            count = resp.headers.get("content-range", "*/0").split("/")[-1]
+            stats[table] = int(count) if count != "*" else 0
+        else:
+            stats[table] = 0
         
-        return stats
+    return stats
@@ -0,0 +1,173 @@
+"""
+Streaming timetable export (NDJSON, CSV, Parquet).
+
+Rows are produced one at a time from the read model's per-section,
+per-faculty and per-room indexes and encoded in small chunks, so a
+full-institute export never holds the whole file in memory and the first
+bytes go out immediately. Parquet needs pyarrow and is written one row group
+at a time.
+"""
+
+import csv
+import io
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from services.read_model import TimetableReadModel
+from services.response_cache import encode_json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: Parquet export
+    pa = pq = None
+
+EXPORT_FORMATS = ['ndjson', 'csv', 'parquet']
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+EXPORT_COLUMNS = [
+    'section_id', 'department', 'semester', 'section', 'day', 'day_name', 'slot', 'time',
+    'subject_code', 'subject_name', 'subject_type', 'faculty_id', 'faculty_name', 'room', 'is_lab'
+]
+CHUNK_ROWS = 500          # rows per NDJSON/CSV chunk
+PARQUET_ROW_GROUP = 5000  # rows per Parquet row group
+
+
+def iter_export_rows(model: TimetableReadModel, section_ids: Iterable,
+                     section_lookup: Callable[[str], Optional[Dict]],
+                     department: Optional[str] = None, semester: Optional[int] = None,
+                     faculty_id: Optional[str] = None, room: Optional[str] = None) -> Iterator[Dict]:
+    """Flat slot rows, sorted by section then (day, slot), matching every given filter"""
+    if faculty_id is not None or room is not None:
+        # Walk the narrower index; its slots are sorted by (day, slot) across sections
+        slot_refs = model.faculty_slots(faculty_id) if faculty_id is not None else model.room_slots(room)
+        if faculty_id is not None and room is not None:
+            slot_refs = [s for s in slot_refs if s['entry'].get('room') == room]
+        wanted = {str(sid) for sid in section_ids}
+        by_section = {}
+        for slot_ref in slot_refs:
+            if slot_ref['section_id'] in wanted:
+                by_section.setdefault(slot_ref['section_id'], []).append(slot_ref)
+        groups = ((str(sid), by_section.get(str(sid), [])) for sid in section_ids)
+    else:
+        groups = ((str(sid), model.section_slots(sid)) for sid in section_ids)
+
+    for section_id, slot_refs in groups:
+        if not slot_refs:
+            continue
+        sec = section_lookup(section_id) or {}
+        if department is not None and sec.get('department') != department:
+            continue
+        if semester is not None and sec.get('semester') != semester:
+            continue
+        for slot_ref in slot_refs:
+            val = slot_ref['entry']
+            subject = val.get('subject') or {}
+            faculty = val.get('faculty') or {}
+            yield {
+                'section_id': sec.get('id', int(section_id) if section_id.isdigit() else None),
+                'department': sec.get('department'),
+                'semester': sec.get('semester'),
+                'section': sec.get('section'),
+                'day': slot_ref['day'],
+                'day_name': slot_ref['day_name'],
+                'slot': slot_ref['slot'],
+                'time': model.time_slots.get(slot_ref['slot'], ''),
+                'subject_code': subject.get('course_code', ''),
+                'subject_name': subject.get('name', ''),
+                'subject_type': subject.get('subject_type', ''),
+                'faculty_id': str(faculty.get('id', '')),
+                'faculty_name': faculty.get('name', ''),
+                'room': str(val.get('room', '')),
+                'is_lab': bool(val.get('is_lab', False))
+            }
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_chunks(rows: Iterable[Dict]) -> Iterator[bytes]:
+    for batch in _batches(rows, CHUNK_ROWS):
+        yield b''.join(encode_json(row) + b'\n' for row in batch)
+
+
+def csv_chunks(rows: Iterable, header: List[str]) -> Iterator[bytes]:
+    """CSV with a header line; rows are dicts keyed by header or plain sequences"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for batch in _batches(rows, CHUNK_ROWS):
+        for row in batch:
+            writer.writerow([row.get(c) for c in header] if isinstance(row, dict) else row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_chunks(rows: Iterable[Dict]) -> Iterator[bytes]:
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow")
+    schema = pa.schema([
+        ('section_id', pa.int64()), ('department', pa.string()), ('semester', pa.int64()),
+        ('section', pa.string()), ('day', pa.int64()), ('day_name', pa.string()),
+        ('slot', pa.int64()), ('time', pa.string()), ('subject_code', pa.string()),
+        ('subject_name', pa.string()), ('subject_type', pa.string()), ('faculty_id', pa.string()),
+        ('faculty_name', pa.string()), ('room', pa.string()), ('is_lab', pa.bool_())
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in _batches(rows, PARQUET_ROW_GROUP):
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_chunks(fmt: str, rows: Iterable[Dict]) -> Iterator[bytes]:
+    if fmt == 'ndjson':
+        return ndjson_chunks(rows)
+    if fmt == 'csv':
+        return csv_chunks(rows, EXPORT_COLUMNS)
+    if fmt == 'parquet':
+        return parquet_chunks(rows)
+    raise ValueError(f"Export format must be one of {EXPORT_FORMATS}, got {fmt}")
@@ -0,0 +1,177 @@
+"""
+Immutable, versioned timetable snapshots.
+
+The API serves one published TimetableSnapshot: the result dict, the
+sections and rooms it covers and its read model. A snapshot is never
+modified after it is published. Readers take `store.current` once per
+request, without a lock, and use that object throughout, so a generate or an
+edit can never show them a half-applied state.
+
+Writers hold `store.write_lock` (so a generate and an edit cannot
+interleave), build the next version and publish it with a single reference
+assignment. A manual edit derives the next version from the current one with
+with_section(): entry dicts, read-model lists and counters of the other
+sections are shared, not copied. Encoding and writing a version to the
+shared file, and decoding another worker's, run in a worker thread so the
+event loop keeps serving readers meanwhile.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.read_model import TimetableReadModel
+from services.section_registry import section_registry
+from services.shared_timetable import VersionConflict
+
+PUBLISH_RETRIES = 3
+
+
+class TimetableSnapshot:
+    """One published timetable version; treat every field as read-only"""
+
+    __slots__ = ('version', 'result', 'schedule', 'semester_type', 'sections', 'rooms',
+                 'read_model', 'published_at')
+
+    def __init__(self, version: int, result: Dict, sections: List[Dict], rooms: List[Dict],
+                 read_model: TimetableReadModel):
+        self.version = version
+        self.result = result
+        self.schedule = result['schedule']
+        self.semester_type = result.get('semester_type')
+        self.sections = sections
+        self.rooms = rooms
+        self.read_model = read_model
+        self.published_at = time.time()
+
+    def with_section(self, version: int, section_id, entries: Dict[str, Dict]) -> 'TimetableSnapshot':
+        """The next version, with section_id's slots replaced by entries ("sid_Day_slot" keys)"""
+        schedule = dict(self.schedule)
+        for slot_ref in self.read_model.section_slots(section_id):
+            del schedule[slot_ref['key']]
+        schedule.update(entries)
+        return TimetableSnapshot(
+            version, {**self.result, 'schedule': schedule}, self.sections, self.rooms,
+            self.read_model.with_section(section_id, entries, schedule)
+        )
+
+
+class SnapshotStore:
+    """Holds the published snapshot; writers serialize on write_lock.
+
+    With a shared file attached (services/shared_timetable.py), versions are
+    allocated by the file and every publish is written to it. Versions other
+    worker processes publish are picked up by reload() in the background
+    (request path) or by sync() right away (writers, which need the latest
+    version as their base).
+    """
+
+    def __init__(self, days: List[str], time_slots: Dict[int, str]):
+        self.days = days
+        self.time_slots = time_slots
+        self.current: Optional[TimetableSnapshot] = None
+        self.version = 0
+        self.write_lock = asyncio.Lock()
+        self.shared = None
+        self.shared_version = 0  # newest version seen in the shared file
+        self.reload_task: Optional[asyncio.Task] = None
+
+    def attach(self, shared):
+        """Share publishes with the other workers through a SharedTimetableFile"""
+        self.shared = shared
+        self.sync()
+
+    def stale(self) -> bool:
+        """True when another worker has published a newer version (no decoding)"""
+        if self.shared is None:
+            return False
+        if self.shared.changed():
+            self.shared_version = self.shared.latest_version()
+        return self.shared_version > self.version
+
+    def _load_shared(self) -> Optional[Tuple[int, Optional[TimetableSnapshot]]]:
+        """Decode the shared file's newest version into a snapshot (safe off the event loop)"""
+        latest = self.shared.load()
+        if latest is None:
+            return None
+        version, payload = latest
+        if payload is None:
+            return version, None
+        model = TimetableReadModel(payload['result']['schedule'], self.days, self.time_slots)
+        return version, TimetableSnapshot(version, payload['result'], payload['sections'], payload['rooms'], model)
+
+    def _adopt(self, loaded: Optional[Tuple[int, Optional[TimetableSnapshot]]]) -> bool:
+        if loaded is None or loaded[0] <= self.version:
+            return False  # nothing stored, or this worker published a newer one meanwhile
+        version, snapshot = loaded
+        if snapshot is not None:
+            section_registry.register(snapshot.sections)
+        self.version = version
+        self.publish(snapshot)
+        return True
+
+    def sync(self) -> bool:
+        """Load the shared file's newest version now if another worker published it"""
+        return self.stale() and self._adopt(self._load_shared())
+
+    async def reload(self):
+        """Load newer shared versions in a worker thread; readers keep the current snapshot"""
+        while self.stale():
+            loaded = await asyncio.to_thread(self._load_shared)
+            if loaded is None:
+                return
+            self._adopt(loaded)
+
+    def reload_soon(self):
+        """Start reload() in the background unless one is already running"""
+        if self.reload_task is None or self.reload_task.done():
+            self.reload_task = asyncio.get_running_loop().create_task(self.reload())
+
+    async def _next_version(self, snapshot: Optional[TimetableSnapshot], base_version: Optional[int] = None) -> int:
+        if self.shared is None:
+            self.version += 1
+            return self.version
+        payload = None if snapshot is None else {
+            'result': snapshot.result, 'sections': snapshot.sections, 'rooms': snapshot.rooms
+        }
+        return await asyncio.to_thread(self.shared.publish, payload, base_version)
+
+    def publish(self, snapshot: Optional[TimetableSnapshot]) -> Optional[TimetableSnapshot]:
+        self.current = snapshot  # one reference assignment: readers see old or new, never a mix
+        return snapshot
+
+    def _install(self, version: int, snapshot: Optional[TimetableSnapshot]) -> Optional[TimetableSnapshot]:
+        """Publish our new version unless a newer one was loaded while it was written"""
+        if version >= self.version:
+            self.version = version
+            self.publish(snapshot)
+        return snapshot
+
+    async def publish_result(self, result: Dict, sections: List[Dict], rooms: List[Dict]) -> TimetableSnapshot:
+        """Publish a whole new timetable (generate, restore)"""
+        model = await asyncio.to_thread(TimetableReadModel, result['schedule'], self.days, self.time_slots)
+        snapshot = TimetableSnapshot(0, result, sections, rooms, model)
+        snapshot.version = await self._next_version(snapshot)
+        return self._install(snapshot.version, snapshot)
+
+    async def publish_section(self, section_id, entries: Dict[str, Dict]) -> Optional[TimetableSnapshot]:
+        """Publish the current timetable with one section's slots replaced (manual edit).
+
+        Returns None when there is no timetable to edit. An edit based on a
+        version another worker has since replaced is redone on the new one.
+        """
+        for _ in range(PUBLISH_RETRIES):
+            await self.reload()
+            base = self.current
+            if base is None:
+                return None
+            snapshot = base.with_section(base.version + 1, section_id, entries)
+            try:
+                version = await self._next_version(snapshot, base_version=base.version)
+            except VersionConflict:
+                continue
+            return self._install(version, snapshot)
+        raise VersionConflict(f"Could not publish an edit of section {section_id} after {PUBLISH_RETRIES} attempts")
+
+    async def clear(self):
+        self._install(await self._next_version(None), None)
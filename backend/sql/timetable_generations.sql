@@ -0,0 +1,24 @@
+-- Atomic timetable saves (services/supabase_service.py: save_timetable_slots)
+--
+-- A save inserts its rows under a fresh generation_id, then points
+-- timetable_generations at it and deletes the older rows. Readers only see the
+-- active generation of each semester type, so a half-written save is never visible.
+--
+-- Run once in the Supabase SQL editor. Until then saves use delete-then-insert.
+
+alter table timetable_slots add column if not exists generation_id text;
+
+create index if not exists timetable_slots_generation_idx
+    on timetable_slots (generation_id, section_id, day, slot);
+
+create table if not exists timetable_generations (
+    semester_type text primary key,
+    generation_id text not null,
+    slot_count integer not null default 0,
+    activated_at timestamptz not null default now()
+);
+
+-- Same access as timetable_slots (anon key)
+alter table timetable_generations enable row level security;
+create policy "timetable_generations_all" on timetable_generations
+    for all using (true) with check (true);
@@ -0,0 +1,63 @@
+from services.faculty_assignment import MinCostFlow, preassign_faculty
+
+
+def small_network():
+    #   0 -> 1 (cap 2, cost 1)   1 -> 2 (cap 1, cost 1)   1 -> 3 (cap 1, cost 3)
+    #   0 -> 2 (cap 1, cost 2)   2 -> 3 (cap 2, cost 1)
+    mcf = MinCostFlow(4)
+    refs = {
+        (0, 1): mcf.add_edge(0, 1, 2, 1),
+        (0, 2): mcf.add_edge(0, 2, 1, 2),
+        (1, 2): mcf.add_edge(1, 2, 1, 1),
+        (1, 3): mcf.add_edge(1, 3, 1, 3),
+        (2, 3): mcf.add_edge(2, 3, 2, 1),
+    }
+    return mcf, refs
+
+
+def test_min_cost_max_flow():
+    mcf, refs = small_network()
+    assert mcf.flow(0, 3, 10) == (3, 10)
+    assert {edge: mcf.edge_flow(ref) for edge, ref in refs.items()} == {
+        (0, 1): 2, (0, 2): 1, (1, 2): 1, (1, 3): 1, (2, 3): 2
+    }
+
+
+def test_flow_stops_at_max_flow_along_cheapest_paths():
+    mcf, refs = small_network()
+    assert mcf.flow(0, 3, 2) == (2, 6)
+    assert mcf.edge_flow(refs[(1, 3)]) == 0
+
+
+def test_no_path_means_no_flow():
+    mcf = MinCostFlow(3)
+    mcf.add_edge(0, 1, 5, 1)
+    assert mcf.flow(0, 2, 5) == (0, 0)
+
+
+def faculty(fid, department='CSE', max_hours=18):
+    return {'id': fid, 'name': fid, 'department': department, 'max_hours': max_hours}
+
+
+def pair(section_id, code='CS301', hours=4):
+    return {'section_id': section_id, 'course_code': code, 'department': 'CSE', 'semester': 3, 'hours': hours}
+
+
+def test_each_faculty_teaches_a_subject_to_one_section():
+    staff = [faculty('F1'), faculty('F2')]
+    assignment = preassign_faculty([pair(1), pair(2)], staff, {'CS301': staff})
+    assert set(assignment) == {(1, 'CS301'), (2, 'CS301')}
+    assert {f['id'] for f in assignment.values()} == {'F1', 'F2'}
+
+
+def test_listed_same_department_faculty_are_preferred():
+    same, other = faculty('F1'), faculty('F2', department='ECE')
+    assignment = preassign_faculty([pair(1)], [other, same], {'CS301': [other, same]})
+    assert assignment[(1, 'CS301')]['id'] == 'F1'
+
+
+def test_pairs_beyond_max_hours_are_left_unassigned():
+    staff = [faculty('F1', max_hours=4)]
+    assignment = preassign_faculty([pair(1, 'CS301'), pair(1, 'CS302')], staff,
+                                   {'CS301': staff, 'CS302': staff})
+    assert len(assignment) == 1
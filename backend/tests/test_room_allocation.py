@@ -0,0 +1,52 @@
+from services.room_allocation import FORBIDDEN_COST, VIRTUAL_COST, SyncRoomAllocator, solve_assignment
+
+
+def room(rid, capacity=60, department='CSE', room_type='Classroom'):
+    return {'id': rid, 'capacity': capacity, 'department': department, 'room_type': room_type}
+
+
+def section(sid, dedicated=None, students=60, semester=3, name='A'):
+    return {'id': sid, 'department': 'CSE', 'section': name, 'dedicated_room': dedicated,
+            'student_count': students, 'semester': semester}
+
+
+def always_free(room_id, day, slot):
+    return True
+
+
+def test_solve_assignment_finds_the_minimum():
+    cost = [[4, 1, 3], [2, 0, 5], [3, 2, 2]]
+    assignment = solve_assignment(cost)
+    assert sorted(assignment) == [0, 1, 2]
+    assert sum(cost[i][j] for i, j in enumerate(assignment)) == 5
+
+
+def test_sections_get_distinct_rooms_and_their_dedicated_one():
+    rooms = [room('R1'), room('R2'), room('R3')]
+    sections = [section(1, 'R2', name='A'), section(2, 'R1', name='B')]
+    assert SyncRoomAllocator(rooms).allocate(sections, 'Monday', [1], always_free) == {1: 'R2', 2: 'R1'}
+
+
+def test_rooms_too_small_are_never_borrowed():
+    allocator = SyncRoomAllocator([room('SMALL', capacity=30)])
+    assert allocator.room_cost(section(1, students=60), 'SMALL') == FORBIDDEN_COST
+    assert allocator.allocate([section(1, students=60)], 'Monday', [1], always_free) == {1: 'Virtual_CSE_A'}
+
+
+def test_undersized_dedicated_room_beats_a_virtual_room():
+    allocator = SyncRoomAllocator([room('HOME', capacity=40), room('BIG', capacity=80)])
+    home = section(1, 'HOME', students=60, name='A')
+    assert allocator.room_cost(home, 'BIG') < allocator.room_cost(home, 'HOME') < VIRTUAL_COST
+    # BIG free: the section fits there; BIG taken by another section: it stays home
+    assert allocator.allocate([home], 'Monday', [1], always_free) == {1: 'BIG'}
+    other = section(2, 'BIG', students=60, name='B')
+    assert allocator.allocate([home, other], 'Monday', [1], always_free) == {1: 'HOME', 2: 'BIG'}
+
+
+def test_busy_rooms_and_placement_rooms_for_juniors_are_skipped():
+    rooms = [room('BUSY'), room('PLC', room_type='Placement')]
+    busy = lambda room_id, day, slot: room_id != 'BUSY' or slot != 2
+    result = SyncRoomAllocator(rooms).allocate([section(1, semester=3)], 'Monday', [1, 2], busy)
+    assert result == {1: 'Virtual_CSE_A'}
+    result = SyncRoomAllocator(rooms).allocate([section(1, semester=5)], 'Monday', [1, 2], busy)
+    assert result == {1: 'PLC'}
@@ -0,0 +1,50 @@
+from services.slot_diff import SECTION_SLOT_KEY, diff_slots, diff_summary
+
+
+def slot(section_id=1, day='Monday', slot_num=1, **fields):
+    row = {'semester_type': 'odd', 'section_id': section_id, 'day': day, 'slot': slot_num,
+           'subject_code': 'CS301', 'faculty_id': 'F1', 'room_id': 'R1'}
+    row.update(fields)
+    return row
+
+
+def test_unchanged_rows_are_not_written():
+    persisted = [slot(id=10)]
+    diff = diff_slots(persisted, [slot()])
+    assert diff_summary(diff) == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 1}
+
+
+def test_ignored_fields_do_not_count_as_a_change():
+    persisted = [slot(id=10, generation_id='old', created_at='2024-01-01', updated_at='2024-01-02')]
+    diff = diff_slots(persisted, [slot(id=99, generation_id='new')])
+    assert diff['update'] == [] and diff['unchanged'] == 1
+
+
+def test_changed_row_is_updated_under_the_persisted_id():
+    diff = diff_slots([slot(id=10)], [slot(faculty_id='F2')])
+    assert diff['update'] == [slot(faculty_id='F2', id=10)]
+    assert diff['insert'] == [] and diff['delete'] == []
+
+
+def test_new_keys_are_inserted_and_missing_keys_deleted():
+    diff = diff_slots([slot(slot_num=1, id=10)], [slot(slot_num=2)])
+    assert diff['insert'] == [slot(slot_num=2)]
+    assert diff['delete'] == [10]
+
+
+def test_duplicate_persisted_keys_keep_the_first_and_delete_the_rest():
+    persisted = [slot(id=10), slot(id=11), slot(id=12, faculty_id='F2')]
+    diff = diff_slots(persisted, [slot()])
+    assert sorted(diff['delete']) == [11, 12]
+    assert diff['unchanged'] == 1 and diff['update'] == []
+
+
+def test_duplicate_of_a_removed_key_is_deleted_too():
+    diff = diff_slots([slot(id=10), slot(id=11)], [])
+    assert sorted(diff['delete']) == [10, 11]
+
+
+def test_section_key_ignores_semester_type():
+    diff = diff_slots([slot(id=10, semester_type='even')], [slot(semester_type='odd')],
+                      key_fields=SECTION_SLOT_KEY)
+    assert diff['update'] == [slot(semester_type='odd', id=10)]
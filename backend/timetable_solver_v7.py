@@ -25,9 +25,18 @@ import pandas as pd
 from collections import defaultdict
 from typing import Dict, List, Optional, Tuple
 import os
+import sys
 import random
+import traceback
 import asyncio
-from services.supabase_service import fetch_all_data
+from services.data_sources import get_default_data_source
+from services.section_registry import section_registry
+from services.faculty_index import faculty_subject_index
+from services.room_allocation import SyncRoomAllocator
+from services.occupancy import OccupancyTensor
+from services.faculty_assignment import preassign_faculty
+from services.records import Assignment, tba_faculty, course_code_of, intern_fields
+from services.instrumentation import RunInstrumentation
 
 # Get paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -36,6 +45,7 @@ DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data')
 # Time structure - SATURDAY IS OPTIONAL (only used if weekdays are full)
 DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
 WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']  # Preferred days
+DAY_INDEX = {day: i for i, day in enumerate(DAYS)}  # bit position of each day in day masks
 
 # Slot Definitions - Morning slots preferred for teachers
 TIME_SLOTS = {
@@ -53,13 +63,22 @@ SLOT_PRIORITY = {1: 1, 2: 1, 3: 2, 4: 2, 5: 3, 6: 4}
 SATURDAY_SLOTS = [1, 2, 3, 4]
 WEEKDAY_SLOTS = [1, 2, 3, 4, 5, 6]
 
+# Weekly slot bitmasks: bit (DAY_INDEX[day] * SLOTS_PER_DAY + slot - 1)
+SLOTS_PER_DAY = 6
+DAY_SLOT_MASK = (1 << SLOTS_PER_DAY) - 1
+WEEKDAY_BITS = sum(DAY_SLOT_MASK << (i * SLOTS_PER_DAY) for i in range(len(WEEKDAYS)))
+WEEK_SLOT_MASK = WEEKDAY_BITS | (sum(1 << (s - 1) for s in SATURDAY_SLOTS) << (DAY_INDEX['Saturday'] * SLOTS_PER_DAY))
+
 # Removed global CSV loading for Supabase migration
 DEPARTMENTS = ['CSE', 'ECE', 'ME', 'EEE', 'ISE', 'AIML', 'CYS', 'CDS'] # Default list
 DEPT_ID_MAP = {} # Will be populated from Supabase
 
 class TimetableSolverV7:
-    def __init__(self, semester_type: str = 'odd'):
+    def __init__(self, semester_type: str = 'odd', data_source=None):
         self.semester_type = semester_type
+        # Where load_data reads from (services/data_sources.py): Supabase,
+        # a local snapshot or an in-memory fixture
+        self.data_source = data_source or get_default_data_source()
         if semester_type == 'all':
             self.valid_semesters = [1, 2, 3, 4, 5, 6, 7, 8]
         elif semester_type == 'odd':
@@ -71,8 +90,8 @@ class TimetableSolverV7:
         self.subjects = []
         self.rooms = []
         self.faculty = []  # NEW: Faculty list
-        self.faculty_subject_map = {}  # NEW: subject_code -> [faculty_ids]
-        self.schedule = {}  # (section_id, day, slot) -> assignment
+        self.faculty_subject_map = {}  # NEW: subject_code -> [faculty entries]
+        self.schedule = {}  # (section_id, day, slot) -> Assignment (or dict from manual edits)
         
         # Tracking for constraints
         self.faculty_schedule = defaultdict(list) # faculty_id -> [(day, slot), ...]
@@ -111,15 +130,53 @@ class TimetableSolverV7:
         # (section_id, subject_code) -> faculty_id
         self.section_subject_faculty_lock = {}
         
+        # Room assignment for synchronized blocks (built once rooms are loaded)
+        self.room_allocator = None
+        
+        # NumPy mirror of schedule/room_schedule: (section|room) x day x slot
+        self.occupancy = None
+        
+        # Faculty bound before slot placement (min-cost flow)
+        # (section_id, subject_code) -> faculty_id
+        self.preassigned_faculty = {}
+        # faculty_id -> pre-assigned hours not yet placed (counts towards max_hours)
+        self.faculty_pending_hours = defaultdict(int)
+        # (section_id, subject_code) -> hours of that pair not yet placed; a pair
+        # leaves this dict (and frees its teacher's pending hours) once released
+        self.pair_pending_hours = {}
+        
+        # Soft-constraint counters, maintained by assign_slot/remove_slot
+        # (section_id, subject_code, slot) -> bitmask of DAY_INDEX days holding it
+        self.section_subject_day_mask = defaultdict(int)
+        # (section_id, subject_id, day) -> hours of that subject on that day
+        self.section_subject_day_hours = defaultdict(int)
+        # (section_id, day) -> lab hours on that day
+        self.section_lab_day_hours = defaultdict(int)
+        # section_id -> PLC lab hours
+        self.section_plc_lab_hours = defaultdict(int)
+        
+        # section_id -> weekly bitmask of FREE slots (see WEEK_SLOT_MASK)
+        self.section_free_mask = defaultdict(lambda: WEEK_SLOT_MASK)
+        # section_id -> scheduled hours (all days / Mon-Fri)
+        self.section_hours = defaultdict(int)
+        self.section_weekday_hours = defaultdict(int)
+        
+        # Phase timers and constraint-check counters (returned as result['run_report'])
+        self.report = RunInstrumentation()
+        
     async def load_data(self):
-        """Load data from Supabase database"""
-        print("📥 Loading data from Supabase...")
+        """Load data from the configured data source (Supabase by default)"""
+        print(f"📥 Loading data from {type(self.data_source).__name__}...")
         
-        # Fetch all data from Supabase
+        # Fetch all data from the data source
         try:
             print("  > Calling fetch_all_data...")
-            data = await fetch_all_data(self.semester_type)
+            data = await self.data_source.fetch_all_data(self.semester_type)
             print(f"  > Fetched data keys: {data.keys()}")
+            self.report.attach('data_load', {
+                'source': type(self.data_source).__name__,
+                'tables': getattr(self.data_source, 'timings', None) or {}
+            })
             
             # Debug Departments
             print(f"  > Departments count: {len(data.get('departments', []))}")
@@ -139,13 +196,14 @@ class TimetableSolverV7:
         # 1. Load Rooms
         self.rooms = []
         for room in data.get('rooms', []):
-            self.rooms.append({
+            self.rooms.append(intern_fields({
                 'id': room['room_id'],
                 'department': room['department'],
                 'room_type': room['room_type'],
                 'capacity': room['capacity'],
                 'labs': []
-            })
+            }, 'id', 'department', 'room_type'))
+        self.room_allocator = SyncRoomAllocator(self.rooms)
         
         # 2. Load Sections (already filtered by semester_type in supabase_service)
         self.sections = []
@@ -161,7 +219,7 @@ class TimetableSolverV7:
             academic_year = (sem + 1) // 2
 
             # Include ALL sections from database (some depts like CSE have D, E sections)
-            self.sections.append({
+            self.sections.append(intern_fields({
                 'id': row['id'],  # USE DB ID - critical for correct section_id references
                 'department': dept,
                 'academic_year': academic_year,
@@ -169,7 +227,9 @@ class TimetableSolverV7:
                 'section': row['section'],
                 'dedicated_room': row.get('dedicated_room'), 
                 'student_count': row.get('student_count', 60)
-            })
+            }, 'department', 'dedicated_room'))
+        # Endpoints join slots to these same dicts by id
+        section_registry.register(self.sections)
 
         # 3. Process Subjects (already filtered by semester_type in supabase_service)
         self.subjects = []
@@ -230,9 +290,9 @@ class TimetableSolverV7:
             base_subj = {
                 'id': random.randint(10000, 99999),
                 'name': row['subject_name'],
-                'department': dept_code,
+                'department': sys.intern(dept_code),
                 'semester': sem,
-                'course_code': row['subject_code'],
+                'course_code': sys.intern(row['subject_code']),
                 'is_institutional_elective': is_iec,
                 'is_basket': is_basket,
                 'is_pec': is_pec,
@@ -305,22 +365,19 @@ class TimetableSolverV7:
         
         # 4. Load Faculty
         self.faculty = []
-        self.faculty_subject_map = defaultdict(list)
+        faculty_subject_index.clear()
         for row in data.get('faculty', []):
-            faculty_entry = {
+            faculty_entry = intern_fields({
                 'id': row['faculty_id'],
                 'name': row['faculty_name'],
                 'department': row['department'],
                 'max_hours': int(row.get('max_hours_per_week', 18))
-            }
+            }, 'id', 'department')
             self.faculty.append(faculty_entry)
             
-            # Map subject codes to faculty
-            subject_codes = str(row.get('subject_codes', '')).split(',')
-            for code in subject_codes:
-                code = code.strip()
-                if code:
-                    self.faculty_subject_map[code].append(faculty_entry)
+            # Map subject codes to faculty (shared with the API)
+            faculty_subject_index.add(faculty_entry, str(row.get('subject_codes', '')))
+        self.faculty_subject_map = faculty_subject_index.exact
         
         # Assign faculty to subjects
         for subj in self.subjects:
@@ -330,12 +387,14 @@ class TimetableSolverV7:
                 subj['faculty'] = self.faculty_subject_map[course_code][0]
             else:
                 subj['faculty_options'] = []
-                subj['faculty'] = {
-                    'id': f"TBA_{subj.get('department', 'DEPT')}",
-                    'name': 'TBA',
-                    'department': subj.get('department', 'DEPT'),
-                    'max_hours': 99
-                }
+                subj['faculty'] = tba_faculty(subj.get('department', 'DEPT'))
+        
+        self.occupancy = OccupancyTensor(
+            [sec['id'] for sec in self.sections],
+            [r['id'] for r in self.rooms],
+            DAYS,
+            {day: self.get_slots_for_day(day) for day in DAYS}
+        )
         
         print(f"✅ Loaded {len(self.sections)} sections, {len(self.rooms)} rooms, {len(self.subjects)} subjects, {len(self.faculty)} faculty")
 
@@ -363,42 +422,25 @@ class TimetableSolverV7:
         return (sem + 1) // 2  # Sem 1,2 -> Year 1, Sem 3,4 -> Year 2, etc.
 
     def is_room_free(self, room_id: str, day: str, slot: int) -> bool:
-        if room_id.startswith("Virtual_"): return True # Virtual rooms have infinite capacity
-        return (day, slot) not in self.room_schedule[room_id]
+        if room_id.startswith("Virtual_"): return self.report.check('is_room_free', True) # Virtual rooms have infinite capacity
+        return self.report.check('is_room_free', (day, slot) not in self.room_schedule[room_id])
 
     def is_faculty_free(self, faculty_id: str, day: str, slot: int) -> bool:
         """Check if a faculty member is free at a given time"""
-        if faculty_id.startswith("TBA_"): return True  # TBA faculty is always available
-        return (day, slot) not in self.faculty_schedule[faculty_id]
+        if faculty_id.startswith("TBA_"): return self.report.check('is_faculty_free', True)  # TBA faculty is always available
+        return self.report.check('is_faculty_free', (day, slot) not in self.faculty_schedule[faculty_id])
 
     def would_create_pattern_violation(self, section_id: int, subject_code: str, day: str, slot: int) -> bool:
         """SOFT CONSTRAINT: Check if scheduling this would create same subject at same slot on 3+ consecutive days.
         
         This prevents patterns like "Logic Design at slot 1 on Mon, Tue, Wed"
         """
-        day_order = {'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3, 'Friday': 4, 'Saturday': 5}
-        current_day_idx = day_order.get(day, 5)
-        
-        # Get existing slots for this subject in this section
-        existing_slots = self.section_subject_slots[section_id].get(subject_code, [])
-        
-        # Find slots at the same time (same slot number)
-        same_slot_days = [d for (d, s) in existing_slots if s == slot]
+        # Days already holding this subject at this slot, plus the candidate day
+        mask = self.section_subject_day_mask.get((section_id, subject_code, slot), 0)
+        mask |= 1 << DAY_INDEX.get(day, 5)
         
-        if len(same_slot_days) < 2:
-            return False  # Need at least 2 existing to form a pattern with this one
-        
-        # Check if adding this day would create 3 consecutive days
-        same_slot_day_indices = [day_order.get(d, 5) for d in same_slot_days] + [current_day_idx]
-        same_slot_day_indices.sort()
-        
-        # Check for 3 consecutive
-        for i in range(len(same_slot_day_indices) - 2):
-            if (same_slot_day_indices[i+1] == same_slot_day_indices[i] + 1 and 
-                same_slot_day_indices[i+2] == same_slot_day_indices[i+1] + 1):
-                return True
-        
-        return False
+        # Three consecutive set bits = three consecutive days
+        return bool(mask & (mask >> 1) & (mask >> 2))
     
     def would_exceed_consecutive_limit(self, faculty_id: str, day: str, slot: int, is_lab: bool = False) -> bool:
         """HARD CONSTRAINT: Check if faculty would have 2+ consecutive theory blocks more than once per week.
@@ -406,6 +448,10 @@ class TimetableSolverV7:
         Each teacher can have at most ONE consecutive 2-class session per week (except labs).
         Labs are exempt from this constraint.
         """
+        return self.report.check('would_exceed_consecutive_limit',
+                                 self._would_exceed_consecutive_limit(faculty_id, day, slot, is_lab))
+    
+    def _would_exceed_consecutive_limit(self, faculty_id: str, day: str, slot: int, is_lab: bool) -> bool:
         if is_lab or faculty_id.startswith("TBA_"):
             return False
         
@@ -466,7 +512,7 @@ class TimetableSolverV7:
         
         Uses STRICT load balancing to distribute faculty across sections.
         """
-        subject_code = subject.get('course_code', subject.get('name', ''))
+        subject_code = course_code_of(subject)
         
         # HARD CONSTRAINT CHECK 1: Does this section already have a locked faculty for this subject?
         if section_id is not None:
@@ -477,16 +523,13 @@ class TimetableSolverV7:
                 for f in self.faculty:
                     if f['id'] == locked_faculty_id:
                         if self.is_faculty_free(f['id'], day, slot):
+                            self.report.tally('faculty_tier.locked')
                             return f
                         else:
                             # Faculty is locked but not free - return TBA for this slot
                             # (This shouldn't happen often if we schedule properly)
-                            return {
-                                'id': f"TBA_{subject.get('department', 'DEPT')}",
-                                'name': 'TBA (locked faculty busy)',
-                                'department': subject.get('department', 'DEPT'),
-                                'max_hours': 99
-                            }
+                            self.report.tally('faculty_tier.locked_busy')
+                            return tba_faculty(subject.get('department', 'DEPT'), 'TBA (locked faculty busy)')
         
         faculty_options = subject.get('faculty_options', [])
         
@@ -510,7 +553,7 @@ class TimetableSolverV7:
             
             if self.is_faculty_free(faculty['id'], day, slot):
                 # Check max hours constraint
-                current_hours = self.get_faculty_hours(faculty['id'])
+                current_hours = self.get_faculty_load(faculty['id'])
                 max_hours = faculty.get('max_hours', 18)  # Default to 18, not 40
                 if current_hours < max_hours:
                     # HARD CONSTRAINT: Skip faculty who would exceed consecutive limit
@@ -526,8 +569,10 @@ class TimetableSolverV7:
                         'workload_pct': workload_pct
                     })
         
+        tier = 'faculty_tier.options'
         if not available:
             # SECOND ATTEMPT: Try ANY faculty from the department who is free
+            tier = 'faculty_tier.department'
             dept = subject.get('department', '')
             dept_faculty = [f for f in self.faculty if f['department'] == dept]
             for faculty in dept_faculty:
@@ -539,7 +584,7 @@ class TimetableSolverV7:
                         continue
                 
                 if self.is_faculty_free(faculty['id'], day, slot):
-                    current_hours = self.get_faculty_hours(faculty['id'])
+                    current_hours = self.get_faculty_load(faculty['id'])
                     max_hours = faculty.get('max_hours', 18)
                     if current_hours < max_hours:
                         # HARD CONSTRAINT: Skip faculty who would exceed consecutive limit
@@ -555,6 +600,7 @@ class TimetableSolverV7:
         
         if not available:
             # THIRD ATTEMPT: Find any faculty who is free (cross-department)
+            tier = 'faculty_tier.any_department'
             # Look for faculty with LOWEST hours to ensure even distribution
             for faculty in self.faculty:
                 # Check faculty-section lock
@@ -565,7 +611,7 @@ class TimetableSolverV7:
                         continue
                 
                 if self.is_faculty_free(faculty['id'], day, slot):
-                    current_hours = self.get_faculty_hours(faculty['id'])
+                    current_hours = self.get_faculty_load(faculty['id'])
                     max_hours = faculty.get('max_hours', 18)
                     if current_hours < max_hours:
                         # HARD CONSTRAINT: Skip faculty who would exceed consecutive limit
@@ -584,12 +630,9 @@ class TimetableSolverV7:
         
         if not available:
             # FINAL FALLBACK: Return TBA only if absolutely no faculty available
-            return {
-                'id': f"TBA_{subject.get('department', 'DEPT')}",
-                'name': 'TBA',
-                'department': subject.get('department', 'DEPT'),
-                'max_hours': 99
-            }
+            self.report.tally('faculty_tier.tba')
+            return tba_faculty(subject.get('department', 'DEPT'))
+        self.report.tally(tier)
         
         # Sort by HOURS first (lowest hours = highest priority for assignment)
         available.sort(key=lambda x: x['hours'])
@@ -619,7 +662,7 @@ class TimetableSolverV7:
         3. Fewer assigned hours (workload balancing)
         4. Not exceeding max hours after assignment
         """
-        subject_code = subject.get('course_code', subject.get('name', ''))
+        subject_code = course_code_of(subject)
         
         # HARD CONSTRAINT: Check if this section already has a locked faculty for this subject
         section_lock_key = (section_id, subject_code) if section_id else None
@@ -630,9 +673,11 @@ class TimetableSolverV7:
                 if faculty['id'] == locked_faculty_id:
                     if (self.is_faculty_free(faculty['id'], day, slot1) and 
                         self.is_faculty_free(faculty['id'], day, slot2)):
-                        current_hours = self.get_faculty_hours(faculty['id'])
+                        current_hours = self.get_faculty_load(faculty['id'])
                         max_hours = faculty.get('max_hours', 18)
-                        if current_hours + 2 <= max_hours:
+                        # Pre-assigned hours of this pair are already part of the load
+                        needed = 0 if self.preassigned_faculty.get(section_lock_key) == locked_faculty_id else 2
+                        if current_hours + needed <= max_hours:
                             # print(f"Using LOCKED faculty {locked_faculty_id} for section {section_id} subject {subject_code} (lab)")
                             return faculty
                     # Locked faculty not available - fallback to TBA
@@ -660,7 +705,7 @@ class TimetableSolverV7:
                 continue
                 
             # Check max hours constraint (needs 2 hours) - default to 18, not 40
-            current_hours = self.get_faculty_hours(faculty['id'])
+            current_hours = self.get_faculty_load(faculty['id'])
             max_hours = faculty.get('max_hours', 18)
             if current_hours + 2 <= max_hours:
                 available.append({
@@ -684,7 +729,7 @@ class TimetableSolverV7:
                         self.is_faculty_free(faculty['id'], day, slot2)):
                     continue
                     
-                current_hours = self.get_faculty_hours(faculty['id'])
+                current_hours = self.get_faculty_load(faculty['id'])
                 max_hours = faculty.get('max_hours', 18)
                 if current_hours + 2 <= max_hours:
                     available.append({
@@ -694,12 +739,7 @@ class TimetableSolverV7:
         
         if not available:
             # If no faculty is free for both, return TBA as fallback
-            return {
-                'id': f"TBA_{subject.get('department', 'DEPT')}",
-                'name': 'TBA',
-                'department': subject.get('department', 'DEPT'),
-                'max_hours': 99
-            }
+            return tba_faculty(subject.get('department', 'DEPT'))
         
         # Sort by hours (ascending) - prefer faculty with fewer hours for better distribution
         available.sort(key=lambda x: x['hours'])
@@ -767,29 +807,19 @@ class TimetableSolverV7:
     
     def get_next_compact_slot(self, section_id: int, day: str) -> Optional[int]:
         """Get any available slot - compaction happens in post-processing."""
-        slots = self.get_slots_for_day(day)
-        occupied = set(self.get_section_day_slots(section_id, day))
-        
         # Simply return first free slot
-        for slot in slots:
-            if slot not in occupied:
-                return slot
-        
-        return None
+        free = self.get_section_day_free_bits(section_id, day)
+        return (free & -free).bit_length() or None
 
     def assign_slot(self, section_id: int, day: str, slot: int, subject: dict, room: str, is_lab: bool = False, faculty: dict = None):
         # Get faculty if not provided - pass section_id for rotation
         if faculty is None:
             faculty = self.get_available_faculty(subject, day, slot, section_id, is_lab)
         
-        self.schedule[(section_id, day, slot)] = {
-            'subject': subject,
-            'room': room,
-            'is_lab': is_lab,
-            'faculty': faculty
-        }
+        self.schedule[(section_id, day, slot)] = Assignment(subject, room, is_lab, faculty)
         if not room.startswith("Virtual_"):
             self.room_schedule[room].append((day, slot))
+        self.occupancy.mark(section_id, room, day, slot)
         
         # Track faculty schedule
         if faculty and not faculty['id'].startswith("TBA_"):
@@ -813,11 +843,7 @@ class TimetableSolverV7:
                     i += block_size
                 
                 # Count days with consecutive blocks
-                days_with_consecutive = sum(
-                    1 for d in WEEKDAYS 
-                    if self._day_has_consecutive_theory(faculty['id'], d)
-                )
-                self.faculty_consecutive_blocks[faculty['id']] = days_with_consecutive
+                self._refresh_consecutive_blocks(faculty['id'])
         
         # Track subject-slot usage for cross-section conflict prevention
         subj_id = subject.get('id', subject.get('name'))
@@ -825,8 +851,12 @@ class TimetableSolverV7:
         self.subject_slot_usage[(subj_id, day, slot)].append((section_id, faculty_id))
         
         # Track section subject-slot patterns for pattern violation detection
-        subject_code = subject.get('course_code', subject.get('name', ''))
+        subject_code = course_code_of(subject)
         self.section_subject_slots[section_id][subject_code].append((day, slot))
+        self.update_section_counters(section_id, day, slot, subject, is_lab, 1)
+        
+        # A placed hour of a pre-assigned pair is no longer pending, whoever teaches it
+        self._shift_pending(section_id, subject_code, -1)
         
         # HARD CONSTRAINT: Register faculty-subject-section locks
         # Once a faculty teaches a subject to a section, they can ONLY teach that subject to that section
@@ -844,6 +874,39 @@ class TimetableSolverV7:
                 self.section_subject_faculty_lock[lock_key_section] = faculty['id']
                 # print(f"LOCK: Section {section_id} locked to faculty {faculty['id']} for subject {subject_code}")
     
+    def update_section_counters(self, section_id: int, day: str, slot: int, subject: dict, is_lab: bool, delta: int):
+        """Apply an assign (delta=1) or removal (delta=-1) to the soft-constraint counters"""
+        bit = 1 << (DAY_INDEX[day] * SLOTS_PER_DAY + slot - 1)
+        free = self.section_free_mask[section_id]
+        # Hour counters only move when the slot actually changes state (re-assigns overwrite)
+        if (delta > 0) == bool(free & bit):
+            self.section_free_mask[section_id] = free ^ bit
+            self.section_hours[section_id] += delta
+            if day in WEEKDAYS:
+                self.section_weekday_hours[section_id] += delta
+        
+        subject_code = course_code_of(subject)
+        mask_key = (section_id, subject_code, slot)
+        if delta > 0:
+            self.section_subject_day_mask[mask_key] |= 1 << DAY_INDEX[day]
+        else:
+            self.section_subject_day_mask[mask_key] &= ~(1 << DAY_INDEX[day])
+        
+        self.section_subject_day_hours[(section_id, subject.get('id'), day)] += delta
+        if is_lab:
+            self.section_lab_day_hours[(section_id, day)] += delta
+            if 'Programming Language' in subject.get('name', ''):
+                self.section_plc_lab_hours[section_id] += delta
+    
+    def section_has_lab_on_day(self, section_id: int, day: str) -> bool:
+        return self.section_lab_day_hours.get((section_id, day), 0) > 0
+    
+    def _refresh_consecutive_blocks(self, faculty_id: str):
+        self.faculty_consecutive_blocks[faculty_id] = sum(
+            1 for d in WEEKDAYS
+            if self._day_has_consecutive_theory(faculty_id, d)
+        )
+    
     def _day_has_consecutive_theory(self, faculty_id: str, day: str) -> bool:
         """Check if faculty has 2+ consecutive theory slots on a day"""
         daily_slots = sorted(self.faculty_daily_slots[faculty_id][day])
@@ -880,6 +943,34 @@ class TimetableSolverV7:
     def get_faculty_hours(self, faculty_id: str) -> int:
         """Get total hours assigned to a faculty member"""
         return len(self.faculty_schedule.get(faculty_id, []))
+    
+    def _shift_pending(self, section_id, subject_code: str, delta: int):
+        """Move a pre-assigned pair's unplaced hours (and its teacher's) by delta"""
+        pair = (section_id, subject_code)
+        pending = self.pair_pending_hours.get(pair)
+        if pending is None or (delta < 0 and pending == 0):
+            return
+        self.pair_pending_hours[pair] = pending + delta
+        self.faculty_pending_hours[self.preassigned_faculty[pair]] += delta
+
+    def release_pending_hours(self, section_id=None, subject_code: str = None):
+        """Drop the unplaced hours of one pre-assigned pair, or of all of them.
+        
+        Called once a pair's phase is over: hours it could not place will not
+        be placed later and must stop counting towards its teacher's load.
+        """
+        pairs = [(section_id, subject_code)] if section_id is not None else list(self.pair_pending_hours)
+        for pair in pairs:
+            pending = self.pair_pending_hours.pop(pair, None)
+            if pending:
+                faculty_id = self.preassigned_faculty[pair]
+                self.faculty_pending_hours[faculty_id] -= pending
+                if not self.faculty_pending_hours[faculty_id]:
+                    del self.faculty_pending_hours[faculty_id]
+
+    def get_faculty_load(self, faculty_id: str) -> int:
+        """Scheduled hours plus pre-assigned hours still waiting for a slot"""
+        return self.get_faculty_hours(faculty_id) + self.faculty_pending_hours.get(faculty_id, 0)
 
     def has_faculty_continuous_block(self, faculty_id: str, day: str, slot: int) -> bool:
         """Check if assigning this slot would give faculty a continuous block (3+ consecutive slots)"""
@@ -1113,6 +1204,25 @@ class TimetableSolverV7:
         """Get classrooms for a department - ONLY Classroom type, never Lab"""
         return [r['id'] for r in self.rooms if r['department'] == department and r['room_type'] == 'Classroom']
     
+    def allocate_sync_rooms(self, sections: List[dict], day: str, slots: List[int]) -> Dict[int, str]:
+        """Pick a distinct room for every section of a synchronized block.
+        
+        Solved jointly as an assignment problem (dedicated room preferred, capacity
+        must fit student_count). Virtual rooms only appear when no physical
+        assignment exists for a section.
+        """
+        section_room_map = self.room_allocator.allocate(sections, day, slots, self.is_room_free)
+        virtual = sum(1 for room in section_room_map.values() if room.startswith("Virtual_"))
+        if virtual:
+            print(f"      ⚠️ {day} slot {slots[0]}: {virtual}/{len(sections)} sections have no free room (virtual)")
+        return section_room_map
+    
+    def get_sync_room_ids(self, sections: List[dict]) -> List[str]:
+        """Rooms a synchronized theory block can use: shared classrooms plus the sections' dedicated rooms"""
+        room_ids = [r['id'] for r in self.room_allocator.shared_rooms]
+        room_ids.extend(sec['dedicated_room'] for sec in sections if sec.get('dedicated_room'))
+        return list(dict.fromkeys(room_ids))
+    
     def get_placement_rooms(self) -> List[str]:
         """Get placement rooms from Common department - only for 3rd/4th year students (Sem 5-8)"""
         return [r['id'] for r in self.rooms if r['department'] == 'Common' and r['room_type'] == 'Placement']
@@ -1155,103 +1265,127 @@ class TimetableSolverV7:
         
         return None
 
+    def get_section_day_free_bits(self, section_id: int, day: str) -> int:
+        """Free slots of a section on a day as a bitmask (bit slot-1)"""
+        return (self.section_free_mask[section_id] >> (DAY_INDEX[day] * SLOTS_PER_DAY)) & DAY_SLOT_MASK
+
     def get_section_day_slots(self, section_id: int, day: str) -> List[int]:
         """Get list of occupied slots for a section on a given day"""
-        occupied = []
-        for slot in self.get_slots_for_day(day):
-            if (section_id, day, slot) in self.schedule:
-                occupied.append(slot)
-        return occupied
+        free = self.get_section_day_free_bits(section_id, day)
+        return [slot for slot in self.get_slots_for_day(day) if not free >> (slot - 1) & 1]
 
-    def find_compact_slot(self, section_id: int, day: str, avoid_consecutive_same_subject: str = None, prefer_morning: bool = True, subject_code: str = None) -> Optional[int]:
+    def find_compact_slot(self, section_id: int, day: str, avoid_consecutive_same_subject: str = None, prefer_morning: bool = True, subject_code: str = None, faculty_id: str = None) -> Optional[int]:
         """Find an available slot - prioritize filling from morning but DON'T block scheduling.
         
         PRIORITY: Complete scheduling is more important than compactness.
         Compaction happens in post-processing.
         
         SOFT CONSTRAINT: Avoid pattern violations (same subject same slot on consecutive days)
-        """
-        slots = self.get_slots_for_day(day)
-        occupied = set(self.get_section_day_slots(section_id, day))
-        
-        # Try slots in order: morning first
-        preferred_order = [1, 2, 3, 4, 5, 6]
         
-        # First pass: respect all soft constraints
-        for slot in preferred_order:
-            if slot not in slots:
-                continue
-            if slot in occupied:
-                continue
-            if not self.is_slot_free(section_id, day, slot):
-                continue
-            
-            # Check pattern violation constraint (soft - try to avoid)
-            if subject_code and self.would_create_pattern_violation(section_id, subject_code, day, slot):
-                continue
-            
-            # Check consecutive same subject constraint (soft - skip if violated)
-            if avoid_consecutive_same_subject:
-                prev_key = (section_id, day, slot - 1)
-                next_key = (section_id, day, slot + 1)
-                if prev_key in self.schedule and self.schedule[prev_key]['subject'].get('name') == avoid_consecutive_same_subject:
-                    continue
-                if next_key in self.schedule and self.schedule[next_key]['subject'].get('name') == avoid_consecutive_same_subject:
-                    continue
-            
-            return slot
-        
-        # Second pass: relax pattern constraint but keep consecutive same subject constraint
+        If faculty_id is given (the pair's fixed teacher), only slots where that
+        faculty is free are considered.
+        """
+        free = self.get_section_day_free_bits(section_id, day)
+        if faculty_id:
+            for slot in self.get_slots_for_day(day):
+                if not self.is_faculty_free(faculty_id, day, slot):
+                    free &= ~(1 << (slot - 1))
+        if not free:
+            self.report.tally('find_compact_slot.no_free_slot')
+            return None
+        
+        # Slots that would repeat the subject at the same time on 3 consecutive days
+        pattern = 0
         if subject_code:
-            for slot in preferred_order:
-                if slot not in slots:
-                    continue
-                if slot in occupied:
-                    continue
-                if not self.is_slot_free(section_id, day, slot):
-                    continue
-                
-                if avoid_consecutive_same_subject:
-                    prev_key = (section_id, day, slot - 1)
-                    next_key = (section_id, day, slot + 1)
-                    if prev_key in self.schedule and self.schedule[prev_key]['subject'].get('name') == avoid_consecutive_same_subject:
-                        continue
-                    if next_key in self.schedule and self.schedule[next_key]['subject'].get('name') == avoid_consecutive_same_subject:
-                        continue
-                
-                return slot
-        
-        # Final pass: try without any constraints (just need to schedule)
-        for slot in preferred_order:
-            if slot not in slots:
-                continue
-            if slot in occupied:
-                continue
-            if not self.is_slot_free(section_id, day, slot):
-                continue
-            return slot
+            for slot in WEEKDAY_SLOTS:
+                if free >> (slot - 1) & 1 and self.would_create_pattern_violation(section_id, subject_code, day, slot):
+                    pattern |= 1 << (slot - 1)
+        
+        # Slots next to the same subject (bits either side of each matching class)
+        adjacent = 0
+        if avoid_consecutive_same_subject:
+            busy = ~free & DAY_SLOT_MASK
+            for slot in WEEKDAY_SLOTS:
+                if busy >> (slot - 1) & 1:
+                    entry = self.schedule.get((section_id, day, slot))
+                    if entry and entry['subject'].get('name') == avoid_consecutive_same_subject:
+                        adjacent |= 1 << slot  # slot + 1
+                        if slot > 1:
+                            adjacent |= 1 << (slot - 2)  # slot - 1
+        
+        # Passes, morning first (lowest set bit): all soft constraints, then
+        # without the pattern constraint, then anything free
+        for level, candidates in enumerate((free & ~pattern & ~adjacent, free & ~adjacent, free), 1):
+            candidates &= DAY_SLOT_MASK
+            if candidates:
+                self.report.tally(f'find_compact_slot.pass{level}')
+                return (candidates & -candidates).bit_length()
         
         return None
 
     def get_section_total_hours(self, section_id: int) -> int:
         """Get total scheduled hours for a section"""
-        return sum(1 for key in self.schedule if key[0] == section_id)
+        return self.section_hours.get(section_id, 0)
     
     def get_section_weekday_hours(self, section_id: int) -> int:
         """Get hours scheduled on weekdays (Mon-Fri) only"""
-        return sum(1 for key in self.schedule if key[0] == section_id and key[1] in WEEKDAYS)
+        return self.section_weekday_hours.get(section_id, 0)
     
     def can_avoid_saturday(self, section: dict, hours_needed: int) -> bool:
         """Check if we can fit remaining hours without using Saturday"""
         # Calculate available slots on weekdays
-        available_weekday_slots = 0
-        for day in WEEKDAYS:
-            slots = self.get_slots_for_day(day)
-            for slot in slots:
-                if self.is_slot_free(section['id'], day, slot):
-                    available_weekday_slots += 1
+        available_weekday_slots = (self.section_free_mask[section['id']] & WEEKDAY_BITS).bit_count()
         return available_weekday_slots >= hours_needed
 
+    def preassign_faculty(self):
+        """Phase 0: Bind a faculty to every (section, subject) pair before slot placement.
+        
+        Solved as a min-cost flow over all pairs at once (capacity = max_hours,
+        cost = department affinity + load balance), then seeded into the existing
+        Faculty-Subject-Section and Section-Subject-Faculty locks. Baskets, IE and
+        PCE keep lazy binding; pairs the flow cannot cover fall back to it too.
+        """
+        print("  > Pre-assigning faculty to (section, subject) pairs (min-cost flow)...")
+        
+        # Per-section subjects (synchronized blocks are bound at placement)
+        subjects_by_group = defaultdict(list)
+        for s in self.subjects:
+            if (s['subject_type'] in ('Theory', 'Lab') and not s.get('is_basket')
+                    and not s.get('is_pec') and not s.get('is_iec')):
+                subjects_by_group[(s['department'], s['semester'])].append(s)
+        
+        pairs = []
+        for section in self.sections:
+            # Theory and Lab components share the course code (and the teacher)
+            hours_by_code = defaultdict(int)
+            for s in subjects_by_group.get((section['department'], section['semester']), []):
+                hours_by_code[course_code_of(s)] += s['weekly_hours']
+            for code, hours in hours_by_code.items():
+                pairs.append({
+                    'section_id': section['id'],
+                    'course_code': code,
+                    'department': section['department'],
+                    'semester': section['semester'],
+                    'hours': hours
+                })
+        
+        if not pairs:
+            print("    No (section, subject) pairs to pre-assign")
+            return
+        
+        hours_by_pair = {(p['section_id'], p['course_code']): p['hours'] for p in pairs}
+        assignment = preassign_faculty(pairs, self.faculty, self.faculty_subject_map)
+        
+        for (section_id, code), faculty in assignment.items():
+            self.preassigned_faculty[(section_id, code)] = faculty['id']
+            self.section_subject_faculty_lock[(section_id, code)] = faculty['id']
+            self.faculty_subject_section_lock[(faculty['id'], code)] = section_id
+            self.faculty_pending_hours[faculty['id']] += hours_by_pair[(section_id, code)]
+            self.pair_pending_hours[(section_id, code)] = hours_by_pair[(section_id, code)]
+        
+        print(f"    ✅ {len(assignment)}/{len(pairs)} pairs pre-assigned "
+              f"({len(pairs) - len(assignment)} left to lazy binding)")
+
     def schedule_global_baskets(self):
         """Priority 1: Schedule Basket Courses - HARD CONSTRAINT: Synchronized per SEMESTER
         
@@ -1350,56 +1484,27 @@ class TimetableSolverV7:
             print(f"    {len(sem_sections)} sections need: {list(basket_dict.keys())}")
             
             # Schedule each unique basket subject for this semester
-            slot_idx = 0  # Track which preference to use
+            sem_section_ids = [sec['id'] for sec in sem_sections]
+            sync_rooms = self.get_sync_room_ids(sem_sections)
+            sem_day_load = defaultdict(int)  # day -> basket hours of this semester
             for norm_name, basket_subj in basket_dict.items():
                 hours_needed = basket_subj.get('weekly_hours', 3)
                 hours_assigned = 0
+                basket_days = defaultdict(int)  # day -> hours of this basket
                 
-                # Find slots for this basket's hours
-                for attempt in range(len(slot_preferences)):
-                    if hours_assigned >= hours_needed:
+                # Score all candidate slots at once: free for ALL sections of the
+                # semester, enough free rooms, spread across days
+                while hours_assigned < hours_needed:
+                    choice = self.occupancy.best_sync_slot(
+                        sem_section_ids, slot_preferences, room_ids=sync_rooms,
+                        exclude=semester_used_slots[sem], spread=basket_days, day_load=sem_day_load
+                    )
+                    if choice is None:
                         break
+                    day, slot = choice
                     
-                    pref_idx = (slot_idx + attempt) % len(slot_preferences)
-                    day, slot = slot_preferences[pref_idx]
-                    
-                    # Skip if this slot already used for this semester
-                    if (day, slot) in semester_used_slots[sem]:
-                        continue
-                    
-                    if slot not in self.get_slots_for_day(day):
-                        continue
-                    
-                    # Check if slot is free for ALL sections in this semester
-                    all_free = True
-                    for sec in sem_sections:
-                        if not self.is_slot_free(sec['id'], day, slot):
-                            all_free = False
-                            break
-                    
-                    if not all_free:
-                        continue
-                    
-                    # Find rooms for all sections
-                    section_room_map = {}
-                    
-                    for sec in sem_sections:
-                        # Try Dedicated Room FIRST
-                        dedicated = sec.get('dedicated_room')
-                        if dedicated and self.is_room_free(dedicated, day, slot) and dedicated not in section_room_map.values():
-                            section_room_map[sec['id']] = dedicated
-                            continue
-
-                        # Fallback to department classrooms
-                        dept_rooms = self.get_classrooms(sec['department'])
-                        free_rooms = [r for r in dept_rooms if self.is_room_free(r, day, slot) and r not in section_room_map.values()]
-                        free_rooms.sort(key=lambda r: 0 if 'SPARE' in r else 1)
-                        
-                        if free_rooms:
-                            section_room_map[sec['id']] = free_rooms[0]
-                        else:
-                            # Use virtual room as fallback
-                            section_room_map[sec['id']] = f"Virtual_{sec['department']}_{sec['section']}"
+                    # Find rooms for all sections (joint assignment, dedicated rooms first)
+                    section_room_map = self.allocate_sync_rooms(sem_sections, day, [slot])
                     
                     # Lock this slot for this semester
                     semester_used_slots[sem].add((day, slot))
@@ -1407,15 +1512,14 @@ class TimetableSolverV7:
                     
                     # Assign basket to each section
                     for sec in sem_sections:
-                        room = section_room_map.get(sec['id'], f"Virtual_{sec['department']}_{sec['section']}")
+                        room = section_room_map[sec['id']]
                         self.assign_slot(sec['id'], day, slot, basket_subj, room)
                     
                     hours_assigned += 1
+                    basket_days[day] += 1
+                    sem_day_load[day] += 1
                     print(f"      {norm_name}: {day} slot {slot} -> {len(sem_sections)} sections (LOCKED)")
                 
-                # Move slot index forward for next basket to use different slots
-                slot_idx += hours_assigned + 1
-                
                 if hours_assigned < hours_needed:
                     print(f"    ⚠️ {norm_name}: Only scheduled {hours_assigned}/{hours_needed} hours")
                 else:
@@ -1469,49 +1573,21 @@ class TimetableSolverV7:
             
             print(f"    Scheduling IEC for Sem {sem}: {len(sem_sections)} sections across all depts, {hours_needed}h needed")
             
-            slot_idx = 0
-            for attempt in range(len(slot_preferences)):
-                if hours_assigned >= hours_needed:
+            # Score all candidate slots at once (free for ALL sections, rooms, spread)
+            sem_section_ids = [sec['id'] for sec in sem_sections]
+            sync_rooms = self.get_sync_room_ids(sem_sections)
+            ie_days = defaultdict(int)
+            while hours_assigned < hours_needed:
+                choice = self.occupancy.best_sync_slot(
+                    sem_section_ids, slot_preferences, room_ids=sync_rooms,
+                    exclude=semester_used_slots[sem], spread=ie_days
+                )
+                if choice is None:
                     break
+                day, slot = choice
                 
-                pref_idx = (slot_idx + attempt) % len(slot_preferences)
-                day, slot = slot_preferences[pref_idx]
-                
-                # Skip if slot already used for this semester's IE
-                if (day, slot) in semester_used_slots[sem]:
-                    continue
-                
-                if slot not in self.get_slots_for_day(day):
-                    continue
-                
-                # Check if slot is free for ALL sections in this semester (global check)
-                all_free = True
-                for sec in sem_sections:
-                    if not self.is_slot_free(sec['id'], day, slot):
-                        all_free = False
-                        break
-                
-                if not all_free:
-                    continue
-                
-                # Find rooms for all sections
-                section_room_map = {}
-                for sec in sem_sections:
-                    # Try dedicated room first
-                    dedicated = sec.get('dedicated_room')
-                    if dedicated and self.is_room_free(dedicated, day, slot) and dedicated not in section_room_map.values():
-                        section_room_map[sec['id']] = dedicated
-                        continue
-                    
-                    # Fallback to department classrooms
-                    dept_rooms = self.get_classrooms(sec['department'])
-                    free_rooms = [r for r in dept_rooms if self.is_room_free(r, day, slot) and r not in section_room_map.values()]
-                    free_rooms.sort(key=lambda r: 0 if 'SPARE' in r else 1)
-                    
-                    if free_rooms:
-                        section_room_map[sec['id']] = free_rooms[0]
-                    else:
-                        section_room_map[sec['id']] = f"Virtual_{sec['department']}_{sec['section']}"
+                # Find rooms for all sections (joint assignment, dedicated rooms first)
+                section_room_map = self.allocate_sync_rooms(sem_sections, day, [slot])
                 
                 # Lock this slot for this semester
                 semester_used_slots[sem].add((day, slot))
@@ -1520,10 +1596,11 @@ class TimetableSolverV7:
                 for sec in sem_sections:
                     # Find the IE subject for this section's department
                     dept_ie = next((ie for ie in ie_list if ie['department'] == sec['department']), sample_ie)
-                    room = section_room_map.get(sec['id'], f"Virtual_{sec['department']}_{sec['section']}")
+                    room = section_room_map[sec['id']]
                     self.assign_slot(sec['id'], day, slot, dept_ie, room)
                 
                 hours_assigned += 1
+                ie_days[day] += 1
                 print(f"      IEC Sem {sem}: {day} slot {slot} -> {len(sem_sections)} sections (GLOBAL LOCK)")
             
             if hours_assigned < hours_needed:
@@ -1563,27 +1640,34 @@ class TimetableSolverV7:
             
             print(f"    {dept} Sem {sem}: {len(sections)} sections, {len(pce_list)} PCE subjects")
             
+            section_ids = [sec['id'] for sec in sections]
+            sync_rooms = self.get_sync_room_ids(sections)
+            group_day_load = defaultdict(int)  # day -> PCE hours of this dept-semester
+            
             # Schedule EACH PCE subject
             for pce in pce_list:
                 hours = pce.get('weekly_hours', 3)
                 scheduled = 0
+                pce_days = defaultdict(int)
                 
-                for day, slot in slot_options:
-                    if scheduled >= hours:
+                # Best slot that is free for ALL sections, scored across all options at once
+                while scheduled < hours:
+                    choice = self.occupancy.best_sync_slot(
+                        section_ids, slot_options, room_ids=sync_rooms,
+                        spread=pce_days, day_load=group_day_load
+                    )
+                    if choice is None:
                         break
-                    if slot not in self.get_slots_for_day(day):
-                        continue
-                    
-                    # Check if ALL sections are free
-                    if not all(self.is_slot_free(s['id'], day, slot) for s in sections):
-                        continue
+                    day, slot = choice
                     
                     # Assign to ALL sections at this slot
+                    section_room_map = self.allocate_sync_rooms(sections, day, [slot])
                     for sec in sections:
-                        room = sec.get('dedicated_room') or f"{dept}-Room-{sec['section']}"
-                        self.assign_slot(sec['id'], day, slot, pce, room)
+                        self.assign_slot(sec['id'], day, slot, pce, section_room_map[sec['id']])
                     
                     scheduled += 1
+                    pce_days[day] += 1
+                    group_day_load[day] += 1
                 
                 if scheduled > 0:
                     print(f"      {pce['name'][:30]}: {scheduled}h scheduled")
@@ -1641,68 +1725,69 @@ class TimetableSolverV7:
             print(f"    Scheduling PLC Lab for {dept} Sem {sem}: {len(sections_in_dept_sem)} sections, {sessions_needed} session(s)")
             
             sessions_scheduled = 0
+            section_ids = [sec['id'] for sec in sections_in_dept_sem]
+            
+            # Lab rooms each section may use (CS cluster labs or department labs)
+            section_labs = {
+                sec['id']: cs_cluster_labs if cs_cluster_labs else self.get_lab_rooms_for_subject(sample_lab, sec)
+                for sec in sections_in_dept_sem
+            }
+            candidate_labs = {room for labs_for_sec in section_labs.values() for room in labs_for_sec}
+            candidates = [(day, s1) for day in ALL_DAYS for s1, _ in ALL_SLOT_PAIRS]
+            rejected = set()  # candidates whose rooms could not be matched per section
             
-            # Try each day/slot combination until we find one that works for ALL sections
-            for day in ALL_DAYS:
-                if sessions_scheduled >= sessions_needed:
+            # Score every day/slot-pair at once: free for ALL sections in both slots,
+            # enough free lab rooms, at most one session per day
+            while sessions_scheduled < sessions_needed:
+                choice = self.occupancy.best_sync_slot(
+                    section_ids, candidates, span=2, room_ids=candidate_labs, require_rooms=True,
+                    exclude=rejected
+                )
+                if choice is None:
                     break
+                day, s1 = choice
+                s2 = s1 + 1
                 
-                for s1, s2 in ALL_SLOT_PAIRS:
-                    if sessions_scheduled >= sessions_needed:
+                # Find a lab room for each section, free for both slots and not already taken
+                section_room_map = {}
+                taken = set()
+                for sec in sections_in_dept_sem:
+                    assigned_room = next(
+                        (room for room in section_labs[sec['id']]
+                         if room not in taken and self.is_room_free(room, day, s1) and self.is_room_free(room, day, s2)),
+                        None
+                    )
+                    if not assigned_room:
                         break
+                    section_room_map[sec['id']] = assigned_room
+                    taken.add(assigned_room)
+                
+                if len(section_room_map) < len(sections_in_dept_sem):
+                    rejected.add(choice)
+                    continue
+                
+                # Assign the lab to all sections at this time
+                for sec in sections_in_dept_sem:
+                    # Find the lab subject for this section
+                    sec_lab = next((l for l in labs if l['department'] == sec['department']), sample_lab)
+                    room = section_room_map[sec['id']]
                     
-                    # Check if slot pair is free for ALL sections in this department
-                    all_slots_free = True
-                    for sec in sections_in_dept_sem:
-                        if not (self.is_slot_free(sec['id'], day, s1) and 
-                                self.is_slot_free(sec['id'], day, s2)):
-                            all_slots_free = False
-                            break
-                    
-                    if not all_slots_free:
-                        continue
-                    
-                    # Find lab rooms for each section
-                    section_room_map = {}
-                    all_rooms_found = True
-                    
-                    for sec in sections_in_dept_sem:
-                        # Use CS cluster labs or department labs
-                        available_labs = cs_cluster_labs if cs_cluster_labs else self.get_lab_rooms_for_subject(sample_lab, sec)
-                        
-                        # Find a room free for both slots that's not already assigned
-                        assigned_room = None
-                        for room in available_labs:
-                            if room not in section_room_map.values():
-                                if self.is_room_free(room, day, s1) and self.is_room_free(room, day, s2):
-                                    assigned_room = room
-                                    break
-                        
-                        if assigned_room:
-                            section_room_map[sec['id']] = assigned_room
-                        else:
-                            all_rooms_found = False
-                            break
+                    # Get faculty - must be free for BOTH lab slots
+                    lab_faculty = self.get_available_faculty(sec_lab, day, s1, sec['id'])
+                    if lab_faculty and not lab_faculty['id'].startswith('TBA_'):
+                        if not self.is_faculty_free(lab_faculty['id'], day, s2):
+                            lab_faculty = self.get_available_faculty_for_both_slots(sec_lab, day, s1, s2, sec['id'])
+
+                    self.assign_slot(sec['id'], day, s1, sec_lab, room, is_lab=True, faculty=lab_faculty)
+                    self.assign_slot(sec['id'], day, s2, sec_lab, room, is_lab=True, faculty=lab_faculty)
                     
-                    if all_rooms_found:
-                        # Assign the lab to all sections at this time
-                        for sec in sections_in_dept_sem:
-                            # Find the lab subject for this section
-                            sec_lab = next((l for l in labs if l['department'] == sec['department']), sample_lab)
-                            room = section_room_map[sec['id']]
-                            
-                            # Get faculty
-                            lab_faculty = self.get_available_faculty(sec_lab, day, s1, sec['id'])
-                            
-                            self.assign_slot(sec['id'], day, s1, sec_lab, room, is_lab=True, faculty=lab_faculty)
-                            self.assign_slot(sec['id'], day, s2, sec_lab, room, is_lab=True, faculty=lab_faculty)
-                            
-                            # Mark this lab as scheduled
-                            self.scheduled_plc_labs.add((sec['id'], sec_lab.get('id')))
-                        
-                        sessions_scheduled += 1
-                        print(f"      ✅ {dept} Sem {sem}: PLC Lab at {day} slots {s1}-{s2}")
-                        break  # Move to next session if needed
+                    # Mark this lab as scheduled
+                    self.scheduled_plc_labs.add((sec['id'], sec_lab.get('id')))
+                
+                sessions_scheduled += 1
+                # One PLC lab session per day
+                rejected.update((day, first) for first, _ in ALL_SLOT_PAIRS)
+                print(f"      ✅ {dept} Sem {sem}: PLC Lab at {day} slots {s1}-{s2}")
             
             if sessions_scheduled < sessions_needed:
                 print(f"      ⚠️ {dept} Sem {sem}: Only {sessions_scheduled}/{sessions_needed} PLC Lab sessions scheduled")
@@ -1742,12 +1827,7 @@ class TimetableSolverV7:
                     if (section['id'], lab.get('id')) in self.scheduled_plc_labs:
                         continue  # Already scheduled
                     # Also check if this section already has PLC lab slots
-                    has_plc_lab = any(
-                        'Programming Language' in self.schedule.get((section['id'], d, s), {}).get('subject', {}).get('name', '')
-                        and self.schedule.get((section['id'], d, s), {}).get('is_lab', False)
-                        for d in DAYS for s in range(1, 7)
-                    )
-                    if has_plc_lab:
+                    if self.section_plc_lab_hours.get(section['id'], 0) > 0:
                         continue
                 
                 lab_hours = lab.get('weekly_hours', 2)
@@ -1809,62 +1889,61 @@ class TimetableSolverV7:
             slot_rotation = (sec_hash // len(WEEKDAYS)) % len(ALL_SLOT_PAIRS)
             slot_pairs_order = ALL_SLOT_PAIRS[slot_rotation:] + ALL_SLOT_PAIRS[:slot_rotation]
             
-            # Try to schedule each session
-            for day in days_order:
-                if sessions_scheduled >= sessions_needed:
-                    break
-                
-                # Skip if already has a lab on this day
-                has_lab_on_day = any(
-                    self.schedule.get((section['id'], day, s), {}).get('is_lab', False)
-                    for s in range(1, 7)
-                )
-                if has_lab_on_day:
-                    continue
-                
-                # Try each slot pair in rotated order (NOT always 1-2 first)
-                for s1, s2 in slot_pairs_order:
+            # Try to schedule each session - first round keeps the pair's fixed
+            # teacher free for both slots, second round takes any free pair
+            fixed_faculty = self.section_subject_faculty_lock.get(
+                (section['id'], course_code_of(lab)))
+            for strict in ([True, False] if fixed_faculty else [False]):
+                for day in days_order:
                     if sessions_scheduled >= sessions_needed:
                         break
                     
-                    # Check if section is free
-                    if not (self.is_slot_free(section['id'], day, s1) and 
-                            self.is_slot_free(section['id'], day, s2)):
+                    # Skip if already has a lab on this day
+                    if self.section_has_lab_on_day(section['id'], day):
                         continue
                     
-                    # Find an available lab room
-                    assigned_room = None
-                    for room in lab_rooms_sorted:
-                        if self.is_room_free(room, day, s1) and self.is_room_free(room, day, s2):
-                            assigned_room = room
+                    # Try each slot pair in rotated order (NOT always 1-2 first)
+                    for s1, s2 in slot_pairs_order:
+                        if sessions_scheduled >= sessions_needed:
                             break
-                    
-                    if assigned_room:
-                        # Get faculty ONCE and use for BOTH consecutive lab slots
-                        # This ensures the same teacher takes both hours of a lab session
-                        lab_faculty = self.get_available_faculty(lab, day, s1, section['id'])
                         
-                        # Verify faculty is also free for slot 2
-                        if lab_faculty and not lab_faculty['id'].startswith('TBA_'):
-                            if not self.is_faculty_free(lab_faculty['id'], day, s2):
-                                # Try to get another faculty who is free for both slots
-                                lab_faculty = self.get_available_faculty_for_both_slots(lab, day, s1, s2, section['id'])
+                        # Check if section is free
+                        if not (self.is_slot_free(section['id'], day, s1) and 
+                                self.is_slot_free(section['id'], day, s2)):
+                            continue
+                        if strict and not (self.is_faculty_free(fixed_faculty, day, s1) and
+                                           self.is_faculty_free(fixed_faculty, day, s2)):
+                            continue
+                        
+                        # Find an available lab room
+                        assigned_room = None
+                        for room in lab_rooms_sorted:
+                            if self.is_room_free(room, day, s1) and self.is_room_free(room, day, s2):
+                                assigned_room = room
+                                break
                         
-                        # Assign the lab session with SAME faculty for both slots
-                        self.assign_slot(section['id'], day, s1, lab, assigned_room, is_lab=True, faculty=lab_faculty)
-                        self.assign_slot(section['id'], day, s2, lab, assigned_room, is_lab=True, faculty=lab_faculty)
-                        sessions_scheduled += 1
-                        lab_room_usage[assigned_room] += 1
-                        break  # Move to next day
+                        if assigned_room:
+                            # Get faculty ONCE and use for BOTH consecutive lab slots
+                            # This ensures the same teacher takes both hours of a lab session
+                            lab_faculty = self.get_available_faculty(lab, day, s1, section['id'])
+                            
+                            # Verify faculty is also free for slot 2
+                            if lab_faculty and not lab_faculty['id'].startswith('TBA_'):
+                                if not self.is_faculty_free(lab_faculty['id'], day, s2):
+                                    # Try to get another faculty who is free for both slots
+                                    lab_faculty = self.get_available_faculty_for_both_slots(lab, day, s1, s2, section['id'])
+                            
+                            # Assign the lab session with SAME faculty for both slots
+                            self.assign_slot(section['id'], day, s1, lab, assigned_room, is_lab=True, faculty=lab_faculty)
+                            self.assign_slot(section['id'], day, s2, lab, assigned_room, is_lab=True, faculty=lab_faculty)
+                            sessions_scheduled += 1
+                            lab_room_usage[assigned_room] += 1
+                            break  # Move to next day
             
             # If weekdays exhausted, try Saturday
             if sessions_scheduled < sessions_needed:
                 day = 'Saturday'
-                has_lab_on_day = any(
-                    self.schedule.get((section['id'], day, s), {}).get('is_lab', False)
-                    for s in range(1, 5)
-                )
-                if not has_lab_on_day:
+                if not self.section_has_lab_on_day(section['id'], day):
                     for s1, s2 in [(1, 2), (3, 4)]:  # Saturday only has 4 slots
                         if sessions_scheduled >= sessions_needed:
                             break
@@ -1983,7 +2062,9 @@ class TimetableSolverV7:
                 hours_needed = subj['weekly_hours']
                 hours_assigned = 0
                 max_concurrent = faculty_counts.get(subj['id'], 1)
-                subject_code = subj.get('course_code', subj.get('name', ''))
+                subject_code = course_code_of(subj)
+                # Pre-assigned (or already bound) teacher - only offer slots where they are free
+                fixed_faculty = self.section_subject_faculty_lock.get((section['id'], subject_code))
                 
                 # WEEKDAYS FIRST - Different starting days for different sections
                 day_rotation = (sec_idx + subj_idx) % len(WEEKDAYS)
@@ -1996,13 +2077,11 @@ class TimetableSolverV7:
                     if hours_assigned >= hours_needed: break
                     
                     # SOFT CONSTRAINT: Max 1 class per day for same subject (can be overridden)
-                    hours_on_day = sum(1 for s in range(1, 7) 
-                                      if (section['id'], day, s) in self.schedule 
-                                      and self.schedule[(section['id'], day, s)]['subject']['id'] == subj['id'])
-                    if hours_on_day >= 1: continue
+                    if self.section_subject_day_hours.get((section['id'], subj['id'], day), 0) >= 1: continue
                     
                     # Find any available slot - pass subject_code for pattern checking
-                    slot = self.find_compact_slot(section['id'], day, subj['name'], prefer_morning=True, subject_code=subject_code)
+                    slot = self.find_compact_slot(section['id'], day, subj['name'], prefer_morning=True,
+                                                  subject_code=subject_code, faculty_id=fixed_faculty)
                     if slot is None: continue
                     
                     # Check room availability
@@ -2031,7 +2110,9 @@ class TimetableSolverV7:
                     attempts += 1
                     day = WEEKDAYS[attempts % len(WEEKDAYS)]
                     
-                    slot = self.find_compact_slot(section['id'], day, None)  # No subject constraint
+                    # First sweep keeps the fixed teacher free; later sweeps take any slot
+                    teacher = fixed_faculty if attempts <= 2 * len(WEEKDAYS) else None
+                    slot = self.find_compact_slot(section['id'], day, None, faculty_id=teacher)  # No subject constraint
                     if slot is None: continue
                     
                     room = self.get_any_classroom(dept, day, slot, section['semester'])
@@ -2045,7 +2126,10 @@ class TimetableSolverV7:
                 
                 # THIRD PASS: Use Saturday
                 if hours_assigned < hours_needed:
-                    for sat_slot in [1, 2, 3, 4]:
+                    sat_slots = [1, 2, 3, 4]
+                    if fixed_faculty:
+                        sat_slots.sort(key=lambda sl: not self.is_faculty_free(fixed_faculty, 'Saturday', sl))
+                    for sat_slot in sat_slots:
                         if hours_assigned >= hours_needed: break
                         if not self.is_slot_free(section['id'], 'Saturday', sat_slot): continue
                         
@@ -2058,6 +2142,9 @@ class TimetableSolverV7:
                         self.assign_slot(section['id'], 'Saturday', sat_slot, subj, room, faculty=faculty)
                         hours_assigned += 1
                 
+                # Theory is this pair's last placement phase
+                self.release_pending_hours(section['id'], subject_code)
+                
                 # Track unscheduled
                 if hours_assigned < hours_needed:
                     self.unscheduled_subjects.append({
@@ -2173,36 +2260,67 @@ class TimetableSolverV7:
         print("   HARD CONSTRAINTS: Basket sync, No consecutive theory, No gaps")
         print("="*60)
         
-        await self.load_data()
+        phase = self.report.phase
+        
+        with phase('load_data'):
+            await self.load_data()
+        
+        # 0. Faculty pre-assignment (min-cost flow) - fixes the teacher per (section, subject)
+        with phase('preassign_faculty'):
+            self.preassign_faculty()
         
         # 1. Global Baskets (Sem 3/4) - HARD: Lock slots per year
-        self.schedule_global_baskets()
+        with phase('global_baskets'):
+            self.schedule_global_baskets()
         
         # 2. Institutional Electives (Sem 5+)
-        self.schedule_ie_blocks()
+        with phase('ie_blocks'):
+            self.schedule_ie_blocks()
         
         # 3. Professional Core Electives (Sem 5+)
-        self.schedule_pce_blocks()
+        with phase('pce_blocks'):
+            self.schedule_pce_blocks()
         
         # 4. PLC Labs (per-department synchronization)
-        self.schedule_plc_labs()
+        with phase('plc_labs'):
+            self.schedule_plc_labs()
         
         # 5. Other Labs
-        self.schedule_labs()
+        with phase('labs'):
+            self.schedule_labs()
         
         # 6. Theory - HARD CONSTRAINT: 100% scheduling
-        self.schedule_theory()
+        with phase('theory'):
+            self.schedule_theory()
         
         # 7. Bridge Courses - MUST be scheduled as LAST class of the day
-        self.schedule_bridge_courses()
+        with phase('bridge_courses'):
+            self.schedule_bridge_courses()
+        
+        # Placement is over: pre-assigned hours still unplaced never will be
+        self.release_pending_hours()
         
         # 8. Post-process: Compact schedules (SOFT constraint)
-        self.compact_schedules()
+        with phase('compact_schedules'):
+            self.compact_schedules()
         
         # 7. Print scheduling summary
         self.print_scheduling_summary()
         
-        return self.get_result()
+        result = self.get_result()
+        print(f"⏱️ Generated in {result['run_report']['total_wall_s']}s "
+              f"(peak RSS {result['run_report']['peak_rss_mb']} MB)")
+        return result
+    
+    def get_run_report(self) -> dict:
+        """Machine-readable report of the last generate() run"""
+        report = self.report.to_dict()
+        report['semester_type'] = self.semester_type
+        report['sections'] = len(self.sections)
+        report['scheduled_slots'] = len(self.schedule)
+        report['unscheduled_subjects'] = len(self.unscheduled_subjects)
+        report['pending_faculty_hours'] = sum(self.faculty_pending_hours.values())
+        return report
     
     def print_scheduling_summary(self):
         """Print a summary of scheduling results."""
@@ -2245,25 +2363,48 @@ class TimetableSolverV7:
         print(f"    ✅ Compaction skipped - basket synchronization preserved")
 
     def remove_slot(self, section_id, day, slot):
-        """Remove a scheduled slot and free up resources"""
+        """Remove a scheduled slot and free up resources (undo of assign_slot).
+        
+        Faculty-subject-section locks are kept - they describe who teaches the
+        pair, not this particular hour.
+        """
         key = (section_id, day, slot)
-        if key in self.schedule:
-            info = self.schedule[key]
-            
-            # Free room
-            room_id = info.get('room_id')
-            if room_id:
-                room_key = (room_id, day, slot)
-                self.room_schedule.discard(room_key)
-            
-            # Free faculty
-            for fid in info.get('faculty_ids', []):
-                fac_key = (fid, day, slot)
-                if fid in self.faculty_schedule:
-                    self.faculty_schedule[fid].discard(fac_key)
-            
-            # Remove from schedule
-            del self.schedule[key]
+        if key not in self.schedule:
+            return
+        info = self.schedule.pop(key)
+        subject = info['subject']
+        room = info['room']
+        faculty = info.get('faculty')
+        is_lab = info.get('is_lab', False)
+        
+        # Free room
+        if not room.startswith("Virtual_") and (day, slot) in self.room_schedule[room]:
+            self.room_schedule[room].remove((day, slot))
+        self.occupancy.mark(section_id, room, day, slot, busy=False)
+        
+        # Free faculty
+        faculty_id = faculty['id'] if faculty else 'TBA'
+        if faculty and not faculty_id.startswith("TBA_"):
+            if (day, slot) in self.faculty_schedule[faculty_id]:
+                self.faculty_schedule[faculty_id].remove((day, slot))
+            if slot in self.faculty_daily_slots[faculty_id][day]:
+                self.faculty_daily_slots[faculty_id][day].remove(slot)
+            if not is_lab:
+                self._refresh_consecutive_blocks(faculty_id)
+        
+        subj_id = subject.get('id', subject.get('name'))
+        usage = self.subject_slot_usage[(subj_id, day, slot)]
+        if (section_id, faculty_id) in usage:
+            usage.remove((section_id, faculty_id))
+        
+        subject_code = course_code_of(subject)
+        pattern_slots = self.section_subject_slots[section_id][subject_code]
+        if (day, slot) in pattern_slots:
+            pattern_slots.remove((day, slot))
+        self.update_section_counters(section_id, day, slot, subject, is_lab, -1)
+        
+        # The hour of a pre-assigned pair is pending again (until the pair is released)
+        self._shift_pending(section_id, subject_code, 1)
 
     def get_result(self):
         # Calculate derived year for frontend
@@ -2284,13 +2425,15 @@ class TimetableSolverV7:
 
         return {
             "schedule": {
-                f"{k[0]}_{k[1]}_{k[2]}": v for k, v in self.schedule.items()
+                f"{k[0]}_{k[1]}_{k[2]}": v.to_dict() if isinstance(v, Assignment) else v
+                for k, v in self.schedule.items()
             },
             "valid_semesters": self.valid_semesters,
             "semester_type": self.semester_type,
             "sections": self.sections,
             "faculty": faculty_summary,
-            "faculty_schedule": {fid: slots for fid, slots in self.faculty_schedule.items()}
+            "faculty_schedule": {fid: slots for fid, slots in self.faculty_schedule.items()},
+            "run_report": self.get_run_report()
         }
 
 if __name__ == "__main__":